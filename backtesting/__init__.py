@@ -0,0 +1,11 @@
+from .backtester import Backtester, add_indicators, load_bars, load_store_bars
+from .performance_metrics import compute_metrics
+
+# Export backtesting tools
+__all__ = [
+    "Backtester",
+    "add_indicators",
+    "load_bars",
+    "load_store_bars",
+    "compute_metrics",
+]
@@ -0,0 +1,167 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as importing it as a package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import IndicatorEngine, feature_union
+from strategies.base import BUY, SELL
+from strategies.composite_strategy import CompositeStrategy
+from execution.risk_management import TAKE_PROFIT_PCT, STOP_LOSS_PCT
+from backtesting.performance_metrics import compute_metrics
+from data.bar_store import BarStore, RAW
+
+# Exit reasons recorded per trade
+EXIT_TAKE_PROFIT = "take_profit"
+EXIT_STOP_LOSS = "stop_loss"
+EXIT_END_OF_DATA = "end_of_data"
+
+# First scan length when looking for a bracket exit; doubles until a hit
+_SCAN_CHUNK = 64
+
+
+def add_indicators(df, features=None):
+    """Adds the missing indicator columns among ``features`` (default INDICATOR_COLUMNS) to bars."""
+    missing = [column for column in feature_union(features) if column not in df.columns]
+    if not missing:
+        return df
+    df = df.copy()
+    for column, values in IndicatorEngine(missing).batch(df).items():
+        df[column] = values
+    return df
+
+
+class Backtester:
+    """Replays signals over historical bars with the live bracket exit rules.
+
+    Mirrors OrderManager.place_bracket_order under RiskManager's defaults: a
+    signal enters at the bar close, only one position is open at a time, and
+    the position exits at the first bar whose range touches the take-profit
+    or stop-loss price. When both are touched in the same bar the stop is
+    assumed to fill first.
+    """
+
+    def __init__(self, strategy, take_profit_pct=TAKE_PROFIT_PCT, stop_loss_pct=STOP_LOSS_PCT):
+        self.strategy = strategy
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+
+    def run(self, df):
+        """Backtests ``df`` (bars) and returns (trades DataFrame, metrics dict).
+
+        Indicators the strategy declares but ``df`` lacks are computed first.
+        """
+        df = add_indicators(df, self.strategy.features)
+        signals = self.strategy.generate_signals(df)
+        return self.simulate(df, signals)
+
+    def simulate(self, df, signals):
+        """Simulates bracket trades for precomputed signal codes over ``df``."""
+        open_ = np.asarray(df['open'], dtype=np.float64)
+        high = np.asarray(df['high'], dtype=np.float64)
+        low = np.asarray(df['low'], dtype=np.float64)
+        close = np.asarray(df['close'], dtype=np.float64)
+        entries = np.flatnonzero(np.asarray(signals) != 0)
+
+        trades = []
+        k = 0
+        while k < len(entries):
+            i = entries[k]
+            side = int(signals[i])
+            trade = self._simulate_trade(i, side, open_, high, low, close)
+            trades.append(trade)
+            # A new entry is possible from the bar the bracket closed in
+            exit_index = trade[1]
+            k = np.searchsorted(entries, max(exit_index, i + 1))
+
+        return self._trades_frame(df, trades), compute_metrics([t[5] for t in trades])
+
+    def _simulate_trade(self, i, side, open_, high, low, close):
+        entry = close[i]
+        if side == BUY:
+            take_profit = round(entry * (1 + self.take_profit_pct), 2)
+            stop_loss = round(entry * (1 - self.stop_loss_pct), 2)
+        else:
+            take_profit = round(entry * (1 - self.take_profit_pct), 2)
+            stop_loss = round(entry * (1 + self.stop_loss_pct), 2)
+
+        n = len(close)
+        start = i + 1
+        chunk = _SCAN_CHUNK
+        while start < n:
+            end = min(n, start + chunk)
+            if side == BUY:
+                stop_hit = low[start:end] <= stop_loss
+                target_hit = high[start:end] >= take_profit
+            else:
+                stop_hit = high[start:end] >= stop_loss
+                target_hit = low[start:end] <= take_profit
+            hit = stop_hit | target_hit
+            if hit.any():
+                offset = int(hit.argmax())
+                j = start + offset
+                if stop_hit[offset]:
+                    # Stops fill at the worse of the stop price and a gapped open
+                    price = min(stop_loss, open_[j]) if side == BUY else max(stop_loss, open_[j])
+                    reason = EXIT_STOP_LOSS
+                else:
+                    price = max(take_profit, open_[j]) if side == BUY else min(take_profit, open_[j])
+                    reason = EXIT_TAKE_PROFIT
+                return self._trade(i, j, side, entry, price, reason)
+            start = end
+            chunk *= 2
+
+        return self._trade(i, n - 1, side, entry, close[-1], EXIT_END_OF_DATA)
+
+    @staticmethod
+    def _trade(entry_index, exit_index, side, entry_price, exit_price, reason):
+        trade_return = side * (exit_price - entry_price) / entry_price
+        return (entry_index, exit_index, side, entry_price, exit_price, trade_return, reason)
+
+    @staticmethod
+    def _trades_frame(df, trades):
+        columns = ['entry_index', 'exit_index', 'side', 'entry_price', 'exit_price', 'return', 'exit_reason']
+        trades = pd.DataFrame(trades, columns=columns)
+        trades['side'] = trades['side'].map({BUY: 'long', SELL: 'short'})
+        if 'timestamp' in df and len(trades):
+            timestamps = np.asarray(df['timestamp'])
+            trades.insert(0, 'entry_time', timestamps[trades['entry_index'].to_numpy()])
+            trades.insert(1, 'exit_time', timestamps[trades['exit_index'].to_numpy()])
+        return trades
+
+
+def load_bars(file_path, features=None):
+    """Loads raw or processed bars from CSV and adds any missing indicators among ``features``."""
+    df = pd.read_csv(file_path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    df = df.drop_duplicates(subset='timestamp').sort_values('timestamp').reset_index(drop=True)
+    return add_indicators(df, features)
+
+
+def load_store_bars(symbol, start=None, end=None, timeframe="1Min", columns=None, store=None, features=None):
+    """Loads bars with start <= timestamp < end from the columnar store and adds missing indicators among ``features``.
+
+    Only ``columns`` (default: every stored column) are read from disk.
+    """
+    store = store or BarStore()
+    df = store.read_frame(symbol, start, end, columns=columns, kind=RAW, timeframe=timeframe)
+    if df.empty:
+        raise ValueError(f"No {timeframe} bars stored for {symbol}")
+    return add_indicators(df, features)
+
+
+# Example usage
+if __name__ == "__main__":
+    # A CSV path, or a symbol to read from the bar store
+    source = sys.argv[1] if len(sys.argv) > 1 else "data/raw/AAPL_raw.csv"
+    if source.endswith(".csv"):
+        symbol = os.path.basename(source).split("_")[0].upper()  # e.g. data/raw/AAPL_raw.csv
+        bars = load_bars(source)
+    else:
+        symbol = source.upper()
+        bars = load_store_bars(symbol, *sys.argv[2:4])
+    trades, metrics = Backtester(CompositeStrategy(symbol)).run(bars)
+    print(trades.tail())
+    for name, value in metrics.items():
+        print(f"{name}: {value}")
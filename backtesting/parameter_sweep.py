@@ -0,0 +1,125 @@
+import os
+import sys
+import itertools
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Allow running this file directly as well as importing it as a package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_streaming.bar_buffer import BarWindow
+from strategies import (
+    EMACrossoverStrategy,
+    VWAPReversionStrategy,
+    RSIReversalStrategy,
+    MACDMomentumStrategy,
+    BollingerBreakoutStrategy,
+    CompositeStrategy,
+)
+from backtesting.backtester import Backtester, add_indicators
+
+# Parameters that are hardcoded in the live bot, with candidate values
+DEFAULT_GRID = {
+    "ema_short": [5, 9, 12],
+    "ema_long": [21, 26, 34],
+    "rsi_overbought": [65, 70, 75, 80],
+    "rsi_oversold": [20, 25, 30, 35],
+    "vwap_threshold": [0.001, 0.002, 0.003],
+    "take_profit_pct": [0.003, 0.005, 0.008],
+    "stop_loss_pct": [0.002, 0.003, 0.005],
+}
+
+# Bar columns the strategies and the bracket simulation read
+BASE_COLUMNS = ['open', 'high', 'low', 'close', 'vwap', 'rsi', 'macd', 'macd_signal', 'bollinger_h', 'bollinger_l']
+
+# Columns shared with the current worker process (set by _init_worker)
+_worker_columns = None
+
+
+def expand_grid(grid, n_samples=None, seed=0):
+    """Expands a parameter grid into a list of valid parameter dicts.
+
+    With ``n_samples`` set, a seeded random sample of that size is drawn from
+    the full grid instead.
+    """
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    combos = [p for p in combos if p["ema_short"] < p["ema_long"] and p["rsi_oversold"] < p["rsi_overbought"]]
+    if n_samples is not None and n_samples < len(combos):
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(combos), size=n_samples, replace=False)
+        combos = [combos[i] for i in sorted(picks)]
+    return combos
+
+
+def build_strategy(params, symbol="SWEEP"):
+    """Builds a CompositeStrategy whose members use the given parameters."""
+    return CompositeStrategy(symbol, strategies=[
+        EMACrossoverStrategy(symbol, short_span=params["ema_short"], long_span=params["ema_long"]),
+        VWAPReversionStrategy(symbol, threshold=params["vwap_threshold"]),
+        RSIReversalStrategy(symbol, overbought=params["rsi_overbought"], oversold=params["rsi_oversold"]),
+        MACDMomentumStrategy(symbol),
+        BollingerBreakoutStrategy(symbol),
+    ])
+
+
+def prepare_columns(bars, ema_spans):
+    """Computes every indicator column the sweep needs, once, as float64 arrays."""
+    names = BASE_COLUMNS + [f'ema_{span}' for span in sorted(set(ema_spans))]
+    bars = add_indicators(bars, names)
+    return {name: np.asarray(bars[name], dtype=np.float64) for name in names}
+
+
+def _init_worker(matrix_path, names):
+    global _worker_columns
+    # Memory-mapped read-only: every worker shares the same physical pages
+    matrix = np.load(matrix_path, mmap_mode='r')
+    _worker_columns = BarWindow({name: matrix[i] for i, name in enumerate(names)})
+
+
+def _evaluate(params):
+    strategy = build_strategy(params)
+    backtester = Backtester(strategy, params["take_profit_pct"], params["stop_loss_pct"])
+    _, metrics = backtester.simulate(_worker_columns, strategy.generate_signals(_worker_columns))
+    return {**params, **metrics}
+
+
+def run_sweep(bars, grid=DEFAULT_GRID, n_samples=None, max_workers=None, sort_by="total_return", seed=0):
+    """Backtests every parameter set on ``bars`` across a process pool.
+
+    Indicator columns are computed once in the parent and handed to the
+    workers as a memory-mapped matrix, so tasks only carry their parameters.
+    Returns a DataFrame of parameters and metrics sorted by ``sort_by``.
+    """
+    combos = expand_grid(grid, n_samples=n_samples, seed=seed)
+    if not combos:
+        return pd.DataFrame()
+
+    spans = [p["ema_short"] for p in combos] + [p["ema_long"] for p in combos]
+    columns = prepare_columns(bars, spans)
+    names = list(columns)
+
+    max_workers = max_workers or os.cpu_count()
+    chunksize = max(1, len(combos) // (max_workers * 4))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        matrix_path = os.path.join(tmp_dir, "columns.npy")
+        np.save(matrix_path, np.stack([columns[name] for name in names]))
+        del columns
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(matrix_path, names)) as executor:
+            results = list(executor.map(_evaluate, combos, chunksize=chunksize))
+
+    return pd.DataFrame(results).sort_values(sort_by, ascending=False).reset_index(drop=True)
+
+
+# Example usage
+if __name__ == "__main__":
+    from backtesting.backtester import load_bars, load_store_bars
+
+    # A CSV path, or a symbol to read from the bar store
+    source = sys.argv[1] if len(sys.argv) > 1 else "data/raw/AAPL_raw.csv"
+    bars = load_bars(source) if source.endswith(".csv") else load_store_bars(source, *sys.argv[2:4])
+    results = run_sweep(bars, n_samples=200)
+    print(results.head(20).to_string())
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def compute_metrics(returns):
+    """Summary statistics for a sequence of per-trade fractional returns."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if not len(returns):
+        return {
+            "num_trades": 0,
+            "win_rate": 0.0,
+            "avg_return": 0.0,
+            "total_return": 0.0,
+            "profit_factor": 0.0,
+            "max_drawdown": 0.0,
+        }
+
+    equity = np.cumprod(1.0 + returns)
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    gross_profit = returns[returns > 0].sum()
+    gross_loss = -returns[returns < 0].sum()
+
+    return {
+        "num_trades": int(len(returns)),
+        "win_rate": float((returns > 0).mean()),
+        "avg_return": float(returns.mean()),
+        "total_return": float(equity[-1] - 1.0),
+        "profit_factor": float(gross_profit / gross_loss) if gross_loss > 0 else float("inf"),
+        "max_drawdown": float((1.0 - equity / peak).max()),
+    }
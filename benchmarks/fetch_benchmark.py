@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from data.bar_store import BarStore
+from data.data_fetcher import HistoricalFetcher
+from benchmarks.synthetic import FakeBarsAPI
+from benchmarks.ingest_benchmark import _git_revision, save_result
+
+
+def _check_store(store, api, symbols, start, end, timeframe):
+    """Returns the number of symbols whose stored bars differ from what the API serves."""
+    expected = api.bar_times(pd.Timestamp(start, tz='UTC').value, pd.Timestamp(end, tz='UTC').value - 1)
+    mismatched = 0
+    for symbol in symbols:
+        stored = store.read(symbol, start, end, columns=['close'], timeframe=timeframe)['timestamp']
+        if len(stored) != len(expected) or not np.array_equal(stored, expected):
+            mismatched += 1
+    return mismatched
+
+
+def run_benchmark(n_symbols=50, start="2024-01-01", end="2024-04-01", timeframe="1Min", workers=8, chunk_days=5,
+                  page_latency_s=0.02, error_rate=0.02, seed=0):
+    """Backfills a synthetic universe from FakeBarsAPI into a temporary store and times each phase.
+
+    Phases: ``interrupted`` (no retries, so throttled chunks fail), ``resume``
+    (fetches only what failed), ``rerun`` (nothing left to fetch) and
+    ``extend`` (one more week, fetched incrementally). Every phase is checked
+    against the bars the API serves.
+    """
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    extended_end = str((pd.Timestamp(end) + pd.Timedelta(days=7)).date())
+    work_dir = tempfile.TemporaryDirectory()
+    store = BarStore(os.path.join(work_dir.name, "store"))
+    api = FakeBarsAPI(page_latency_s=page_latency_s, error_rate=error_rate, seed=seed)
+
+    phases = {}
+    quiet = open(os.devnull, "w")
+    try:
+        for phase, retries, phase_end in (("interrupted", 0, end), ("resume", 5, end), ("rerun", 5, end),
+                                          ("extend", 5, extended_end)):
+            fetcher = HistoricalFetcher(api, store, timeframe, max_workers=workers, chunk_days=chunk_days,
+                                        max_retries=retries, backoff_s=0.01)
+            requests_before = api.requests
+            stdout, sys.stdout = sys.stdout, quiet  # Failed chunks print one line each
+            started = time.perf_counter()
+            try:
+                stats = fetcher.fetch(symbols, start, phase_end)
+            finally:
+                sys.stdout = stdout
+            elapsed = time.perf_counter() - started
+            phases[phase] = {
+                "elapsed_s": elapsed,
+                "chunks": stats["chunks"],
+                "failed_chunks": len(stats["failed"]),
+                "rows": stats["rows"],
+                "rows_per_second": stats["rows"] / elapsed if elapsed else None,
+                "retries": stats["retries"],
+                "requests": api.requests - requests_before,
+                "mismatched_symbols": None if stats["failed"] else _check_store(store, api, symbols, start,
+                                                                                  phase_end, timeframe),
+            }
+    finally:
+        quiet.close()
+        work_dir.cleanup()
+
+    return {
+        "benchmark": "fetch",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "n_symbols": n_symbols,
+            "start": start,
+            "end": end,
+            "timeframe": timeframe,
+            "workers": workers,
+            "chunk_days": chunk_days,
+            "page_latency_s": page_latency_s,
+            "error_rate": error_rate,
+            "seed": seed,
+        },
+        "phases": phases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historical backfill benchmark against a local bars API")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2024-04-01")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunk-days", type=int, default=5)
+    parser.add_argument("--page-latency", type=float, default=0.02, help="Simulated seconds per API page")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Fraction of page requests that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.symbols, args.start, args.end, workers=args.workers, chunk_days=args.chunk_days,
+                           page_latency_s=args.page_latency, error_rate=args.error_rate, seed=args.seed)
+    path = save_result(result, args.output)
+    for phase, stats in result["phases"].items():
+        print(f"{phase:>11}: {stats['chunks']:5d} chunks, {stats['rows']:9d} rows in {stats['elapsed_s']:6.2f}s "
+              f"({stats['requests']} requests, {stats['retries']} retries, {stats['failed_chunks']} failed, "
+              f"mismatched symbols: {stats['mismatched_symbols']})")
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+import ta  # The previous offline implementation, compared against; see requirements-dev.txt
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from indicators import kernels
+from indicators.engine import IndicatorEngine, INDICATOR_COLUMNS
+from data.data_preprocessor import add_technical_indicators
+from benchmarks.ingest_benchmark import _git_revision, save_result
+
+# Every feature add_technical_indicators produces
+ALL_FEATURES = INDICATOR_COLUMNS + ("vwap_14", "order_flow")
+
+
+def synthetic_bars(n_bars, seed=0):
+    """Random-walk OHLCV bars with some flat stretches (zero-movement RSI edge case)."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, 0.05, n_bars)
+    steps[rng.random(n_bars) < 0.05] = 0.0
+    close = 100.0 + np.cumsum(steps)
+    spread = np.abs(rng.normal(0.0, 0.03, n_bars))
+    return pd.DataFrame({
+        "open": close - steps / 2,
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(100, 10_000, n_bars).astype(np.float64),
+    }, index=pd.date_range("2024-01-02 14:30", periods=n_bars, freq="min", tz="UTC"))
+
+
+def pandas_reference(close):
+    """The indicators written directly with pandas ewm/rolling (the definitions the kernels follow)."""
+    close = pd.Series(close)
+    delta = close.diff().fillna(0.0)
+    gain = delta.clip(lower=0).ewm(com=13, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(com=13, adjust=False).mean()
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    mean, std = close.rolling(20).mean(), close.rolling(20).std()
+    return {
+        "ema_9": close.ewm(span=9, adjust=False).mean().to_numpy(),
+        "ema_21": close.ewm(span=21, adjust=False).mean().to_numpy(),
+        "rsi": (100.0 - 100.0 / (1.0 + gain / loss)).to_numpy(),
+        "macd": macd.to_numpy(),
+        "macd_signal": macd.ewm(span=9, adjust=False).mean().to_numpy(),
+        "bollinger_h": (mean + 2 * std).to_numpy(),
+        "bollinger_l": (mean - 2 * std).to_numpy(),
+    }
+
+
+def ta_indicators(bars):
+    """The previous offline implementation (ta library)."""
+    close = bars["close"]
+    macd = ta.trend.MACD(close)
+    bollinger = ta.volatility.BollingerBands(close)
+    return {
+        "vwap_14": ta.volume.VolumeWeightedAveragePrice(bars["high"], bars["low"], close, bars["volume"],
+                                                         window=14).volume_weighted_average_price(),
+        "ema_9": ta.trend.EMAIndicator(close, window=9).ema_indicator(),
+        "ema_21": ta.trend.EMAIndicator(close, window=21).ema_indicator(),
+        "rsi": ta.momentum.RSIIndicator(close, window=14).rsi(),
+        "macd": macd.macd(),
+        "macd_signal": macd.macd_signal(),
+        "bollinger_h": bollinger.bollinger_hband(),
+        "bollinger_l": bollinger.bollinger_lband(),
+    }
+
+
+def per_bar(bars, features=ALL_FEATURES):
+    """Indicators from one IndicatorEngine.update per bar (the live path)."""
+    engine = IndicatorEngine(features)
+    columns = {name: bars[name].to_numpy() for name in engine.inputs}
+    rows = np.array([engine.update({name: values[i] for name, values in columns.items()})
+                     for i in range(len(bars))])
+    return {name: rows[:, i] for i, name in enumerate(engine.columns)}
+
+
+def split_batch(bars, pieces, features=ALL_FEATURES):
+    """IndicatorEngine.batch over consecutive slices (warm-up followed by more history)."""
+    engine = IndicatorEngine(features)
+    bounds = np.linspace(0, len(bars), pieces + 1).astype(int)
+    parts = [engine.batch(bars.iloc[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+    return {name: np.concatenate([part[name] for part in parts]) for name in engine.columns}
+
+
+def max_abs_diff(a, b):
+    """Largest absolute difference; NaN positions must agree (reported as inf otherwise)."""
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return float("inf")
+    both = ~np.isnan(a)
+    return float(np.max(np.abs(a[both] - b[both]), initial=0.0))
+
+
+def _best_of(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(n_bars=200_000, per_bar_bars=20_000, repeat=3, seed=0):
+    """Times each implementation and compares the offline, batch and per-bar outputs column by column."""
+    bars = synthetic_bars(n_bars, seed)
+    close = bars["close"].to_numpy()
+
+    timings = {
+        "pandas": _best_of(lambda: pandas_reference(close), repeat),
+        "kernels": _best_of(lambda: IndicatorEngine().batch(bars), repeat),
+        "kernels_rsi_only": _best_of(lambda: IndicatorEngine(("rsi",)).batch(bars), repeat),
+        "add_technical_indicators": _best_of(lambda: add_technical_indicators(bars.copy()), repeat),
+        "ta": _best_of(lambda: ta_indicators(bars), repeat),
+    }
+    # Per-bar updates are timed on a prefix and scaled, the loop is linear in the bar count
+    short = bars.iloc[:per_bar_bars]
+    timings["per_bar_update"] = _best_of(lambda: per_bar(short, INDICATOR_COLUMNS), 1) * n_bars / len(short)
+    bars_per_second = {name: n_bars / seconds for name, seconds in timings.items()}
+
+    offline = add_technical_indicators(bars.copy())
+    batch = IndicatorEngine(ALL_FEATURES).batch(bars)
+    reference = pandas_reference(close)
+    live = per_bar(short)
+    split = split_batch(bars, 7)
+    parity = {}
+    for name in ALL_FEATURES:
+        parity[name] = {
+            "offline_vs_batch": max_abs_diff(offline[name], batch[name]),
+            "batch_vs_per_bar": max_abs_diff(batch[name][:len(short)], live[name]),
+            "batch_vs_split_batch": max_abs_diff(batch[name], split[name]),
+        }
+        if name in reference:
+            parity[name]["batch_vs_pandas"] = max_abs_diff(batch[name], reference[name])
+    previous = ta_indicators(bars)
+    parity["vwap_14"]["offline_vs_ta"] = max_abs_diff(offline["vwap_14"], previous["vwap_14"])
+
+    return {
+        "benchmark": "indicators",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {"n_bars": n_bars, "per_bar_bars": per_bar_bars, "repeat": repeat, "seed": seed,
+                   "jit": kernels.JIT},
+        "seconds": timings,
+        "bars_per_second": bars_per_second,
+        "parity": parity,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicator kernel timing and offline/live parity check")
+    parser.add_argument("--bars", type=int, default=200_000)
+    parser.add_argument("--per-bar-bars", type=int, default=20_000, help="Bars fed through per-bar updates")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.bars, args.per_bar_bars, args.repeat, args.seed)
+    path = save_result(result, args.output)
+    print(f"{args.bars} bars (jit={result['config']['jit']}):")
+    for name, seconds in result["seconds"].items():
+        print(f"  {name:<26} {seconds * 1e3:9.1f} ms  {result['bars_per_second'][name]:>14,.0f} bars/s")
+    print("Max abs difference per column:")
+    for name, checks in result["parity"].items():
+        print(f"  {name:<12} " + "  ".join(f"{check}={diff:.2e}" for check, diff in checks.items()))
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from data_streaming import alpaca_stream
+from strategies.composite_strategy import CompositeStrategy
+from data_streaming.bar_writer import BarWriter
+from data.bar_store import BarStore
+from data.tick_journal import TickJournal
+from data_streaming.sharding import ShardPool
+from data_streaming.price_cache import LastPriceCache
+from data_streaming.ingest_queue import IngestQueue, IngestWorker, BLOCK, OVERFLOW_POLICIES, TRADE, QUOTE
+from monitoring import metrics
+from benchmarks.synthetic import SyntheticTradeGenerator, FakeStream
+
+# Pipeline stages timed by the benchmark; each time includes the stages it calls
+STAGES = ("trade_ingest", "quote_ingest", "add_trades", "bar_finalize", "add_bar", "generate_signal")
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Default bar timeframe: the default run finalizes a few hundred bars (the live 1Min would finalize none)
+BENCH_TIMEFRAME = "1s"
+
+
+def _timed(samples, function):
+    """Wraps ``function`` so every call appends its duration (ns) to ``samples``."""
+    perf_counter_ns = time.perf_counter_ns
+
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            samples.append(perf_counter_ns() - start)
+    return wrapper
+
+
+def _synthetic_history(n_bars, end_ns, timeframe, price=150.0, seed=0):
+    """Random-walk bars ending just before ``end_ns``, used to warm up the processor."""
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(timeframe).value
+    close = price * np.exp(np.cumsum(rng.normal(0.0, 0.0005, n_bars)))
+    return {
+        'timestamp': end_ns - step * np.arange(n_bars, 0, -1),
+        'open': close,
+        'high': close * 1.0005,
+        'low': close * 0.9995,
+        'close': close,
+        'volume': np.full(n_bars, 1000.0),
+        'vwap': close,
+        'trade_count': np.full(n_bars, 10),
+    }
+
+
+def _summarise(samples):
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples, dtype=np.float64) / 1e3
+    return {
+        "count": int(len(values)),
+        "mean_us": float(values.mean()),
+        "p50_us": float(np.percentile(values, 50)),
+        "p99_us": float(np.percentile(values, 99)),
+        "max_us": float(values.max()),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def _with_signal(context, samples):
+    add_bar, processor = context.processor.add_bar, context.processor
+    generate_signal = _timed(samples, context.strategy.generate_signal)
+
+    def add_bar_and_signal(*bar):
+        add_bar(*bar)
+        if processor.is_ready:
+            generate_signal(processor.recent(2))
+    return add_bar_and_signal
+
+
+async def _drive(stream, handler, symbols, quote_handler=None):
+    stream.subscribe_trades(handler, *symbols)
+    if quote_handler is not None:
+        stream.subscribe_quotes(quote_handler, *symbols)
+    await stream._run_forever()
+
+
+def run_benchmark(n_trades=200_000, symbols=("AAPL",), rate=1000.0, timeframe=BENCH_TIMEFRAME, warmup_bars=100,
+                  paced=False, seed=0, shards=0, timeframes=(), quote_ratio=0.0, queue_size=100_000,
+                  overflow=BLOCK, journal=None):
+    """Pushes synthetic trades through the live ingest pipeline and returns a result dict.
+
+    A real SymbolRegistry (aggregators, DataProcessors and CompositeStrategy
+    per symbol) is driven through alpaca_stream.handle_trade_update, which
+    only enqueues into an IngestQueue (``queue_size``, ``overflow`` policy);
+    an IngestWorker thread aggregates, as in the live stream. Bars are
+    persisted through a BarWriter into a BarStore in a temporary directory,
+    which also holds the warm-up history. With ``shards`` > 0 processing runs
+    in a ShardPool; only the ingest stages are then timed. The elapsed time
+    includes draining the ingest queue and the shard workers. ``timeframes`` are extra
+    bar resolutions built by the same aggregator. With ``quote_ratio`` > 0
+    that many quotes per trade (on average) go through
+    alpaca_stream.handle_quote_update into the registry's TopOfBook. With
+    ``journal`` (a path) the worker records the stream to a TickJournal
+    there, which main.py --replay can play back. Raises RuntimeError if
+    the trades span less than one bar, since the bar and signal stages
+    would then go unmeasured.
+    """
+    generator = SyntheticTradeGenerator(symbols=symbols, rate=rate, seed=seed, quote_ratio=quote_ratio)
+    samples = {stage: [] for stage in STAGES}
+
+    work_dir = tempfile.TemporaryDirectory()
+    store = BarStore(os.path.join(work_dir.name, "store"))
+    if warmup_bars:
+        for i, symbol in enumerate(symbols):
+            store.write(symbol, _synthetic_history(warmup_bars, generator.start_ns, timeframe, seed=seed + i),
+                        timeframe=timeframe)
+    writer = BarWriter(store, timeframe)
+    pool = None
+    if shards:
+        pool = ShardPool(symbols, shards, timeframe, store_root=store.root, strategy_factory=CompositeStrategy,
+                         quotes=bool(quote_ratio)).start()
+    registry = alpaca_stream.SymbolRegistry(symbols, timeframe, writer=writer, strategy_factory=CompositeStrategy,
+                                            shards=pool, prices=LastPriceCache(), timeframes=timeframes,
+                                            quotes=bool(quote_ratio))
+    registry.load_history(store)
+
+    add_trades_samples, finalize_samples = samples["add_trades"], samples["bar_finalize"]
+    for context in registry:
+        context.aggregator.add_trades = _timed(add_trades_samples, context.aggregator.add_trades)
+        context.aggregator._finalize_current_bar = _timed(finalize_samples, context.aggregator._finalize_current_bar)
+        if context.processor is not None:
+            # Evaluate the strategy on every processed bar, as the trading loop would
+            context.processor.add_bar = _timed(samples["add_bar"], _with_signal(context, samples["generate_signal"]))
+    alpaca_stream.registry = registry
+    ingest = alpaca_stream.ingest = IngestQueue(queue_size, overflow)
+    tick_journal = TickJournal(journal) if journal else None
+    worker = IngestWorker(registry, ingest, tick_journal)
+
+    ingest_samples = samples["trade_ingest"]
+    perf_counter_ns = time.perf_counter_ns
+
+    async def handler(trade):
+        start = perf_counter_ns()
+        await alpaca_stream.handle_trade_update(trade)
+        ingest_samples.append(perf_counter_ns() - start)
+
+    quote_samples = samples["quote_ingest"]
+
+    async def quote_handler(quote):
+        start = perf_counter_ns()
+        await alpaca_stream.handle_quote_update(quote)
+        quote_samples.append(perf_counter_ns() - start)
+
+    # Build every message up front so generation cost is not timed
+    metrics.reset()
+    stream = FakeStream(list(generator.messages(n_trades)), paced=paced, rate=rate)
+    signals = 0
+    with work_dir:
+        writer.start()
+        worker.start()
+        started = time.perf_counter()
+        asyncio.run(_drive(stream, handler, symbols, quote_handler if quote_ratio else None))
+        worker.close(timeout=None)
+        if tick_journal is not None:
+            tick_journal.close()
+        if pool is not None:
+            signals = len(pool.close())
+        elapsed = time.perf_counter() - started
+        writer.close()
+    if not samples["bar_finalize"]:
+        raise RuntimeError(f"No {timeframe} bars finalized: {n_trades} trades at {rate:g}/s span "
+                           f"{n_trades / rate:.0f}s; use more --trades, a lower --rate or a shorter --timeframe")
+
+    return {
+        "benchmark": "ingest",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": {
+            "n_trades": n_trades,
+            "symbols": list(symbols),
+            "rate": rate,
+            "timeframe": timeframe,
+            "warmup_bars": warmup_bars,
+            "paced": paced,
+            "seed": seed,
+            "shards": shards,
+            "timeframes": list(timeframes),
+            "quote_ratio": quote_ratio,
+            "queue_size": queue_size,
+            "overflow": overflow,
+            "journal": bool(journal),
+        },
+        "elapsed_s": elapsed,
+        "trades": stream.trades_sent,
+        "quotes": stream.quotes_sent,
+        "messages": stream.messages_sent,
+        "bars": len(samples["bar_finalize"]),
+        "shard_signals": signals,
+        "trades_per_second": stream.trades_sent / elapsed if elapsed else None,
+        "stages": {stage: _summarise(values) for stage, values in samples.items()},
+        "writer": {"rows_written": writer.rows_written, "rows_dropped": writer.rows_dropped},
+        "ingest": {"dropped_trades": ingest.dropped[TRADE], "dropped_quotes": ingest.dropped[QUOTE],
+                   "coalesced": ingest.coalesced, "waits": ingest.waits, "high_water": ingest.high_water},
+        "metrics": metrics.snapshot(),
+    }
+
+
+def save_result(result, output=None):
+    """Writes a result as JSON (default: benchmarks/results/<benchmark>-<revision>-<time>.json)."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = pd.Timestamp(result["created"]).strftime("%Y%m%dT%H%M%S")
+        name = result.get("benchmark", "ingest")
+        output = os.path.join(RESULTS_DIR, f"{name}-{result['revision'] or 'local'}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    return output
+
+
+def compare_results(baseline, current):
+    """Returns {metric: current / baseline} for throughput and per-stage p50/p99."""
+    ratios = {}
+    if baseline.get("trades_per_second") and current.get("trades_per_second"):
+        ratios["trades_per_second"] = current["trades_per_second"] / baseline["trades_per_second"]
+    for stage, stats in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage, {})
+        for key in ("p50_us", "p99_us"):
+            if old.get(key) and stats.get(key):
+                ratios[f"{stage}.{key}"] = stats[key] / old[key]
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic end-to-end ingest throughput benchmark")
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--symbols", default="AAPL", help="Comma-separated symbols")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Generated trades per second")
+    parser.add_argument("--timeframe", default=BENCH_TIMEFRAME, help="Bar timeframe, e.g. the live 1Min")
+    parser.add_argument("--warmup-bars", type=int, default=100)
+    parser.add_argument("--shards", type=int, default=0, help="Indicator/signal worker processes (0: in-process)")
+    parser.add_argument("--timeframes", default="", help="Comma-separated extra timeframes, e.g. 1s,5s,100tick")
+    parser.add_argument("--quotes", type=float, default=0.0, help="Quotes per trade (0: trades only)")
+    parser.add_argument("--queue-size", type=int, default=100_000, help="Ingest queue capacity")
+    parser.add_argument("--overflow", default=BLOCK, choices=OVERFLOW_POLICIES, help="Full ingest queue policy")
+    parser.add_argument("--journal", default=None, help="Record the stream to this tick journal path")
+    parser.add_argument("--paced", action="store_true", help="Replay at --rate instead of as fast as possible")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    parser.add_argument("--compare", default=None, help="Baseline result JSON to compare against")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        n_trades=args.trades,
+        symbols=tuple(s.strip() for s in args.symbols.split(",") if s.strip()),
+        rate=args.rate,
+        timeframe=args.timeframe,
+        warmup_bars=args.warmup_bars,
+        paced=args.paced,
+        seed=args.seed,
+        shards=args.shards,
+        timeframes=tuple(s.strip() for s in args.timeframes.split(",") if s.strip()),
+        quote_ratio=args.quotes,
+        queue_size=args.queue_size,
+        overflow=args.overflow,
+        journal=args.journal,
+    )
+    path = save_result(result, args.output)
+
+    print(f"{result['trades']} trades, {result['bars']} bars in {result['elapsed_s']:.2f}s "
+          f"-> {result['trades_per_second']:,.0f} trades/s")
+    for stage, stats in result["stages"].items():
+        if stats["count"]:
+            print(f"  {stage:<16} n={stats['count']:<8} p50={stats['p50_us']:.1f}us p99={stats['p99_us']:.1f}us")
+    queue = result["ingest"]
+    lag = result["metrics"].get("ingest_lag_seconds", {})
+    print(f"  ingest queue     high_water={queue['high_water']} dropped={queue['dropped_trades']} trades/"
+          f"{queue['dropped_quotes']} quotes coalesced={queue['coalesced']} waits={queue['waits']} "
+          f"lag p50={lag.get('p50_us') or 0:.0f}us p99={lag.get('p99_us') or 0:.0f}us")
+    print(f"Saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for metric, ratio in compare_results(baseline, result).items():
+            print(f"  {metric:<28} x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
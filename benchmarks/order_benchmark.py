@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from execution import order_manager
+from execution.sim_broker import SimulatedBroker
+from data_streaming.price_cache import LastPriceCache
+from benchmarks.synthetic import SyntheticTradeGenerator
+from benchmarks.ingest_benchmark import _summarise, _git_revision, save_result
+
+
+def run_benchmark(n_signals=20_000, symbols=("AAPL", "MSFT", "NVDA", "AMZN", "TSLA"), trades_per_signal=20,
+                  latency=0.0, slippage_bps=1.0, rest_latency_s=0.0, seed=0):
+    """Drives OrderManager -> RiskManager -> AccountState against a SimulatedBroker, offline.
+
+    Synthetic prints feed both the broker (fills, bracket exits) and the
+    price cache; between every ``trades_per_signal`` prints a random
+    buy/sell signal is sent through ``place_bracket_order`` for a random
+    symbol. Returns a JSON-able result with orders per second and the
+    per-call latency distribution.
+    """
+    broker = SimulatedBroker(cash=1e9, latency=latency, slippage_bps=slippage_bps, rest_latency_s=rest_latency_s)
+    account = order_manager.use_broker(broker, max_open_trades=len(symbols))
+    broker.subscribe_trade_updates(account.apply_update)
+    prices = LastPriceCache(fallback=order_manager.latest_trade_price)
+    managers = {symbol: order_manager.OrderManager(symbol, prices=prices) for symbol in symbols}
+
+    generator = SyntheticTradeGenerator(symbols=symbols, rate=5000.0, start_ns=time.time_ns(), seed=seed)
+    symbol_index, timestamps, trade_prices, _ = generator.generate(n_signals * trades_per_signal)
+    rng = np.random.default_rng(seed + 1)
+    signal_symbols = rng.integers(0, len(symbols), n_signals)
+    signal_sides = np.where(rng.random(n_signals) < 0.5, "buy", "sell")
+
+    samples, placed, blocked = [], 0, 0
+    on_trade, update = broker.on_trade, prices.update
+    perf_counter_ns = time.perf_counter_ns
+    quiet = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, quiet  # The order path prints every order
+    started = time.perf_counter()
+    try:
+        for i in range(n_signals):
+            for j in range(i * trades_per_signal, (i + 1) * trades_per_signal):
+                symbol = symbols[symbol_index[j]]
+                price, timestamp = float(trade_prices[j]), int(timestamps[j])
+                on_trade(symbol, price, timestamp)
+                update(symbol, price, timestamp)
+            start = perf_counter_ns()
+            order = managers[symbols[signal_symbols[i]]].place_bracket_order(str(signal_sides[i]))
+            samples.append(perf_counter_ns() - start)
+            if order is None:
+                blocked += 1
+            else:
+                placed += 1
+    finally:
+        sys.stdout = stdout
+        quiet.close()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "benchmark": "orders",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "n_signals": n_signals,
+            "symbols": list(symbols),
+            "trades_per_signal": trades_per_signal,
+            "latency": latency,
+            "slippage_bps": slippage_bps,
+            "rest_latency_s": rest_latency_s,
+            "seed": seed,
+        },
+        "elapsed_s": elapsed,
+        "signals_per_second": n_signals / elapsed,
+        "orders_placed": placed,
+        "orders_per_second": placed / elapsed,
+        "blocked_or_rejected": blocked,
+        "fills": broker.fills,
+        "open_positions": len(broker.list_positions()),
+        "place_bracket_order": _summarise(samples),
+        "account_matches_broker": {
+            symbol: (account.position(symbol) or {}).get("qty") == (
+                float(broker.get_position(symbol).qty) if symbol in {p.symbol for p in broker.list_positions()} else None)
+            for symbol in symbols
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline order pipeline benchmark against the simulated broker")
+    parser.add_argument("--signals", type=int, default=20_000)
+    parser.add_argument("--symbols", default="AAPL,MSFT,NVDA,AMZN,TSLA", help="Comma-separated symbols")
+    parser.add_argument("--n-symbols", type=int, default=0, help="Use this many synthetic symbols instead")
+    parser.add_argument("--trades-per-signal", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Order-to-fill latency in feed seconds")
+    parser.add_argument("--slippage-bps", type=float, default=1.0)
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="Sleep per simulated REST call (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    if args.n_symbols:
+        symbols = tuple(f"SYM{i:04d}" for i in range(args.n_symbols))
+    else:
+        symbols = tuple(s.strip() for s in args.symbols.split(",") if s.strip())
+    result = run_benchmark(
+        n_signals=args.signals,
+        symbols=symbols,
+        trades_per_signal=args.trades_per_signal,
+        latency=args.latency,
+        slippage_bps=args.slippage_bps,
+        rest_latency_s=args.rest_latency,
+        seed=args.seed,
+    )
+    path = save_result(result, args.output)
+    stats = result["place_bracket_order"]
+    print(f"{result['orders_placed']} orders ({result['blocked_or_rejected']} blocked) in {result['elapsed_s']:.2f}s "
+          f"-> {result['orders_per_second']:,.0f} orders/s ({result['signals_per_second']:,.0f} signals/s), "
+          f"{result['fills']} fills")
+    print(f"  place_bracket_order p50={stats['p50_us']:.1f}us p99={stats['p99_us']:.1f}us")
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+import main as bot
+from data_streaming import alpaca_stream
+from data.bar_store import BarStore
+from data.tick_journal import TickJournal, read_journal
+from benchmarks.synthetic import SyntheticTradeGenerator
+from benchmarks.ingest_benchmark import _synthetic_history, _git_revision, save_result
+
+# Arrival delay recorded for every synthetic stream item
+ARRIVAL_LATENCY_NS = 300_000
+
+
+def record_session(path, n_trades, symbols, rate, quote_ratio, seed):
+    """Writes a synthetic session to a TickJournal the way the live IngestWorker records one.
+
+    Returns the journal append cost per item in ns.
+    """
+    generator = SyntheticTradeGenerator(symbols=symbols, rate=rate, seed=seed, quote_ratio=quote_ratio)
+    items = [item for message in generator.messages(n_trades) for item in message]
+    journal = TickJournal(path)
+    started = time.perf_counter_ns()
+    for item in items:
+        timestamp = item['t'].to_unix_nano()
+        if item['T'] == 't':
+            journal.append_trade(item['S'], timestamp, item['p'], item['s'], timestamp + ARRIVAL_LATENCY_NS)
+        else:
+            journal.append_quote(item['S'], timestamp, item['bp'], item['bs'], item['ap'], item['as'],
+                                 timestamp + ARRIVAL_LATENCY_NS)
+    elapsed_ns = time.perf_counter_ns() - started
+    journal.close()
+    return generator, elapsed_ns / len(items)
+
+
+def _orders(broker):
+    """Order fingerprint of a replay: everything but the broker-generated ids."""
+    return [(o.symbol, o.side, o.qty, o.status, o.submitted_at, o.filled_avg_price, o.filled_at)
+            for o in broker.list_orders(status="all", nested=False)]
+
+
+def run_benchmark(n_trades=200_000, symbols=("AAPL", "MSFT"), rate=200.0, quote_ratio=1.0, warmup_bars=100,
+                  runs=2, seed=0):
+    """Records a synthetic session to a tick journal and replays it ``runs`` times through main.py's replay path.
+
+    Each replay is as fast as possible, through the real registry, strategy,
+    trading loop and order path against a fresh SimulatedBroker. Returns a
+    result dict with the replay rate and whether every run placed identical
+    orders.
+    """
+    work_dir = tempfile.TemporaryDirectory()
+    with work_dir:
+        path = os.path.join(work_dir.name, "session.ticks")
+        generator, append_ns = record_session(path, n_trades, symbols, rate, quote_ratio, seed)
+        store = BarStore(os.path.join(work_dir.name, "store"))
+        for i, symbol in enumerate(symbols):
+            store.write(symbol, _synthetic_history(warmup_bars, generator.start_ns, alpaca_stream.TIME_FRAME,
+                                                   seed=seed + i), timeframe=alpaca_stream.TIME_FRAME)
+        records = len(read_journal(path)[0])
+        journal_bytes = os.path.getsize(path)
+
+        quiet = open(os.devnull, "w")
+        stdout, sys.stdout = sys.stdout, quiet  # The trading loop prints every order
+        elapsed, fingerprints, summaries = [], [], []
+        try:
+            for _ in range(runs):
+                started = time.perf_counter()
+                broker = asyncio.run(bot.replay_session(path, store=store))
+                elapsed.append(time.perf_counter() - started)
+                fingerprints.append(_orders(broker))
+                summaries.append(bot.replay_summary(broker))
+        finally:
+            sys.stdout = stdout
+            quiet.close()
+
+    return {
+        "benchmark": "replay",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {
+            "n_trades": n_trades,
+            "symbols": list(symbols),
+            "rate": rate,
+            "quote_ratio": quote_ratio,
+            "warmup_bars": warmup_bars,
+            "runs": runs,
+            "seed": seed,
+        },
+        "records": records,
+        "journal_bytes": journal_bytes,
+        "append_ns_per_record": append_ns,
+        "replay_s": elapsed,
+        "records_per_second": records / min(elapsed),
+        "session_s": (generator.generate(n_trades)[1][-1] - generator.start_ns) / 1e9,
+        "orders": len(fingerprints[0]),
+        "summary": summaries[0],
+        "deterministic": all(fingerprint == fingerprints[0] for fingerprint in fingerprints),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tick journal record/replay benchmark and determinism check")
+    parser.add_argument("--trades", type=int, default=200_000)
+    parser.add_argument("--symbols", default="AAPL,MSFT", help="Comma-separated symbols")
+    parser.add_argument("--rate", type=float, default=200.0, help="Generated trades per second of session time")
+    parser.add_argument("--quotes", type=float, default=1.0, help="Quotes per trade (0: trades only)")
+    parser.add_argument("--warmup-bars", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=2, help="Replays of the same journal to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        n_trades=args.trades,
+        symbols=tuple(s.strip() for s in args.symbols.split(",") if s.strip()),
+        rate=args.rate,
+        quote_ratio=args.quotes,
+        warmup_bars=args.warmup_bars,
+        runs=args.runs,
+        seed=args.seed,
+    )
+    path = save_result(result, args.output)
+
+    print(f"{result['records']} records ({result['journal_bytes'] / 1e6:.1f} MB, "
+          f"{result['append_ns_per_record']:.0f} ns/append) covering {result['session_s']:.0f}s of session")
+    print(f"Replay: {result['records_per_second']:,.0f} records/s, best of {len(result['replay_s'])} "
+          f"({result['session_s'] / min(result['replay_s']):,.0f}x recorded speed)")
+    print(f"  {result['summary']}")
+    print(f"  identical orders across runs: {result['deterministic']}")
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
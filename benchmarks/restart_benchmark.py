@@ -0,0 +1,185 @@
+import os
+import sys
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Allow running this file directly as well as with ``python -m``
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+from data_streaming import alpaca_stream
+from strategies.composite_strategy import CompositeStrategy
+from data.bar_store import BarStore
+from data.tick_journal import TickJournal
+from data_streaming.ingest_queue import IngestWorker, TRADE, QUOTE, SNAPSHOT
+from data_streaming.snapshot import write_snapshot
+from benchmarks.synthetic import SyntheticTradeGenerator
+from benchmarks.ingest_benchmark import _synthetic_history, _git_revision, save_result
+
+# Run in a fresh interpreter: time from start-up to a restored, ready registry
+COLD_START = """
+import time
+started = time.perf_counter()
+import sys
+sys.path.append({root!r})
+import main
+from data_streaming import alpaca_stream
+from strategies.composite_strategy import CompositeStrategy
+imported = time.perf_counter()
+registry = alpaca_stream.SymbolRegistry({symbols!r}, strategy_factory=CompositeStrategy, publish_events=True)
+assert alpaca_stream.restore_snapshot(registry, {path!r}, max_age_s=None)
+print(imported - started, time.perf_counter() - started)
+"""
+
+
+def _registry(symbols):
+    return alpaca_stream.SymbolRegistry(symbols, strategy_factory=CompositeStrategy, publish_events=True)
+
+
+def _items(generator, n_trades):
+    """The generator's stream as (ingest kind, raw message) items in arrival order."""
+    return [(TRADE if item['T'] == 't' else QUOTE, item)
+            for message in generator.messages(n_trades) for item in message]
+
+
+def _feed(worker, items, batch=20):
+    enqueued = time.perf_counter_ns()
+    for i in range(0, len(items), batch):
+        worker.process([(kind, item, enqueued) for kind, item in items[i:i + batch]])
+    events = worker.registry.events
+    while not events.empty():
+        events.get_nowait()
+        events.task_done()
+
+
+def _same(a, b):
+    """Compares registry states by value (pickled bytes differ with object sharing)."""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, np.ndarray):
+        return isinstance(b, np.ndarray) and np.array_equal(a, b, equal_nan=a.dtype.kind == 'f')
+    if hasattr(type(a), '__slots__'):
+        return type(a) is type(b) and all(_same(getattr(a, s), getattr(b, s)) for s in type(a).__slots__)
+    return a == b or (a != a and b != b)
+
+
+def run_benchmark(n_trades=300_000, symbols=("AAPL", "MSFT", "NVDA", "AMZN", "TSLA"), rate=100.0,
+                  history_bars=5000, seed=0):
+    """Times a restart from a state snapshot against a warm-up from stored history, and checks parity.
+
+    A registry (CompositeStrategy per symbol) warms up from ``history_bars``
+    stored bars per symbol and ingests the first third of a synthetic
+    stream, then snapshots through the ingest worker (as the live stream
+    does) and ingests the second third, which is only in the tick journal
+    when it "crashes". A fresh registry restores the snapshot and catches up
+    from the journal; both then ingest the last third. The restored state
+    must equal the uninterrupted one at both points.
+    """
+    generator = SyntheticTradeGenerator(symbols=symbols, rate=rate, seed=seed)
+    items = _items(generator, n_trades)
+    first, second = len(items) // 3, 2 * len(items) // 3
+
+    work_dir = tempfile.TemporaryDirectory()
+    with work_dir:
+        store = BarStore(os.path.join(work_dir.name, "store"))
+        for i, symbol in enumerate(symbols):
+            store.write(symbol, _synthetic_history(history_bars, generator.start_ns, alpaca_stream.TIME_FRAME,
+                                                   seed=seed + i), timeframe=alpaca_stream.TIME_FRAME)
+        snapshot_path = os.path.join(work_dir.name, "stream.snapshot")
+
+        # Uninterrupted session, journaled, with a snapshot after the first third
+        started = time.perf_counter()
+        reference = _registry(symbols)
+        reference.load_history(store)
+        history_s = time.perf_counter() - started
+        journal = TickJournal(os.path.join(work_dir.name, "session.ticks"))
+        worker = IngestWorker(reference, None, journal)
+        _feed(worker, items[:first])
+        captured = []
+        started = time.perf_counter()
+        worker.process([(SNAPSHOT, captured.append, time.perf_counter_ns())])
+        capture_s = time.perf_counter() - started
+        write_snapshot(captured[0], snapshot_path)
+        _feed(worker, items[first:second])
+        journal.flush()  # The session stops here without closing anything
+
+        started = time.perf_counter()
+        restored = _registry(symbols)
+        ok = alpaca_stream.restore_snapshot(restored, snapshot_path, max_age_s=None)
+        restore_s = time.perf_counter() - started
+        parity_at_restart = ok and _same(restored.state(), reference.state())
+
+        # The same restore (and catch-up) in a fresh interpreter, imports included
+        cold = subprocess.run(
+            [sys.executable, "-c", COLD_START.format(root=REPO_ROOT, symbols=list(symbols), path=snapshot_path)],
+            capture_output=True, text=True, cwd=work_dir.name)
+        cold_times = [float(value) for value in cold.stdout.split()[-2:]] if cold.returncode == 0 else [None, None]
+
+        _feed(worker, items[second:])
+        _feed(IngestWorker(restored, None), items[second:])
+        parity_after = _same(restored.state(), reference.state())
+        journal.close()
+
+    return {
+        "benchmark": "restart",
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {
+            "n_trades": n_trades,
+            "symbols": list(symbols),
+            "rate": rate,
+            "history_bars": history_bars,
+            "seed": seed,
+        },
+        "snapshot_bytes": len(captured[0]),
+        "capture_s": capture_s,
+        "history_warmup_s": history_s,
+        "restore_s": restore_s,
+        "caught_up_items": second - first,
+        "cold_start_import_s": cold_times[0],
+        "cold_start_ready_s": cold_times[1],
+        "parity_at_restart": parity_at_restart,
+        "parity_after": parity_after,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot restart timing and parity against an uninterrupted run")
+    parser.add_argument("--trades", type=int, default=300_000)
+    parser.add_argument("--symbols", default="AAPL,MSFT,NVDA,AMZN,TSLA", help="Comma-separated symbols")
+    parser.add_argument("--rate", type=float, default=100.0, help="Generated trades per second of session time")
+    parser.add_argument("--history-bars", type=int, default=5000, help="Stored bars per symbol for the warm-up")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        n_trades=args.trades,
+        symbols=tuple(s.strip() for s in args.symbols.split(",") if s.strip()),
+        rate=args.rate,
+        history_bars=args.history_bars,
+        seed=args.seed,
+    )
+    path = save_result(result, args.output)
+
+    print(f"Snapshot: {result['snapshot_bytes'] / 1e3:.0f} kB, captured in {result['capture_s'] * 1e3:.1f} ms")
+    print(f"Warm-up from history: {result['history_warmup_s'] * 1e3:.1f} ms")
+    print(f"Restore + catch-up of {result['caught_up_items']} journaled items: {result['restore_s'] * 1e3:.1f} ms")
+    if result["cold_start_ready_s"] is not None:
+        print(f"Cold start to ready: {result['cold_start_ready_s']:.2f}s "
+              f"({result['cold_start_import_s']:.2f}s of it imports)")
+    print(f"State matches uninterrupted run: at restart {result['parity_at_restart']}, "
+          f"after more trades {result['parity_after']}")
+    print(f"Saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
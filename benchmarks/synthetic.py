@@ -0,0 +1,212 @@
+import time
+import zlib
+import asyncio
+import msgpack
+import requests
+import numpy as np
+import pandas as pd
+from alpaca_trade_api.rest import APIError
+from alpaca_trade_api.stream import DataStream
+
+# Default session start for generated trades: 2024-01-02 14:30 UTC (US open)
+DEFAULT_START_NS = 1704205800 * 10**9
+
+
+class SyntheticTradeGenerator:
+    """Seeded generator of Alpaca-format trade messages.
+
+    Prices follow a per-symbol geometric random walk, arrivals are Poisson at
+    ``rate`` trades per second across all symbols, and trades are grouped into
+    websocket messages of 1..``max_batch`` trades, as the real feed does.
+    With ``quote_ratio`` > 0 each trade is preceded by a Poisson number (mean
+    ``quote_ratio``) of quotes for its symbol, one to two cents either side of
+    the trade price, in the same message.
+    """
+
+    def __init__(self, symbols=("AAPL",), rate=1000.0, start_price=150.0, volatility=0.0002,
+                 max_batch=20, start_ns=DEFAULT_START_NS, seed=0, quote_ratio=0.0):
+        self.symbols = list(symbols)
+        self.rate = rate
+        self.start_price = start_price
+        self.volatility = volatility
+        self.max_batch = max_batch
+        self.start_ns = start_ns
+        self.seed = seed
+        self.quote_ratio = quote_ratio
+
+    def generate(self, n_trades):
+        """Returns columns (symbol_index, timestamp_ns, price, size) for ``n_trades`` trades."""
+        rng = np.random.default_rng(self.seed)
+        gaps = rng.exponential(1e9 / self.rate, n_trades).astype(np.int64)
+        timestamps = self.start_ns + np.cumsum(gaps)
+        symbol_index = rng.integers(0, len(self.symbols), n_trades)
+
+        prices = np.empty(n_trades)
+        steps = rng.normal(0.0, self.volatility, n_trades)
+        for i in range(len(self.symbols)):
+            mask = symbol_index == i
+            path = self.start_price * np.exp(np.cumsum(steps[mask]))
+            prices[mask] = np.round(path, 2)
+        sizes = rng.geometric(0.02, n_trades)
+        return symbol_index, timestamps, prices, sizes
+
+    def messages(self, n_trades):
+        """Yields websocket messages: lists of raw trade (and quote) dicts as msgpack would decode them."""
+        symbol_index, timestamps, prices, sizes = self.generate(n_trades)
+        rng = np.random.default_rng(self.seed + 1)
+        quote_rng = np.random.default_rng(self.seed + 2)
+        i = 0
+        while i < n_trades:
+            end = min(n_trades, i + int(rng.integers(1, self.max_batch + 1)))
+            message = []
+            for j in range(i, end):
+                if self.quote_ratio:
+                    message.extend(self._quotes(quote_rng, self.symbols[symbol_index[j]], int(timestamps[j]),
+                                                float(prices[j])))
+                message.append({
+                    'T': 't',
+                    'S': self.symbols[symbol_index[j]],
+                    'i': j,
+                    'x': 'V',
+                    'p': float(prices[j]),
+                    's': int(sizes[j]),
+                    't': msgpack.Timestamp.from_unix_nano(int(timestamps[j])),
+                    'c': ['@'],
+                    'z': 'C',
+                })
+            yield message
+            i = end
+
+    def _quotes(self, rng, symbol, trade_ns, price):
+        """Quotes for ``symbol`` in the microseconds before a trade at ``price``."""
+        n = int(rng.poisson(self.quote_ratio))
+        below = rng.integers(0, 3, n)
+        above = np.where(below == 0, rng.integers(1, 3, n), rng.integers(0, 3, n))
+        return [
+            {
+                'T': 'q',
+                'S': symbol,
+                'bx': 'V',
+                'bp': round(price - 0.01 * int(below[k]), 2),
+                'bs': int(rng.integers(1, 10)) * 100,
+                'ax': 'V',
+                'ap': round(price + 0.01 * int(above[k]), 2),
+                'as': int(rng.integers(1, 10)) * 100,
+                't': msgpack.Timestamp.from_unix_nano(trade_ns - (n - k) * 1000),
+                'c': ['R'],
+                'z': 'C',
+            }
+            for k in range(n)
+        ]
+
+
+class FakeStream:
+    """Local stand-in for ``alpaca_trade_api.stream.Stream`` fed by a generator.
+
+    Subscriptions and dispatch go through a real (never connected) DataStream,
+    so handlers receive exactly the entity objects the live feed produces.
+    """
+
+    def __init__(self, messages, paced=False, rate=None):
+        self._messages = messages
+        self._paced = paced
+        self._rate = rate
+        self._data_ws = DataStream("fake-key", "fake-secret", "ws://localhost", raw_data=False, feed="iex")
+        self._stopped = False
+        self.messages_sent = 0
+        self.trades_sent = 0
+        self.quotes_sent = 0
+
+    def subscribe_trades(self, handler, *symbols):
+        self._data_ws.subscribe_trades(handler, *symbols)
+
+    def subscribe_quotes(self, handler, *symbols):
+        self._data_ws.subscribe_quotes(handler, *symbols)
+
+    async def _run_forever(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for msgs in self._messages:
+            if self._stopped:
+                break
+            for msg in msgs:
+                await self._data_ws._dispatch(msg)
+                if msg['T'] == 'q':
+                    self.quotes_sent += 1
+                else:
+                    self.trades_sent += 1
+            self.messages_sent += 1
+            if self._paced and self._rate:
+                # Sleep until the wall clock catches up with the target rate
+                delay = started + self.trades_sent / self._rate - loop.time()
+                await asyncio.sleep(max(0.0, delay))
+            else:
+                # Yield between messages as a real socket read would
+                await asyncio.sleep(0)
+
+    async def stop_ws(self):
+        self._stopped = True
+
+
+class FakeBarsAPI:
+    """Local stand-in for the REST ``get_bars_iter`` endpoint.
+
+    Serves deterministic 1-minute bars for regular US sessions (14:30-21:00
+    UTC, weekdays) in pages of ``page_size`` raw v2 dicts, sleeping
+    ``page_latency_s`` per page. A fraction ``error_rate`` of page requests
+    fail with a 429 APIError or a connection error, like a throttled
+    network, so retry and resume paths can be exercised offline.
+    """
+
+    def __init__(self, page_size=10_000, page_latency_s=0.0, error_rate=0.0, seed=0):
+        self.page_size = page_size
+        self.page_latency_s = page_latency_s
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def bar_times(start_ns, end_ns):
+        """Session minute timestamps (ns) with start_ns <= t <= end_ns."""
+        first_day = np.datetime64(int(start_ns // 86_400_000_000_000), 'D')
+        last_day = np.datetime64(int(end_ns // 86_400_000_000_000), 'D')
+        days = np.arange(first_day, last_day + 1)
+        days = days[np.is_busday(days)].astype('datetime64[ns]').astype(np.int64)
+        minutes = (14 * 60 + 30 + np.arange(390)) * 60 * 10**9
+        times = (days[:, None] + minutes[None, :]).ravel()
+        return times[(times >= start_ns) & (times <= end_ns)]
+
+    def _maybe_fail(self):
+        self.requests += 1
+        if self.page_latency_s:
+            time.sleep(self.page_latency_s)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            if self._rng.random() < 0.5:
+                response = requests.Response()
+                response.status_code = 429
+                raise APIError({"code": 42910000, "message": "too many requests"},
+                               requests.HTTPError(response=response))
+            raise requests.ConnectionError("connection reset by peer")
+
+    def get_bars_iter(self, symbol, timeframe, start=None, end=None, raw=False, **kwargs):
+        times = self.bar_times(_ns(start), _ns(end))
+        seed = zlib.crc32(symbol.encode())
+        for page_start in range(0, max(len(times), 1), self.page_size):
+            self._maybe_fail()
+            page = times[page_start:page_start + self.page_size]
+            stamps = np.datetime_as_string(page.astype('datetime64[ns]').astype('datetime64[s]')).tolist()
+            minutes = (page // 60_000_000_000).tolist()
+            for stamp, minute in zip(stamps, minutes):
+                # Deterministic prices per (symbol, minute) so refetches return identical bars
+                close = 100.0 + seed % 100 + (minute * 7919 + seed) % 1000 / 100.0
+                yield {
+                    't': stamp + 'Z',
+                    'o': close - 0.05, 'h': close + 0.1, 'l': close - 0.1, 'c': close,
+                    'v': 1000 + minute % 500, 'n': 10, 'vw': close,
+                }
+
+
+def _ns(value):
+    return pd.Timestamp(value).value
@@ -0,0 +1,255 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+# Default location of the store, next to the legacy raw/processed CSV folders
+STORE_ROOT = "data/store"
+
+# Datasets kept in the store
+RAW = "raw"              # OHLCV bars (historical fetches and the live stream)
+PROCESSED = "processed"  # Live bars with the streaming indicator columns
+FEATURES = "features"    # Offline preprocessed / normalized feature rows
+
+# Column types: timestamps (UTC ns) and counts are int64, everything else float64
+INT_COLUMNS = ("timestamp", "trade_count")
+
+DAY_NS = 86_400 * 10**9
+SCHEMA_FILE = "_schema.json"
+
+
+def _to_ns(value):
+    """Converts a time (ns int, string, datetime, Timestamp) to UTC nanoseconds; naive times are UTC."""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.value
+
+
+def _timestamps_ns(values):
+    array = np.asarray(values)
+    if array.dtype.kind in 'iu':
+        return array.astype(np.int64)
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).as_unit('ns').asi8
+
+
+def _to_columns(bars):
+    """Normalizes a DataFrame (timestamp column or DatetimeIndex) or dict of arrays to typed columns."""
+    if isinstance(bars, pd.DataFrame):
+        if 'timestamp' not in bars.columns:
+            bars = bars.rename_axis('timestamp').reset_index()
+        items = [(name, bars[name]) for name in bars.columns]
+    else:
+        items = list(bars.items())
+
+    columns = {}
+    for name, values in items:
+        values = _timestamps_ns(values) if name == 'timestamp' else np.asarray(values)
+        if values.dtype.kind not in 'iufb':
+            raise ValueError(f"Column '{name}' is not numeric ({values.dtype})")
+        columns[name] = values.astype(np.int64 if name in INT_COLUMNS else np.float64, copy=False)
+
+    if 'timestamp' not in columns:
+        raise ValueError("Bars need a timestamp column or DatetimeIndex")
+    order = np.argsort(columns['timestamp'], kind='stable')
+    if len(order) and (np.diff(order) != 1).any():
+        columns = {name: values[order] for name, values in columns.items()}
+    return columns
+
+
+def _day(timestamp_ns):
+    return str(np.datetime64(int(timestamp_ns // DAY_NS), 'D'))
+
+
+class BarStore:
+    """Columnar bar store partitioned by dataset, timeframe, symbol and UTC day.
+
+    Layout: ``{root}/{kind}/{timeframe}/{symbol}/{YYYY-MM-DD}/{column}.bin``
+    with one raw little-endian array per column and a ``_schema.json`` per
+    symbol. Reads prune partitions by day, binary-search the sorted
+    timestamps for the exact range, and memory-map only the requested
+    columns, so a backtest or warm-up touches just the bytes it needs.
+    """
+
+    def __init__(self, root=STORE_ROOT):
+        self.root = root
+
+    def _symbol_dir(self, symbol, kind, timeframe):
+        return os.path.join(self.root, kind, timeframe, symbol)
+
+    def sidecar_path(self, symbol, name, kind=RAW, timeframe="1Min"):
+        """Path of a metadata file kept next to a symbol's partitions (``name`` starts with '_')."""
+        return os.path.join(self._symbol_dir(symbol, kind, timeframe), name)
+
+    def schema(self, symbol, kind=RAW, timeframe="1Min"):
+        """Returns {column: dtype name} for a symbol, or None if nothing is stored."""
+        path = os.path.join(self._symbol_dir(symbol, kind, timeframe), SCHEMA_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def partitions(self, symbol, kind=RAW, timeframe="1Min"):
+        """Returns the stored days (YYYY-MM-DD strings) in order."""
+        symbol_dir = self._symbol_dir(symbol, kind, timeframe)
+        if not os.path.isdir(symbol_dir):
+            return []
+        return sorted(d for d in os.listdir(symbol_dir) if not d.startswith(('_', '.')) and '.' not in d)
+
+    def write(self, symbol, bars, kind=RAW, timeframe="1Min", sync=False):
+        """Writes bars; rows newer than a partition's last row are appended, others are merged.
+
+        Rows with a timestamp already in the store replace the stored row.
+        Returns the set of files written (for callers that fsync later).
+        """
+        columns = _to_columns(bars)
+        written = set()
+        if not len(columns['timestamp']):
+            return written
+        schema = self._ensure_schema(symbol, kind, timeframe, columns)
+        columns = {name: columns[name] for name in schema}
+
+        timestamps = columns['timestamp']
+        days = timestamps // DAY_NS
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1, [len(days)]))
+        symbol_dir = self._symbol_dir(symbol, kind, timeframe)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            part_dir = os.path.join(symbol_dir, _day(timestamps[start]))
+            chunk = {name: values[start:end] for name, values in columns.items()}
+            existing = self._open_partition(part_dir, schema, ['timestamp'])
+            if existing is not None and len(existing['timestamp']) and chunk['timestamp'][0] <= existing['timestamp'][-1]:
+                written.update(self._merge_partition(part_dir, schema, chunk, sync))
+            else:
+                written.update(self._append_partition(part_dir, chunk, sync))
+        return written
+
+    def _ensure_schema(self, symbol, kind, timeframe, columns):
+        schema = self.schema(symbol, kind, timeframe)
+        if schema is None:
+            schema = {name: values.dtype.name for name, values in columns.items()}
+            symbol_dir = self._symbol_dir(symbol, kind, timeframe)
+            os.makedirs(symbol_dir, exist_ok=True)
+            with open(os.path.join(symbol_dir, SCHEMA_FILE), "w") as f:
+                json.dump(schema, f, indent=2)
+        elif set(schema) != set(columns):
+            raise ValueError(f"Columns {sorted(columns)} do not match stored schema {sorted(schema)}")
+        return schema
+
+    @staticmethod
+    def _append_partition(part_dir, chunk, sync):
+        os.makedirs(part_dir, exist_ok=True)
+        paths = []
+        for name, values in chunk.items():
+            path = os.path.join(part_dir, f"{name}.bin")
+            with open(path, "ab") as f:
+                f.write(values.tobytes())
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            paths.append(path)
+        return paths
+
+    def _merge_partition(self, part_dir, schema, chunk, sync):
+        existing = self._open_partition(part_dir, schema)
+        merged = {name: np.concatenate((existing[name], chunk[name])) for name in schema}
+        order = np.argsort(merged['timestamp'], kind='stable')
+        timestamps = merged['timestamp'][order]
+        # Keep the last (newest written) row for each timestamp
+        keep = order[np.concatenate((timestamps[1:] != timestamps[:-1], [True]))]
+        merged = {name: values[keep] for name, values in merged.items()}
+        del existing
+
+        tmp_dir, old_dir = part_dir + ".tmp", part_dir + ".old"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._append_partition(tmp_dir, merged, sync)
+        os.replace(part_dir, old_dir)
+        os.replace(tmp_dir, part_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return [os.path.join(part_dir, f"{name}.bin") for name in schema]
+
+    @staticmethod
+    def _open_partition(part_dir, schema, columns=None):
+        """Memory-maps a partition; returns None if it does not exist."""
+        if not os.path.isdir(part_dir):
+            return None
+        names = list(schema) if columns is None else columns
+        arrays = {}
+        for name in names:
+            path = os.path.join(part_dir, f"{name}.bin")
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            arrays[name] = np.memmap(path, dtype=schema[name], mode='r') if size else np.empty(0, schema[name])
+        # A write interrupted midway can leave columns of unequal length
+        rows = min(len(values) for values in arrays.values())
+        return {name: values[:rows] for name, values in arrays.items()}
+
+    def iter_partitions(self, symbol, start=None, end=None, columns=None, kind=RAW, timeframe="1Min"):
+        """Yields (day, {column: memory-mapped view}) for rows with start <= timestamp < end.
+
+        ``start``/``end`` accept anything pandas can parse as a UTC time, or ns ints.
+        """
+        schema = self.schema(symbol, kind, timeframe)
+        if schema is None:
+            return
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        names = ['timestamp'] + [name for name in (columns or schema) if name != 'timestamp']
+
+        symbol_dir = self._symbol_dir(symbol, kind, timeframe)
+        for day in self.partitions(symbol, kind, timeframe):
+            day_ns = pd.Timestamp(day, tz='UTC').value
+            if (start_ns is not None and day_ns + DAY_NS <= start_ns) or (end_ns is not None and day_ns >= end_ns):
+                continue
+            part = self._open_partition(os.path.join(symbol_dir, day), schema, names)
+            timestamps = part['timestamp']
+            lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, 'left'))
+            hi = len(timestamps) if end_ns is None else int(np.searchsorted(timestamps, end_ns, 'left'))
+            if hi > lo:
+                yield day, {name: values[lo:hi] for name, values in part.items()}
+
+    def read(self, symbol, start=None, end=None, columns=None, kind=RAW, timeframe="1Min"):
+        """Reads rows with start <= timestamp < end as {column: array}.
+
+        A single-day result is returned as memory-mapped views (no copy);
+        multi-day results are concatenated.
+        """
+        parts = [part for _, part in self.iter_partitions(symbol, start, end, columns, kind, timeframe)]
+        if len(parts) == 1:
+            return parts[0]
+        schema = self.schema(symbol, kind, timeframe) or {'timestamp': 'int64'}
+        names = ['timestamp'] + [name for name in (columns or schema) if name != 'timestamp']
+        if not parts:
+            return {name: np.empty(0, dtype=schema.get(name, 'float64')) for name in names}
+        return {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+    def read_frame(self, symbol, start=None, end=None, columns=None, kind=RAW, timeframe="1Min"):
+        """Like read(), as a DataFrame with a UTC datetime ``timestamp`` column."""
+        columns = self.read(symbol, start, end, columns, kind, timeframe)
+        df = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ns', utc=True)
+        return df
+
+    def tail(self, symbol, n, columns=None, kind=RAW, timeframe="1Min", end=None):
+        """Reads the newest ``n`` rows (before ``end`` if given), opening only as many recent days as needed."""
+        schema = self.schema(symbol, kind, timeframe)
+        if schema is None:
+            return None
+        names = ['timestamp'] + [name for name in (columns or schema) if name != 'timestamp']
+        end_ns = _to_ns(end)
+        symbol_dir = self._symbol_dir(symbol, kind, timeframe)
+        parts, rows = [], 0
+        for day in reversed(self.partitions(symbol, kind, timeframe)):
+            if end_ns is not None and pd.Timestamp(day, tz='UTC').value >= end_ns:
+                continue
+            part = self._open_partition(os.path.join(symbol_dir, day), schema, names)
+            if end_ns is not None:
+                hi = int(np.searchsorted(part['timestamp'], end_ns, 'left'))
+                part = {name: values[:hi] for name, values in part.items()}
+            parts.append(part)
+            rows += len(part['timestamp'])
+            if rows >= n:
+                break
+        if not parts:
+            return {name: np.empty(0, dtype=schema[name]) for name in names}
+        return {name: np.concatenate([part[name] for part in reversed(parts)])[-n:] for name in names}
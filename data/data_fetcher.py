@@ -1,41 +1,276 @@
 import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import numpy as np
 import pandas as pd
 import alpaca_trade_api as tradeapi
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from alpaca_trade_api.rest import APIError
+
+# Allow running this file directly as well as importing it as a package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.bar_store import BarStore, RAW, DAY_NS, _to_ns
+from execution.rest_client import LazyClient, credentials
 
-# Load API credentials from .env file
-load_dotenv()
-ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
-ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 BASE_URL = "https://paper-api.alpaca.markets/v2"  # Paper trading mode
 
-# Initialize Alpaca API
-api = tradeapi.REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, BASE_URL, api_version='v2')
+# Alpaca API, built on first use with credentials from the environment / .env
+api = LazyClient(lambda: tradeapi.REST(*credentials(), BASE_URL, api_version='v2'))
+
+# Bar columns kept in the columnar store
+STORE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'vwap', 'trade_count']
+
+# Raw v2 bar fields -> store columns
+RAW_FIELDS = {'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume', 'vw': 'vwap', 'n': 'trade_count'}
+
+# Backfill tuning
+CHUNK_DAYS = 5          # UTC days per request chunk
+MAX_WORKERS = 8         # Concurrent chunk requests
+MAX_RETRIES = 5         # Retries per chunk before it is reported as failed
+BACKOFF_S = 0.5         # First retry delay, doubled per attempt (with jitter)
+MAX_BACKOFF_S = 30.0
+FLUSH_ROWS = 10_000     # Rows buffered per chunk before writing to the store (one API page)
+
+# Per-symbol index of fetched time ranges, kept next to the store's schema file
+FETCHED_INDEX_FILE = "_fetched.json"
+
+
+def _is_retryable(error):
+    """Rate limits, server errors and connection problems are retried; other API errors are not."""
+    if isinstance(error, APIError):
+        return error.status_code is None or error.status_code == 429 or error.status_code >= 500
+    return True
+
+
+def split_chunks(start_ns, end_ns, chunk_days=CHUNK_DAYS):
+    """Splits [start_ns, end_ns) at UTC midnights into pieces of at most ``chunk_days`` days.
+
+    Chunk boundaries fall on day boundaries, so each store partition is
+    written by a single chunk and concurrent chunks never touch the same files.
+    """
+    chunks = []
+    while start_ns < end_ns:
+        chunk_end = min(end_ns, (start_ns // DAY_NS + chunk_days) * DAY_NS)
+        chunks.append((start_ns, chunk_end))
+        start_ns = chunk_end
+    return chunks
+
+
+class FetchedRanges:
+    """Persistent, per-symbol list of [start_ns, end_ns) ranges already downloaded.
+
+    Stored as ``_fetched.json`` in the symbol's raw store directory and
+    replaced atomically on every update, so an interrupted backfill keeps
+    every chunk that completed.
+    """
+
+    def __init__(self, store, timeframe):
+        self.store = store
+        self.timeframe = timeframe
+
+    def _path(self, symbol):
+        return self.store.sidecar_path(symbol, FETCHED_INDEX_FILE, kind=RAW, timeframe=self.timeframe)
+
+    def ranges(self, symbol):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [tuple(r) for r in json.load(f)]
+
+    def add(self, symbol, start_ns, end_ns):
+        """Records a completed range, merging it with overlapping or adjacent ones."""
+        merged = []
+        for lo, hi in sorted(self.ranges(symbol) + [(start_ns, end_ns)]):
+            if merged and lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        path = self._path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f)
+        os.replace(tmp_path, path)
+
+    def missing(self, symbol, start_ns, end_ns):
+        """Returns the sub-ranges of [start_ns, end_ns) not yet fetched."""
+        gaps = []
+        cursor = start_ns
+        for lo, hi in self.ranges(symbol):
+            if hi <= cursor:
+                continue
+            if lo >= end_ns:
+                break
+            if lo > cursor:
+                gaps.append((cursor, lo))
+            cursor = max(cursor, hi)
+        if cursor < end_ns:
+            gaps.append((cursor, end_ns))
+        return gaps
+
+
+class HistoricalFetcher:
+    """Concurrent, chunked and resumable backfill of historical bars into the BarStore.
+
+    The requested range of every symbol is reduced to the gaps missing from
+    its ``FetchedRanges`` index, split into day-aligned chunks and fetched
+    by a thread pool. Each chunk pages through ``get_bars_iter`` and writes
+    to the store every ``FLUSH_ROWS`` rows, so memory stays bounded by
+    ``max_workers`` pages. A failed request is retried with exponential
+    backoff from the last row written; a chunk is added to the index only
+    once it has been fetched completely, and only up to the start of the
+    current UTC day, whose later bars a rerun still has to fetch.
+    """
+
+    def __init__(self, rest_api=None, store=None, timeframe="1Min", max_workers=MAX_WORKERS,
+                 chunk_days=CHUNK_DAYS, max_retries=MAX_RETRIES, backoff_s=BACKOFF_S):
+        self.api = rest_api or api
+        self.store = store or BarStore()
+        self.timeframe = timeframe
+        self.max_workers = max_workers
+        self.chunk_days = chunk_days
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.index = FetchedRanges(self.store, timeframe)
+        self._symbol_locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, symbol):
+        with self._locks_lock:
+            return self._symbol_locks.setdefault(symbol, threading.Lock())
+
+    def plan(self, symbols, start, end=None):
+        """Returns the (symbol, start_ns, end_ns) chunks still to fetch; ``end`` defaults to now."""
+        start_ns = _to_ns(start)
+        end_ns = min(_to_ns(end) if end is not None else time.time_ns(), time.time_ns())  # Never mark the future as fetched
+        chunks = []
+        for symbol in symbols:
+            for gap_start, gap_end in self.index.missing(symbol, start_ns, end_ns):
+                chunks.extend((symbol, lo, hi) for lo, hi in split_chunks(gap_start, gap_end, self.chunk_days))
+        return chunks
+
+    def fetch(self, symbols, start, end=None):
+        """Fetches every missing chunk; returns counts of chunks, rows, retries and failures."""
+        chunks = self.plan(symbols, start, end)
+        stats = {"chunks": len(chunks), "rows": 0, "retries": 0, "failed": []}
+        if not chunks:
+            print("Nothing to fetch: requested range already in the store")
+            return stats
+
+        print(f"Fetching {len(chunks)} chunks for {len(set(c[0] for c in chunks))} symbols "
+              f"({self.timeframe}, {self.max_workers} workers)...")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bar-fetch") as pool:
+            futures = {pool.submit(self._fetch_chunk, *chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                symbol, lo, hi = futures[future]
+                try:
+                    rows, retries = future.result()
+                    stats["rows"] += rows
+                    stats["retries"] += retries
+                except Exception as e:
+                    stats["failed"].append((symbol, lo, hi))
+                    print(f"Error fetching {symbol} {pd.Timestamp(lo, tz='UTC')} - {pd.Timestamp(hi, tz='UTC')}: {e}")
+
+        elapsed = time.monotonic() - started
+        print(f"Fetched {stats['rows']} bars in {elapsed:.1f}s ({len(stats['failed'])} chunks failed, "
+              f"{stats['retries']} retries)")
+        return stats
+
+    def _fetch_chunk(self, symbol, start_ns, end_ns):
+        """Fetches one chunk, resuming after the last stored row on retry; returns (rows, retries)."""
+        rows = retries = 0
+        cursor = start_ns
+        while True:
+            buffer = []
+            try:
+                bars = self.api.get_bars_iter(symbol, self.timeframe, start=pd.Timestamp(cursor, tz='UTC').isoformat(),
+                                              end=pd.Timestamp(end_ns, tz='UTC').isoformat(), raw=True)
+                for bar in bars:
+                    buffer.append(bar)
+                    if len(buffer) >= FLUSH_ROWS:
+                        written, cursor = self._write(symbol, buffer, end_ns, cursor)
+                        rows += written
+                        buffer = []
+                written, cursor = self._write(symbol, buffer, end_ns, cursor)
+                rows += written
+                break
+            except Exception as e:
+                # Keep what arrived before the failure and resume after it
+                written, cursor = self._write(symbol, buffer, end_ns, cursor)
+                rows += written
+                if retries >= self.max_retries or not _is_retryable(e):
+                    raise
+                retries += 1
+                delay = min(MAX_BACKOFF_S, self.backoff_s * 2 ** (retries - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+        complete_ns = min(end_ns, time.time_ns() // DAY_NS * DAY_NS)  # Today is still open
+        if complete_ns > start_ns:
+            with self._lock(symbol):
+                self.index.add(symbol, start_ns, complete_ns)
+        return rows, retries
+
+    def _write(self, symbol, raw_bars, end_ns, cursor):
+        """Writes raw v2 bars to the store; returns (rows written, next start ns)."""
+        if not raw_bars:
+            return 0, cursor
+        timestamps = pd.DatetimeIndex(pd.to_datetime([bar['t'] for bar in raw_bars], utc=True, format='ISO8601')).as_unit('ns').asi8
+        keep = timestamps < end_ns  # The API's end bound is inclusive
+        if not keep.any():
+            return 0, cursor
+        columns = {'timestamp': timestamps[keep]}
+        for field, name in RAW_FIELDS.items():
+            columns[name] = np.array([bar.get(field, 0) for bar in raw_bars])[keep]
+        with self._lock(symbol):
+            self.store.write(symbol, columns, kind=RAW, timeframe=self.timeframe)
+        return int(keep.sum()), int(columns['timestamp'][-1]) + 1
+
 
 # Function to fetch historical data
-def fetch_historical_data(symbol="AAPL", timeframe="1Min", start="2024-01-01", end="2024-03-01"):
-    """Fetches historical market data for a given symbol and timeframe using Alpaca's updated API."""
+def fetch_historical_data(symbol="AAPL", timeframe="1Min", start="2024-01-01", end="2024-03-01", export_csv=True):
+    """Fetches historical market data for a given symbol and timeframe using Alpaca's updated API.
+
+    Only ranges missing from the store are downloaded. With ``export_csv`` the
+    stored range is also written to ``data/raw/{symbol}_{timeframe}_raw.csv``
+    for the CSV-based preprocessing pipeline.
+    """
     try:
-        print(f"Fetching {timeframe} data for {symbol} from {start} to {end}...")
-        
-        # Fetch data using the new get_bars method
-        bars = api.get_bars(
-            symbol, 
-            timeframe, 
-            start=start, 
-            end=end
-        ).df
-
-        # Save to CSV
-        raw_data_path = "data/raw/"
-        os.makedirs(raw_data_path, exist_ok=True)
-        file_path = os.path.join(raw_data_path, f"{symbol}_{timeframe}_raw.csv")
-        bars.to_csv(file_path)
-
-        print(f"Data saved to {file_path}")
+        fetcher = HistoricalFetcher(timeframe=timeframe)
+        fetcher.fetch([symbol], start, end)
+
+        if export_csv:
+            raw_data_path = "data/raw/"
+            os.makedirs(raw_data_path, exist_ok=True)
+            file_path = os.path.join(raw_data_path, f"{symbol}_{timeframe}_raw.csv")
+            bars = fetcher.store.read_frame(symbol, start, end, columns=STORE_COLUMNS, timeframe=timeframe)
+            bars.set_index('timestamp').to_csv(file_path)
+            print(f"Data saved to {file_path}")
     except Exception as e:
         print(f"Error fetching data: {e}")
 
+def backfill(symbols, timeframe="1Min", start="2024-01-01", end=None, max_workers=MAX_WORKERS, chunk_days=CHUNK_DAYS):
+    """Backfills a universe of symbols into the store; safe to rerun after an interruption."""
+    fetcher = HistoricalFetcher(timeframe=timeframe, max_workers=max_workers, chunk_days=chunk_days)
+    return fetcher.fetch(symbols, start, end)
+
 # Example usage
 if __name__ == "__main__":
-    fetch_historical_data()
+    parser = argparse.ArgumentParser(description="Backfill historical bars into the columnar store")
+    parser.add_argument("symbols", nargs="*", default=["AAPL"])
+    parser.add_argument("--timeframe", default="1Min")
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2024-03-01")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS)
+    args = parser.parse_args()
+
+    if len(args.symbols) == 1:
+        fetch_historical_data(args.symbols[0], args.timeframe, args.start, args.end)
+    else:
+        backfill(args.symbols, args.timeframe, args.start, args.end, args.workers, args.chunk_days)
@@ -1,13 +1,51 @@
 import os
+import re
+import sys
 import pandas as pd
 import numpy as np
-import ta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Allow running this file directly as well as importing it as a package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.bar_store import BarStore, FEATURES
+from indicators.engine import IndicatorEngine
+from indicators.normalizer import OnlineNormalizer, NORMALIZER_FILE
 
 # Paths
 RAW_DATA_PATH = "data/raw/"
 PROCESSED_DATA_PATH = "data/processed/"
 os.makedirs(PROCESSED_DATA_PATH, exist_ok=True)
 
+# Columns every raw file must have
+RAW_COLUMNS = ['close', 'high', 'low', 'open', 'volume', 'vwap', 'trade_count']
+
+# Indicator columns added by add_technical_indicators ('vwap_14' is a rolling typical-price
+# VWAP; the raw 'vwap' column stays the bar's own VWAP)
+INDICATOR_FEATURES = ['vwap_14', 'ema_9', 'ema_21', 'rsi', 'macd', 'macd_signal',
+                      'bollinger_h', 'bollinger_l', 'order_flow']
+
+# Columns z-scored by normalize_data
+NORMALIZED_COLUMNS = ['close', 'high', 'low', 'open', 'volume',
+                      'vwap', 'vwap_14', 'ema_9', 'ema_21', 'rsi',
+                      'macd', 'macd_signal', 'bollinger_h', 'bollinger_l', 'order_flow']
+
+# Chunked mode: raw rows per chunk, and cleaned rows carried into the next chunk.
+# The slowest-decaying indicator state (RSI, alpha 1/14) keeps (13/14)**1000 ~ 1e-32
+# of its starting value after the carry, so chunk results match the full run to
+# floating point precision.
+CHUNK_ROWS = 100_000
+WARMUP_ROWS = 1_000
+
+# Normalizer statistics: None for expanding (all history), or a half-life in bars
+NORMALIZER_HALFLIFE = None
+
+# Raw file names written by data_fetcher: {symbol}_{timeframe}_raw.csv (the symbol may contain "_")
+RAW_FILENAME = re.compile(r"^(?P<symbol>.+)_(?P<timeframe>\d+[A-Za-z]+)_raw\.csv$")
+
+def _check_columns(df, file_path):
+    if not all(col in df.columns for col in RAW_COLUMNS):
+        raise ValueError(f"Missing required columns in {file_path}")
+
 def load_raw_data(filename):
     """Loads raw CSV data from the raw folder."""
     file_path = os.path.join(RAW_DATA_PATH, filename)
@@ -18,12 +56,21 @@ def load_raw_data(filename):
     df.set_index('timestamp', inplace=True)
     
     # Verify data structure
-    required_columns = ['close', 'high', 'low', 'open', 'volume', 'vwap', 'trade_count']
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"Missing required columns in {file_path}")
+    _check_columns(df, file_path)
     
     return df
 
+def iter_raw_chunks(filename, chunk_rows=CHUNK_ROWS):
+    """Yields the raw CSV as DataFrames of up to ``chunk_rows`` rows."""
+    file_path = os.path.join(RAW_DATA_PATH, filename)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} not found.")
+
+    for df in pd.read_csv(file_path, parse_dates=['timestamp'], chunksize=chunk_rows):
+        df.set_index('timestamp', inplace=True)
+        _check_columns(df, file_path)
+        yield df
+
 def clean_data(df):
     """Handles missing values and ensures correct formatting."""
     # Drop rows with missing values
@@ -45,65 +92,53 @@ def clean_data(df):
     
     return df
 
-def add_technical_indicators(df):
-    """Adds VWAP, EMA, RSI, MACD, Bollinger Bands, and Order Flow analysis."""
+def add_technical_indicators(df, features=INDICATOR_FEATURES):
+    """Adds VWAP, EMA, RSI, MACD, Bollinger Bands, and Order Flow analysis.
+
+    Only ``features`` (and the graph nodes they depend on) are computed.
+    They come from the same streaming indicators as the live DataProcessor,
+    so offline features match what the bot sees per bar.
+    """
     # Ensure required columns are present
-    required_columns = ['close', 'high', 'low', 'volume']
-    if not all(col in df.columns for col in required_columns):
+    engine = IndicatorEngine(features)
+    if not all(col in df.columns for col in engine.inputs):
         raise ValueError("Missing required columns for indicator calculation")
-    
-    # VWAP
-    df['vwap'] = ta.volume.VolumeWeightedAveragePrice(
-        high=df['high'], 
-        low=df['low'], 
-        close=df['close'], 
-        volume=df['volume'],
-        window=14
-    ).volume_weighted_average_price()
-    
-    # EMA (Exponential Moving Average)
-    df['ema_9'] = ta.trend.EMAIndicator(df['close'], window=9).ema_indicator()
-    df['ema_21'] = ta.trend.EMAIndicator(df['close'], window=21).ema_indicator()
-    
-    # RSI (Relative Strength Index)
-    df['rsi'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
-    
-    # MACD (Moving Average Convergence Divergence)
-    macd = ta.trend.MACD(df['close'])
-    df['macd'] = macd.macd()
-    df['macd_signal'] = macd.macd_signal()
-    
-    # Bollinger Bands
-    bollinger = ta.volatility.BollingerBands(df['close'])
-    df['bollinger_h'] = bollinger.bollinger_hband()
-    df['bollinger_l'] = bollinger.bollinger_lband()
-    
-    # Order Flow (Buy/Sell volume estimation)
-    df['order_flow'] = df['volume'] * np.sign(df['close'].diff())  # Approximate buy/sell pressure
-    
+
+    for name, values in engine.batch(df).items():
+        df[name] = values
+
     return df
 
-def normalize_data(df):
-    """Normalizes numerical columns to scale data for machine learning models."""
+def normalize_data(df, normalizer=None):
+    """Normalizes numerical columns to scale data for machine learning models.
+
+    Each row is z-scored with the running statistics of the rows up to and
+    including it (OnlineNormalizer), so no future data leaks into the past.
+    Pass the normalizer of the previous chunk (or a loaded one) to continue
+    its statistics; it is updated in place.
+    """
     # Ensure no NaN values before normalization
     if df.isnull().values.any():
         raise ValueError("NaN values present before normalization")
     
     # Define columns to normalize
-    cols_to_normalize = ['close', 'high', 'low', 'open', 'volume', 
-                         'vwap', 'ema_9', 'ema_21', 'rsi', 
-                         'macd', 'macd_signal', 'bollinger_h', 'bollinger_l', 'order_flow']
+    cols_to_normalize = NORMALIZED_COLUMNS
     
     # Ensure columns exist
     if not all(col in df.columns for col in cols_to_normalize):
         raise ValueError("Missing columns for normalization")
     
-    # Use Z-Score normalization for better stability
-    numeric_cols = df[cols_to_normalize]
-    df[cols_to_normalize] = (numeric_cols - numeric_cols.mean()) / numeric_cols.std()
+    # Causal Z-Score normalization
+    normalizer = normalizer or OnlineNormalizer(cols_to_normalize, halflife=NORMALIZER_HALFLIFE)
+    timestamps = pd.DatetimeIndex(df.index).as_unit('ns').asi8
+    df[cols_to_normalize] = normalizer.batch(df[cols_to_normalize], timestamps)
     
     return df
 
+def normalizer_path(symbol, timeframe, store=None):
+    """Where the normalizer state for a symbol's features is kept (next to them in the store)."""
+    return (store or BarStore()).sidecar_path(symbol, NORMALIZER_FILE, kind=FEATURES, timeframe=timeframe)
+
 def save_processed_data(df, filename):
     """Saves the processed DataFrame as a CSV in the processed folder."""
     file_path = os.path.join(PROCESSED_DATA_PATH, filename)
@@ -111,6 +146,11 @@ def save_processed_data(df, filename):
     print(f"Processed data saved to {file_path}")
     return file_path
 
+def save_features(df, symbol, timeframe):
+    """Writes the processed feature rows to the columnar store."""
+    BarStore().write(symbol, df.select_dtypes(include=[np.number]), kind=FEATURES, timeframe=timeframe)
+    print(f"Stored {len(df)} feature rows for {symbol} ({timeframe})")
+
 def handle_missing_values(df):
     """Handles NaN values in the processed dataset after saving."""
     # Drop rows with too many NaN values
@@ -130,45 +170,139 @@ def handle_missing_values(df):
     
     return df
 
-def preprocess_data(raw_filename):
-    """Runs the full data preprocessing pipeline."""
+def iter_feature_chunks(filename, chunk_rows=CHUNK_ROWS, warmup_rows=WARMUP_ROWS):
+    """Yields cleaned feature rows (indicators added, gaps filled, not normalized) chunk by chunk.
+
+    The last ``warmup_rows`` cleaned raw rows of each chunk are prepended to
+    the next one, so rolling windows, EWM state and forward fills continue
+    across the boundary; those rows are dropped again from the output.
+    """
+    carry = None
+    for raw in iter_raw_chunks(filename, chunk_rows):
+        raw = clean_data(raw)
+        if raw.empty:
+            continue
+        if carry is not None:
+            if raw.index[0] <= carry.index[-1]:
+                raise ValueError(f"{filename} is not sorted by timestamp across chunks; use chunk_rows=None")
+            frame = pd.concat([carry, raw])
+        else:
+            frame = raw
+        carry = frame.iloc[-warmup_rows:]
+
+        features = handle_missing_values(add_technical_indicators(frame.copy()))
+        yield features[features.index >= raw.index[0]]
+
+def _new_rows(df, normalizer):
+    """Drops rows the normalizer has already seen (incremental runs)."""
+    if normalizer.last_timestamp is None:
+        return df
+    return df[pd.DatetimeIndex(df.index).as_unit('ns').asi8 > normalizer.last_timestamp]
+
+def _preprocess_chunked(raw_filename, processed_file_path, symbol, timeframe, chunk_rows, normalizer, append):
+    """Features, normalization and output one chunk at a time; memory stays bounded by the chunk size."""
+    store = BarStore()
+    rows = 0
+    for features in iter_feature_chunks(raw_filename, chunk_rows):
+        features = _new_rows(features, normalizer)
+        if features.empty:
+            continue
+        features = normalize_data(features, normalizer)
+        first = not rows and not append
+        features.to_csv(processed_file_path, mode='w' if first else 'a', header=first)
+        store.write(symbol, features.select_dtypes(include=[np.number]), kind=FEATURES, timeframe=timeframe)
+        rows += len(features)
+    print(f"Processed data saved to {processed_file_path}")
+    print(f"Stored {rows} feature rows for {symbol} ({timeframe})")
+
+def parse_raw_filename(raw_filename):
+    """Returns (symbol, timeframe) from a raw file name such as "AAPL_1Min_raw.csv" or "BRK_B_5Min_raw.csv"."""
+    match = RAW_FILENAME.match(os.path.basename(raw_filename))
+    if match is None:
+        raise ValueError(f"Cannot tell symbol and timeframe from {raw_filename!r}: expected "
+                         f"<symbol>_<timeframe>_raw.csv (e.g. AAPL_1Min_raw.csv), or pass symbol and timeframe")
+    return match.group("symbol"), match.group("timeframe")
+
+def preprocess_data(raw_filename, chunk_rows=CHUNK_ROWS, incremental=False, symbol=None, timeframe=None):
+    """Runs the full data preprocessing pipeline.
+
+    With ``chunk_rows`` the file is processed in bounded memory (see
+    iter_feature_chunks); ``chunk_rows=None`` loads it whole. Both produce
+    the same rows and values. The normalizer state is saved next to the
+    features; with ``incremental`` a rerun continues from it and only
+    normalizes and appends rows newer than the last run (earlier rows are
+    still read as indicator warm-up). ``symbol`` and ``timeframe`` (for the
+    columnar store and normalizer state) default to the ones in the file
+    name; see parse_raw_filename.
+    """
     try:
-        # Load raw data
-        df = load_raw_data(raw_filename)
-        
-        # Clean data
-        df = clean_data(df)
-        
-        # Add technical indicators
-        df = add_technical_indicators(df)
-        
-        # Handle missing values after indicator calculation
-        df = handle_missing_values(df)
-        
-        # Normalize data
-        df = normalize_data(df)
-        
-        # Save processed data
         processed_filename = raw_filename.replace("raw", "processed")
-        save_processed_data(df, processed_filename)
-        
-        # Reload and verify processed data
         processed_file_path = os.path.join(PROCESSED_DATA_PATH, processed_filename)
-        df = pd.read_csv(processed_file_path, parse_dates=['timestamp'])
-        df.set_index('timestamp', inplace=True)
-        
-        # Final check for NaN values
-        if df.isnull().values.any():
-            print("Warning: NaN values still present in processed data")
+        # Keep the features in the columnar store as well ("AAPL_1Min_raw.csv" -> AAPL, 1Min)
+        if symbol is None or timeframe is None:
+            parsed_symbol, parsed_timeframe = parse_raw_filename(raw_filename)
+            symbol, timeframe = symbol or parsed_symbol, timeframe or parsed_timeframe
+        state_path = normalizer_path(symbol, timeframe)
+
+        normalizer = OnlineNormalizer.load(state_path) if incremental else None
+        append = normalizer is not None and os.path.exists(processed_file_path)
+        if normalizer is None:
+            normalizer = OnlineNormalizer(NORMALIZED_COLUMNS, halflife=NORMALIZER_HALFLIFE)
+
+        if chunk_rows:
+            _preprocess_chunked(raw_filename, processed_file_path, symbol, timeframe, chunk_rows, normalizer, append)
+        else:
+            # Load raw data
+            df = load_raw_data(raw_filename)
+
+            # Clean data
+            df = clean_data(df)
+
+            # Add technical indicators
+            df = add_technical_indicators(df)
+
+            # Handle missing values after indicator calculation
             df = handle_missing_values(df)
-            df.to_csv(processed_file_path)
-        
+
+            # Normalize data (rows not seen by a previous run)
+            df = normalize_data(_new_rows(df, normalizer), normalizer)
+
+            # Save processed data
+            if append:
+                df.to_csv(processed_file_path, mode='a', header=False)
+            else:
+                save_processed_data(df, processed_filename)
+            save_features(df, symbol, timeframe)
+
+        normalizer.save(state_path)
         print(f"Data preprocessing completed successfully for {raw_filename}")
-        
+        return processed_file_path
+
     except Exception as e:
         print(f"Error processing data: {e}")
         raise
 
+def preprocess_many(raw_filenames, chunk_rows=CHUNK_ROWS, incremental=False, max_workers=None):
+    """Preprocesses independent raw files (symbols/timeframes) in parallel processes.
+
+    Returns {raw filename: processed path, or None if it failed}.
+    """
+    results = {}
+    max_workers = min(max_workers or os.cpu_count(), len(raw_filenames)) or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(preprocess_data, name, chunk_rows, incremental): name for name in raw_filenames}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception:
+                results[futures[future]] = None  # preprocess_data already printed the error
+    return results
+
 # Example usage
 if __name__ == "__main__":
-    preprocess_data("AAPL_1Min_raw.csv")
\ No newline at end of file
+    # Raw CSV file names in data/raw/, processed in parallel
+    filenames = sys.argv[1:] or ["AAPL_1Min_raw.csv"]
+    if len(filenames) == 1:
+        preprocess_data(filenames[0])
+    else:
+        preprocess_many(filenames)
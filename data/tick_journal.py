@@ -0,0 +1,134 @@
+import os
+import json
+import mmap
+import math
+import struct
+import numpy as np
+
+# Default location of the session journals, next to the bar store
+JOURNAL_ROOT = "data/journal"
+
+# File layout: a fixed header, then one fixed-width record per stream item in arrival order
+MAGIC = b"TICKJRN1"
+VERSION = 1
+HEADER_SIZE = 4096
+_HEADER = struct.Struct("<8sIIQ")  # Magic, version, record size, record count
+_COUNT = struct.Struct("<Q")
+COUNT_OFFSET = 16
+SYMBOLS_OFFSET = 64  # Symbol table as null-padded JSON; records refer to symbols by index
+
+# Record kinds
+TRADE = 0
+QUOTE = 1
+
+# One record; quotes keep the bid in price/size and the offer in ask/ask_size
+RECORD = np.dtype([
+    ("kind", "u1"),
+    ("_pad", "u1"),
+    ("symbol", "<u2"),
+    ("_reserved", "<u4"),
+    ("timestamp", "<i8"),  # Event time, UTC ns
+    ("received", "<i8"),   # Arrival at the websocket handler, UTC ns
+    ("price", "<f8"),
+    ("size", "<f8"),
+    ("ask", "<f8"),
+    ("ask_size", "<f8"),
+])
+_RECORD = struct.Struct("<BxHxxxxqqdddd")
+assert _RECORD.size == RECORD.itemsize
+
+# Records the file grows by when full
+GROW_RECORDS = 1 << 16
+
+
+class TickJournal:
+    """Append-only, memory-mapped binary journal of raw trades and quotes.
+
+    Every append packs one RECORD into the mapping and then bumps the
+    record count in the header, so a reader (or a restart after a crash)
+    only ever sees complete records. The file is extended in steps of
+    GROW_RECORDS; ``close`` trims it to the records written and fsyncs.
+    Symbols are stored once in the header and referenced by index.
+    """
+
+    def __init__(self, path, capacity=GROW_RECORDS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.count = 0
+        self.symbols = []
+        self._symbol_ids = {}
+        self._file = open(path, "w+b")
+        self._file.truncate(HEADER_SIZE + capacity * RECORD.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = capacity
+        _HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD.itemsize, 0)
+        self._write_symbols()
+
+    def append_trade(self, symbol, timestamp, price, size, received):
+        self._append(TRADE, symbol, timestamp, received, price, size, math.nan, math.nan)
+
+    def append_quote(self, symbol, timestamp, bid, bid_size, ask, ask_size, received):
+        self._append(QUOTE, symbol, timestamp, received, bid, bid_size, ask, ask_size)
+
+    def _append(self, kind, symbol, timestamp, received, price, size, ask, ask_size):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._add_symbol(symbol)
+        if self.count == self.capacity:
+            self._grow()
+        _RECORD.pack_into(self._map, HEADER_SIZE + self.count * RECORD.itemsize, kind, symbol_id,
+                          timestamp, received, price, size, ask, ask_size)
+        self.count += 1
+        _COUNT.pack_into(self._map, COUNT_OFFSET, self.count)
+
+    def _add_symbol(self, symbol):
+        symbol_id = len(self.symbols)
+        self.symbols.append(symbol)
+        self._symbol_ids[symbol] = symbol_id
+        self._write_symbols()
+        return symbol_id
+
+    def _write_symbols(self):
+        table = json.dumps(self.symbols).encode()
+        if len(table) > HEADER_SIZE - SYMBOLS_OFFSET:
+            raise ValueError(f"Symbol table of {self.path} does not fit in the journal header")
+        self._map[SYMBOLS_OFFSET:SYMBOLS_OFFSET + len(table)] = table
+
+    def _grow(self):
+        self._map.flush()
+        self._map.close()
+        self.capacity += GROW_RECORDS
+        self._file.truncate(HEADER_SIZE + self.capacity * RECORD.itemsize)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def flush(self):
+        """Writes dirty pages to disk (without fsync)."""
+        self._map.flush()
+
+    def close(self):
+        """Trims the file to the records written and fsyncs it."""
+        if self._map.closed:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(HEADER_SIZE + self.count * RECORD.itemsize)
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def read_journal(path):
+    """Returns (records, symbols): the journal's RECORD array (memory-mapped, read-only) and symbol table.
+
+    Only records counted in the header are returned, so a journal still being
+    written, or left behind by a crash, reads as its complete prefix.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    magic, version, record_size, count = _HEADER.unpack_from(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} tick journal")
+    symbols = json.loads(header[SYMBOLS_OFFSET:].rstrip(b"\0"))
+    if not count:
+        return np.empty(0, dtype=RECORD), symbols
+    records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return records, symbols
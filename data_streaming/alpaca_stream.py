@@ -1,197 +1,1106 @@
 import os
+import sys
+import math
+import time
 import pandas as pd
 import numpy as np
 import asyncio
-from collections import deque
+import threading
 from alpaca_trade_api.stream import Stream
 from alpaca_trade_api.rest import REST
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Allow running this file directly as well as importing it from main.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import IndicatorEngine, OnlineNormalizer, NORMALIZER_FILE, feature_union, QUOTE_INPUTS
+from data_streaming.bar_buffer import BarRingBuffer, RAW_BAR_FIELDS, BAR_FIELDS
+from data_streaming.top_of_book import TopOfBook
+from data_streaming.messages import to_timestamp_ns, unpack_trade, trade_symbol
+from data_streaming.bar_writer import BarWriter
+from data.bar_store import BarStore, RAW, PROCESSED, FEATURES
+from data.tick_journal import TickJournal, read_journal, JOURNAL_ROOT, QUOTE as JOURNAL_QUOTE
+from data_streaming.sharding import ShardPool
+from data_streaming.ingest_queue import IngestQueue, IngestWorker, TRADE, QUOTE, FLUSH, SNAPSHOT
+from data_streaming.replay import replay_journal, catch_up
+from data_streaming.snapshot import capture, write_snapshot, load_snapshot, SNAPSHOT_PATH
+from execution.rest_client import LazyClient, load_env, credentials
+from monitoring import metrics
+
+# The configuration below may come from .env
+load_env()
 
 # Configuration
-ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
-ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 BASE_URL = "https://paper-api.alpaca.markets"  # Corrected URL
-SYMBOL = "AAPL"
+SYMBOLS = [s.strip().upper() for s in os.getenv("SYMBOLS", "AAPL").split(",") if s.strip()]  # Universe, one subscription
+SYMBOL = SYMBOLS[0]
+SHARDS = int(os.getenv("SHARDS", "0"))  # Indicator/signal worker processes; 0 keeps everything in-process
 TIME_FRAME = "1Min"  # Adjust based on your strategy
+# Extra bar resolutions built from the same trades, e.g. "1s,5s,15s,100tick,5000vol"
+TIMEFRAMES = [s.strip() for s in os.getenv("TIMEFRAMES", "").split(",") if s.strip()]
+QUOTES = os.getenv("QUOTES", "0") == "1"  # Also stream top-of-book quotes (trade sides, spread, microprice)
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100000"))  # Stream items buffered for the ingest worker
+INGEST_OVERFLOW = os.getenv("INGEST_OVERFLOW", "block")  # Full queue policy: block, coalesce (quotes) or drop
+JOURNAL = os.getenv("JOURNAL", "1") == "1"  # Record every streamed trade and quote for main.py --replay
+SNAPSHOT_INTERVAL_S = float(os.getenv("SNAPSHOT_INTERVAL", "30"))  # Seconds between state snapshots; 0 disables them
+SNAPSHOT_MAX_AGE_S = 900  # Older snapshots are ignored at start-up (warm up from history instead)
 DATA_QUEUE_SIZE = 1000
+PROCESSED_WINDOW = 100  # Rows of processed history exposed to strategies
+MIN_BARS = 50  # Minimum data needed for indicators
+BAR_FLUSH_DELAY_NS = 2 * 10**9  # Wait for delayed prints before closing a quiet bar
+# Live columns z-scored with the statistics saved by data_preprocessor (vwap_14 and
+# order_flow are only computed offline)
+FEATURE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'vwap', 'ema_9', 'ema_21', 'rsi', 'macd',
+                   'macd_signal', 'bollinger_h', 'bollinger_l')
+
+# Hot-path metrics, looked up once
+BARS = metrics.counter("bars_total", "Bars finalized")
+BAR_FINALIZE_LATENCY = metrics.histogram("bar_finalize_seconds", "Time to persist and process one finalized bar")
+INDICATOR_LATENCY = metrics.histogram("indicator_update_seconds", "Time to update every indicator for one bar")
+PROCESS_ERRORS = metrics.counter("errors_total", "Errors caught by stage", labels={"stage": "process"})
 
 # Initialize directories
 os.makedirs("data/processed", exist_ok=True)
 os.makedirs("data/raw", exist_ok=True)
 
-# Initialize Alpaca API
-rest_api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, BASE_URL)
+# Alpaca API, built on first use
+rest_api = LazyClient(lambda: REST(*credentials(), BASE_URL))
+
+def parse_timeframe(timeframe):
+    """Returns (kind, size) for a timeframe: ("time", interval_ns), ("tick", trades) or ("volume", shares).
+
+    "1s", "5s" or "1Min" are time bars, "100tick" closes a bar every 100
+    trades and "5000vol" once it holds 5000 shares.
+    """
+    for suffix, kind in (("tick", "tick"), ("vol", "volume")):
+        if timeframe.endswith(suffix) and timeframe[:-len(suffix)].isdigit():
+            return kind, int(timeframe[:-len(suffix)])
+    return "time", pd.Timedelta(timeframe).value
+
+class Bar:
+    """One OHLCV bar being built from trades; timestamp is the bar start in UTC ns.
+
+    ``buy_volume`` and ``sell_volume`` hold the volume of prints classified
+    against the prevailing quote (only when quotes are streamed).
+    """
+
+    __slots__ = (
+        'timestamp', 'open', 'high', 'low', 'close', 'volume', 'notional', 'trade_count',
+        'first_trade_time', 'last_trade_time', 'buy_volume', 'sell_volume',
+    )
+
+    def __init__(self, timestamp, trade_time, price, size):
+        self.timestamp = timestamp
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.volume = size
+        self.notional = price * size
+        self.trade_count = 1
+        self.first_trade_time = trade_time
+        self.last_trade_time = trade_time
+        self.buy_volume = 0
+        self.sell_volume = 0
+
+    @property
+    def vwap(self):
+        return self.notional / self.volume if self.volume else self.close
+
+    def state(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_state(cls, state):
+        bar = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, state):
+            setattr(bar, name, value)
+        return bar
+
+    def as_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'vwap': self.vwap,
+            'trade_count': self.trade_count,
+        }
 
 class TradeBarAggregator:
-    def __init__(self, symbol, timeframe):
+    """Builds time bars from trades by each trade's own (event) timestamp.
+
+    Late and out-of-order prints:
+      * a print that belongs to the open bar is merged into it even if it is
+        older than earlier prints; open and close always come from the
+        oldest and newest prints by event time;
+      * a print for any earlier bar belongs to a bar that was already
+        published downstream; it is dropped and counted in ``late_trades``.
+    A bar is finalized when the first print of a later bar arrives, or by
+    ``flush`` once the wall clock has passed the bar's end. With ``quote``
+    (the symbol's QuoteState) every print is classified as a buy or sell
+    against the quote prevailing when it is aggregated, and finalized bars
+    carry the trade-side volumes and the top of book at close.
+    """
+
+    def __init__(self, symbol, timeframe, writer=None, processor=None, quote=None):
         self.symbol = symbol
         self.timeframe = timeframe
+        self.writer = writer  # BarWriter for raw bars; None disables persistence
+        self.processor = processor  # Receives finalized bars via add_bar (DataProcessor or a shard sink)
+        self.quote = quote
+        self.interval_ns = pd.Timedelta(timeframe).value
         self.current_bar = None
-        self.trades = []
+        self.last_bucket = -1  # Start of the newest bar opened so far
         self.last_finalized_timestamp = None
+        self.trades_processed = 0
+        self.late_trades = 0
 
     def add_trade(self, trade):
-        try:
-            trade_time = pd.Timestamp(trade.timestamp).tz_convert('UTC')
-            current_time = pd.Timestamp.now(tz='UTC').floor(self.timeframe)
-            
-            if not self.current_bar or current_time > self.current_bar['timestamp']:
-                if self.current_bar:
+        self.add_trades((trade,))
+
+    def add_trades(self, trades):
+        """Adds a batch of trades, e.g. every trade from one websocket message."""
+        interval = self.interval_ns
+        quote = self.quote
+        for trade in trades:
+            try:
+                trade_time, price, size = unpack_trade(trade)
+            except Exception as e:
+                print(f"Error adding trade: {e}")
+                continue
+            bucket = trade_time - trade_time % interval
+            bar = self.current_bar
+
+            if bar is not None and bucket == bar.timestamp:
+                if price > bar.high:
+                    bar.high = price
+                elif price < bar.low:
+                    bar.low = price
+                if trade_time >= bar.last_trade_time:
+                    bar.close = price
+                    bar.last_trade_time = trade_time
+                elif trade_time < bar.first_trade_time:
+                    bar.open = price
+                    bar.first_trade_time = trade_time
+                bar.volume += size
+                bar.notional += price * size
+                bar.trade_count += 1
+            elif bucket > self.last_bucket:
+                if bar is not None:
                     self._finalize_current_bar()
-                self._create_new_bar(current_time)
-                
-            self._update_current_bar(trade)
-        except Exception as e:
-            print(f"Error adding trade: {e}")
-
-    def _create_new_bar(self, timestamp):
-        self.current_bar = {
-            'timestamp': timestamp,
-            'open': None,
-            'high': -np.inf,
-            'low': np.inf,
-            'close': None,
-            'volume': 0,
-            'vwap': 0,
-            'trade_count': 0
+                bar = self.current_bar = Bar(bucket, trade_time, price, size)
+                self.last_bucket = bucket
+            else:
+                self._late_trade(trade_time, price, size)
+                continue
+            if quote is not None:
+                side = quote.side(price)
+                if side > 0:
+                    bar.buy_volume += size
+                elif side < 0:
+                    bar.sell_volume += size
+            self.trades_processed += 1
+
+    def _late_trade(self, trade_time, price, size):
+        self.late_trades += 1
+
+    def state(self):
+        """Restorable state: the open bar and the counters."""
+        return {
+            'timeframe': self.timeframe,
+            'current_bar': _bar_state(self.current_bar),
+            'last_bucket': self.last_bucket,
+            'last_finalized_timestamp': self.last_finalized_timestamp,
+            'trades_processed': self.trades_processed,
+            'late_trades': self.late_trades,
         }
 
-    def _update_current_bar(self, trade):
-        price = trade.price
-        size = trade.size
-        
-        if self.current_bar['open'] is None:
-            self.current_bar['open'] = price
-            
-        self.current_bar['high'] = max(self.current_bar['high'], price)
-        self.current_bar['low'] = min(self.current_bar['low'], price)
-        self.current_bar['close'] = price
-        self.current_bar['volume'] += size
-        
-        # Calculate VWAP
-        if self.current_bar['trade_count'] > 0:
-            self.current_bar['vwap'] = (self.current_bar['vwap'] * self.current_bar['trade_count'] + 
-                                       price * size) / (self.current_bar['trade_count'] + 1)
+    def restore(self, state):
+        if state['timeframe'] != self.timeframe:
+            raise ValueError(f"Snapshot is for {state['timeframe']} bars, not {self.timeframe}")
+        self.current_bar = _restore_bar(state['current_bar'])
+        self.last_bucket = state['last_bucket']
+        self.last_finalized_timestamp = state['last_finalized_timestamp']
+        self.trades_processed = state['trades_processed']
+        self.late_trades = state['late_trades']
+
+    def flush(self, now_ns):
+        """Finalizes the open bar if ``now_ns`` is past its end (quiet markets send no next trade)."""
+        bar = self.current_bar
+        if bar is not None and now_ns >= bar.timestamp + self.interval_ns:
+            self._finalize_current_bar()
+            self.current_bar = None
+
+    def _finalize_current_bar(self):
+        bar = self.current_bar
+        if bar and bar.timestamp != self.last_finalized_timestamp:
+            publish_bar(self.symbol, self.timeframe, bar, self.writer, self.processor, self.quote)
+            self.last_finalized_timestamp = bar.timestamp
+
+def _bar_state(bar):
+    return None if bar is None else bar.state()
+
+def _restore_bar(state):
+    return None if state is None else Bar.from_state(state)
+
+def publish_bar(symbol, timeframe, bar, writer, processor, quote=None):
+    """Persists a finalized bar and passes it to its processor.
+
+    With ``quote`` the processor also gets the QUOTE_INPUTS values: the
+    bar's trade-side volumes and the top of book as the bar closes.
+    """
+    start = time.perf_counter_ns()
+    if writer is not None:
+        writer.write(symbol, bar.as_dict(), kind=RAW, timeframe=timeframe)
+
+    # Pass to processor
+    if processor is not None:
+        if quote is None:
+            processor.add_bar(
+                bar.timestamp, bar.open, bar.high, bar.low, bar.close,
+                bar.volume, bar.vwap, bar.trade_count
+            )
         else:
-            self.current_bar['vwap'] = price * size
-            
-        self.current_bar['trade_count'] += 1
+            processor.add_bar(
+                bar.timestamp, bar.open, bar.high, bar.low, bar.close,
+                bar.volume, bar.vwap, bar.trade_count,
+                (bar.buy_volume, bar.sell_volume, quote.spread, quote.microprice, quote.imbalance)
+            )
+
+    BARS.inc()
+    BAR_FINALIZE_LATENCY.observe_since(start)
+
+class BarRollup:
+    """Builds a coarser time bar from finalized finer bars (e.g. 1Min from 1s).
+
+    Coarse bars therefore cost nothing per trade. Open and close follow the
+    event times of the finer bars (and of late prints passed to
+    ``add_print``), the same rules TradeBarAggregator applies to trades.
+    ``advance`` closes the bar as soon as a finer bar opens in a later
+    interval, and ``flush`` on wall-clock time.
+    """
+
+    def __init__(self, symbol, timeframe, writer=None, processor=None, quote=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.writer = writer
+        self.processor = processor
+        self.quote = quote
+        self.interval_ns = pd.Timedelta(timeframe).value
+        self.current_bar = None
+
+    def add_bar(self, fine):
+        """Merges a finalized finer Bar."""
+        bucket = fine.timestamp - fine.timestamp % self.interval_ns
+        bar = self.current_bar
+        if bar is not None and bucket != bar.timestamp:
+            self._finalize()
+            bar = None
+        if bar is None:
+            bar = self.current_bar = Bar(bucket, fine.first_trade_time, fine.open, fine.volume)
+            bar.high, bar.low, bar.close = fine.high, fine.low, fine.close
+            bar.last_trade_time = fine.last_trade_time
+            bar.notional = fine.notional
+            bar.trade_count = fine.trade_count
+            bar.buy_volume, bar.sell_volume = fine.buy_volume, fine.sell_volume
+            return
+        if fine.high > bar.high:
+            bar.high = fine.high
+        if fine.low < bar.low:
+            bar.low = fine.low
+        if fine.last_trade_time >= bar.last_trade_time:
+            bar.close = fine.close
+            bar.last_trade_time = fine.last_trade_time
+        if fine.first_trade_time < bar.first_trade_time:
+            bar.open = fine.open
+            bar.first_trade_time = fine.first_trade_time
+        bar.volume += fine.volume
+        bar.notional += fine.notional
+        bar.trade_count += fine.trade_count
+        bar.buy_volume += fine.buy_volume
+        bar.sell_volume += fine.sell_volume
+
+    def add_print(self, trade_time, price, size, open_bucket_ns, side=0):
+        """Merges a print that was late for the finer bars, if its interval is still open.
+
+        ``open_bucket_ns`` is the start of the open finer bar; the print may
+        start the coarse bar of that interval if no finer bar has closed in it yet.
+        ``side`` is the print's QuoteState.side classification.
+        """
+        self.advance(open_bucket_ns)
+        bucket = trade_time - trade_time % self.interval_ns
+        bar = self.current_bar
+        if bar is None:
+            if bucket != open_bucket_ns - open_bucket_ns % self.interval_ns:
+                return
+            bar = self.current_bar = Bar(bucket, trade_time, price, size)
+        elif bucket != bar.timestamp:
+            return
+        else:
+            if price > bar.high:
+                bar.high = price
+            elif price < bar.low:
+                bar.low = price
+            if trade_time >= bar.last_trade_time:
+                bar.close = price
+                bar.last_trade_time = trade_time
+            elif trade_time < bar.first_trade_time:
+                bar.open = price
+                bar.first_trade_time = trade_time
+            bar.volume += size
+            bar.notional += price * size
+            bar.trade_count += 1
+        if side > 0:
+            bar.buy_volume += size
+        elif side < 0:
+            bar.sell_volume += size
+
+    def advance(self, open_bucket_ns):
+        """Closes the bar if a finer bar starting at ``open_bucket_ns`` lies beyond it."""
+        bar = self.current_bar
+        if bar is not None and open_bucket_ns >= bar.timestamp + self.interval_ns:
+            self._finalize()
+
+    def flush(self, now_ns):
+        self.advance(now_ns)
+
+    def state(self):
+        return {'timeframe': self.timeframe, 'current_bar': _bar_state(self.current_bar)}
+
+    def restore(self, state):
+        self.current_bar = _restore_bar(state['current_bar'])
+
+    def _finalize(self):
+        publish_bar(self.symbol, self.timeframe, self.current_bar, self.writer, self.processor, self.quote)
+        self.current_bar = None
+
+class ActivityBarBuilder:
+    """Tick or volume bars: a bar closes after ``size`` trades or once it holds ``size`` shares.
+
+    Prints are merged by event time like time bars; the bar timestamp is its
+    first print's event time, kept strictly increasing so every bar has a
+    unique key. A trade that crosses the volume threshold stays whole in the
+    bar it closes.
+    """
+
+    def __init__(self, symbol, timeframe, writer=None, processor=None, quote=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.writer = writer
+        self.processor = processor
+        self.quote = quote
+        self.kind, self.size = parse_timeframe(timeframe)
+        self.current_bar = None
+        self.last_timestamp = -1
+
+    def add_prints(self, prints):
+        """Adds (timestamp_ns, price, size) prints in arrival order."""
+        by_volume = self.kind == "volume"
+        limit = self.size
+        quote = self.quote
+        for trade_time, price, size in prints:
+            bar = self.current_bar
+            if bar is None:
+                timestamp = max(trade_time, self.last_timestamp + 1)
+                bar = self.current_bar = Bar(timestamp, trade_time, price, size)
+            else:
+                if price > bar.high:
+                    bar.high = price
+                elif price < bar.low:
+                    bar.low = price
+                if trade_time >= bar.last_trade_time:
+                    bar.close = price
+                    bar.last_trade_time = trade_time
+                elif trade_time < bar.first_trade_time:
+                    bar.open = price
+                    bar.first_trade_time = trade_time
+                bar.volume += size
+                bar.notional += price * size
+                bar.trade_count += 1
+            if quote is not None:
+                side = quote.side(price)
+                if side > 0:
+                    bar.buy_volume += size
+                elif side < 0:
+                    bar.sell_volume += size
+            if (bar.volume if by_volume else bar.trade_count) >= limit:
+                publish_bar(self.symbol, self.timeframe, bar, self.writer, self.processor, quote)
+                self.last_timestamp = bar.timestamp
+                self.current_bar = None
+
+    def state(self):
+        return {'timeframe': self.timeframe, 'current_bar': _bar_state(self.current_bar),
+                'last_timestamp': self.last_timestamp}
+
+    def restore(self, state):
+        self.current_bar = _restore_bar(state['current_bar'])
+        self.last_timestamp = state['last_timestamp']
+
+class MultiTimeframeAggregator(TradeBarAggregator):
+    """Builds bars for several timeframes from a single pass over each trade.
+
+    Only the finest time bar is updated per trade (by the TradeBarAggregator
+    loop); coarser time bars are rolled up from its finalized bars, so extra
+    time resolutions cost per fine bar, not per trade. A print too late for
+    the finest bar is still merged into every coarser bar that is open, so
+    each timeframe matches a TradeBarAggregator of its own; ``late_trades``
+    counts prints late for the finest timeframe. Tick and volume bars share
+    the same unpacked prints. Each timeframe is finalized to its own
+    processor in ``processors`` (timeframe -> DataProcessor or shard sink)
+    and stored under its own timeframe. Coarser time frames must be whole
+    multiples of the finest.
+    """
+
+    def __init__(self, symbol, timeframes, writer=None, processors=None, quote=None):
+        processors = processors or {}
+        time_frames = sorted((tf for tf in timeframes if parse_timeframe(tf)[0] == "time"),
+                             key=lambda tf: parse_timeframe(tf)[1])
+        if not time_frames:
+            raise ValueError("At least one time-based timeframe is required")
+        super().__init__(symbol, time_frames[0], writer=writer, processor=processors.get(time_frames[0]), quote=quote)
+        self.timeframes = tuple(timeframes)
+        self.rollups = []
+        for timeframe in time_frames[1:]:
+            if parse_timeframe(timeframe)[1] % self.interval_ns:
+                raise ValueError(f"Timeframe {timeframe} is not a multiple of {time_frames[0]}")
+            self.rollups.append(BarRollup(symbol, timeframe, writer, processors.get(timeframe), quote))
+        self.activity_bars = [ActivityBarBuilder(symbol, tf, writer, processors.get(tf), quote)
+                              for tf in timeframes if parse_timeframe(tf)[0] != "time"]
+
+    def add_trades(self, trades):
+        """Adds a batch of trades to every timeframe, unpacking each trade once."""
+        if self.activity_bars:
+            prints = []
+            for trade in trades:
+                try:
+                    prints.append(unpack_trade(trade))
+                except Exception as e:
+                    print(f"Error adding trade: {e}")
+            trades = prints
+            for builder in self.activity_bars:
+                builder.add_prints(prints)
+        super().add_trades(trades)
+        for rollup in self.rollups:
+            rollup.advance(self.last_bucket)
+
+    def flush(self, now_ns):
+        super().flush(now_ns)
+        for rollup in self.rollups:
+            rollup.flush(now_ns)
+
+    def state(self):
+        state = super().state()
+        state['rollups'] = [rollup.state() for rollup in self.rollups]
+        state['activity_bars'] = [builder.state() for builder in self.activity_bars]
+        return state
+
+    def restore(self, state):
+        builders = self.rollups + self.activity_bars
+        saved = state.get('rollups', []) + state.get('activity_bars', [])
+        if [b.timeframe for b in builders] != [s['timeframe'] for s in saved]:
+            raise ValueError(f"Snapshot timeframes {[s['timeframe'] for s in saved]} do not match "
+                             f"{[b.timeframe for b in builders]}")
+        super().restore(state)
+        for builder, builder_state in zip(builders, saved):
+            builder.restore(builder_state)
 
     def _finalize_current_bar(self):
-        if self.current_bar and self.current_bar['timestamp'] != self.last_finalized_timestamp:
-            df = pd.DataFrame([self.current_bar])
-            file_path = f"data/raw/{self.symbol}_raw.csv"
-            header = not os.path.exists(file_path)
-            df.to_csv(file_path, mode='a', header=header, index=False)
-            
-            # Pass to processor
-            if 'processor' in globals():
-                processor.add_raw_data(df)
-                
-            self.last_finalized_timestamp = self.current_bar['timestamp']
+        bar = self.current_bar
+        if bar and bar.timestamp != self.last_finalized_timestamp:
+            super()._finalize_current_bar()
+            for rollup in self.rollups:
+                rollup.add_bar(bar)
+
+    def _late_trade(self, trade_time, price, size):
+        self.late_trades += 1
+        side = self.quote.side(price) if self.quote is not None else 0
+        for rollup in self.rollups:
+            rollup.add_print(trade_time, price, size, self.last_bucket, side)
+
+class BarEvent:
+    """A processed bar ready for the trading loop.
+
+    ``sequence`` is the processor's bar count right after this bar, used to
+    find the bar's window even if newer bars arrived since. ``finalized_ns``
+    is the wall-clock time the bar was closed, for latency measurement.
+    ``signal`` is set when a shard worker already evaluated the strategy.
+    """
+
+    __slots__ = ('symbol', 'timestamp', 'sequence', 'finalized_ns', 'signal')
+
+    def __init__(self, symbol, timestamp, sequence=None, finalized_ns=None, signal=None):
+        self.symbol = symbol
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.finalized_ns = time.time_ns() if finalized_ns is None else finalized_ns
+        self.signal = signal
 
 class DataProcessor:
-    def __init__(self):
-        self.raw_data = deque(maxlen=DATA_QUEUE_SIZE)
-        self.processed_data = deque(maxlen=DATA_QUEUE_SIZE)
-        self.indicators = {}
+    """Per-symbol indicator state and the ring buffer of processed bars.
+
+    ``features`` (e.g. a strategy's ``features``) limits the indicator
+    columns computed per bar; None computes every INDICATOR_COLUMNS entry.
+    Persisted processed bars always carry the INDICATOR_COLUMNS schema, with
+    NaN for columns that are not computed. ``timeframe`` is the resolution of
+    the bars it receives (where they are persisted). With ``quotes`` the
+    buffer also keeps the QUOTE_INPUTS columns passed to ``add_bar`` (NaN for
+    bars without them); they stay in memory and are not persisted. Bars are
+    added on the ingest worker thread; ``lock`` keeps a reader's window
+    consistent with ``bar_count``.
+    """
+
+    def __init__(self, symbol=SYMBOL, writer=None, on_bar=None, normalize=False, features=None, timeframe=TIME_FRAME,
+                 quotes=False):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.writer = writer  # BarWriter for processed bars; None disables persistence
+        self.on_bar = on_bar  # Called as on_bar(symbol, timestamp, bar_count) for every processed bar once ready
+        if normalize:
+            features = feature_union(features, FEATURE_COLUMNS)
+        self.indicators = IndicatorEngine(features)
+        self.quotes = quotes
+        self._no_quote = (math.nan,) * len(QUOTE_INPUTS)
+        self.bars = BarRingBuffer(DATA_QUEUE_SIZE, fields=RAW_BAR_FIELDS + tuple(
+            (name, np.float64) for name in self.indicators.columns + (QUOTE_INPUTS if quotes else ())))
+        self.normalize = normalize  # Keep z-scored FEATURE_COLUMNS in self.features
+        self.normalizer = None
+        self.features = None
+        self._feature_index = None
+        # Buffer position of each persisted column (None: not computed, stored as NaN)
+        self._processed_index = [self.bars.fields.index(name) if name in self.bars.fields else None
+                                 for name, _ in BAR_FIELDS]
+        if normalize:
+            self.use_normalizer(OnlineNormalizer(FEATURE_COLUMNS))
+        self.bar_count = 0  # Bars processed so far, including warm-up
+        self.lock = threading.Lock()
         self.last_processed_timestamp = None
         self.historical_data_loaded = False
 
+    @property
+    def is_ready(self):
+        return len(self.bars) >= MIN_BARS
+
+    @property
+    def processed_data(self):
+        """Zero-copy window over the latest processed bars (empty until warmed up)."""
+        return self.recent(PROCESSED_WINDOW)
+
+    def recent(self, n):
+        """Returns a zero-copy BarWindow of the newest ``n`` processed bars."""
+        with self.lock:
+            if not self.is_ready:
+                return self.bars.last(0)
+            return self.bars.last(n)
+
+    def window_at(self, bar_count, n=PROCESSED_WINDOW):
+        """Returns the newest ``n`` bars as they were when ``bar_count`` bars had been processed.
+
+        Returns None if that bar has already been pushed out of the buffer.
+        """
+        with self.lock:
+            offset = self.bar_count - bar_count
+            if offset < 0 or offset >= len(self.bars):
+                return None
+            return self.bars.last(n, offset=offset)
+
+    def feature_window(self, n=PROCESSED_WINDOW):
+        """Zero-copy window of the newest ``n`` normalized feature rows (None without a normalizer)."""
+        if self.features is None:
+            return None
+        with self.lock:
+            return self.features.last(n)
+
+    def use_normalizer(self, normalizer):
+        """Normalizes FEATURE_COLUMNS of every new bar with ``normalizer`` (continuing its statistics)."""
+        missing = [name for name in FEATURE_COLUMNS if name not in self.bars.fields]
+        if missing:
+            raise ValueError(f"Features {missing} are not computed; create the processor with normalize=True")
+        self._feature_index = [self.bars.fields.index(name) for name in FEATURE_COLUMNS]
+        self.normalizer = normalizer
+        self.features = BarRingBuffer(
+            DATA_QUEUE_SIZE, fields=(("timestamp", np.int64),) + tuple((name, np.float64) for name in FEATURE_COLUMNS))
+
+    def state(self):
+        """Restorable state: the buffered bars and features, indicator and normalizer accumulators, counters."""
+        with self.lock:
+            return {
+                'bars': self.bars.state(),
+                'indicators': self.indicators.state(),
+                'normalizer': None if self.normalizer is None else self.normalizer.to_dict(),
+                'features': None if self.features is None else self.features.state(),
+                'bar_count': self.bar_count,
+                'last_processed_timestamp': self.last_processed_timestamp,
+            }
+
+    def state_mismatch(self, state):
+        """Returns why ``state`` cannot be restored into this processor, or None if it can."""
+        if tuple(state['bars']['fields']) != self.bars.fields:
+            return f"{self.symbol} {self.timeframe} bar columns differ"
+        if tuple(state['indicators']['columns']) != self.indicators.columns:
+            return f"{self.symbol} {self.timeframe} indicators differ"
+        if self.normalize and state['normalizer'] is None:
+            return f"{self.symbol} {self.timeframe} has no normalizer state"
+        return None
+
+    def restore(self, state):
+        """Continues from ``state`` (see state()) instead of warming up from history."""
+        reason = self.state_mismatch(state)
+        if reason is not None:
+            raise ValueError(reason)
+        with self.lock:
+            self.indicators.restore(state['indicators'])
+            self.bars.restore(state['bars'])
+            if self.normalize:
+                self.use_normalizer(OnlineNormalizer.from_dict(state['normalizer']))
+                self.features.restore(state['features'])
+            self.bar_count = state['bar_count']
+            self.last_processed_timestamp = state['last_processed_timestamp']
+            self.historical_data_loaded = True
+
+    def load_normalizer(self, store, timeframe=TIME_FRAME):
+        """Continues from the normalizer state saved by the offline preprocessing, if there is one."""
+        try:
+            state = OnlineNormalizer.load(store.sidecar_path(self.symbol, NORMALIZER_FILE, kind=FEATURES,
+                                                             timeframe=timeframe))
+            if state is not None:
+                self.use_normalizer(state.select(FEATURE_COLUMNS))
+                print(f"Loaded normalizer statistics for {self.symbol} ({state.count} bars)")
+        except Exception as e:
+            print(f"Error loading normalizer statistics: {e}")
+
     def add_raw_data(self, data):
+        """Adds one finalized bar given as a mapping of RAW_BAR_FIELDS."""
         try:
-            if not self.raw_data or data['timestamp'].iloc[0] != self.last_processed_timestamp:
-                self.raw_data.append(data)
-                self.last_processed_timestamp = data['timestamp'].iloc[0]
-                self._process_data()
+            self.add_bar(
+                to_timestamp_ns(data['timestamp']),
+                data['open'],
+                data['high'],
+                data['low'],
+                data['close'],
+                data['volume'],
+                data['vwap'],
+                data['trade_count'],
+            )
         except Exception as e:
             print(f"Error adding raw data: {e}")
 
-    def _process_data(self):
+    def add_bar(self, timestamp, open_, high, low, close, volume, vwap, trade_count, quote=None):
+        """Adds one finalized bar; ``timestamp`` is the bar start in UTC nanoseconds.
+
+        ``quote`` holds the bar's QUOTE_INPUTS values, if quotes are streamed.
+        """
+        if self.bars and timestamp == self.last_processed_timestamp:
+            return
+        self.last_processed_timestamp = timestamp
+        self._process_data(timestamp, open_, high, low, close, volume, vwap, trade_count, quote)
+
+    def _process_data(self, timestamp, open_, high, low, close, volume, vwap, trade_count, quote=None):
         try:
-            if len(self.raw_data) < 50:  # Minimum data needed for indicators
+            # Indicators are updated incrementally from the new bar only
+            start = time.perf_counter_ns()
+            indicator_values = self.indicators.update({
+                'open': open_, 'high': high, 'low': low, 'close': close,
+                'volume': volume, 'vwap': vwap, 'trade_count': trade_count,
+            })
+            INDICATOR_LATENCY.observe_since(start)
+            values = (timestamp, open_, high, low, close, volume, vwap, trade_count) + indicator_values
+            if self.quotes:
+                values += self._no_quote if quote is None else quote
+            if self.normalizer is not None:
+                scores = self.normalizer.update([values[i] for i in self._feature_index], timestamp)
+            with self.lock:
+                self.bars.append(*values)
+                self.bar_count += 1
+                if self.normalizer is not None:
+                    self.features.append(timestamp, *scores)
+
+            if not self.is_ready:  # Minimum data needed for indicators
                 return
 
-            df = pd.concat(self.raw_data).reset_index(drop=True)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Calculate indicators
-            df['ema_9'] = df['close'].ewm(span=9, adjust=False).mean()
-            df['ema_21'] = df['close'].ewm(span=21, adjust=False).mean()
-            
-            # RSI calculation
-            delta = df['close'].diff(1)
-            gain = (delta.where(delta > 0, 0)).ewm(com=13, adjust=False).mean()
-            loss = (-delta.where(delta < 0, 0)).ewm(com=13, adjust=False).mean()
-            rs = gain / loss
-            df['rsi'] = 100 - (100 / (1 + rs))
-            
-            # MACD calculation
-            macd = df['close'].ewm(span=12, adjust=False).mean() - df['close'].ewm(span=26, adjust=False).mean()
-            df['macd'] = macd
-            df['macd_signal'] = macd.ewm(span=9, adjust=False).mean()
-            
-            # Bollinger Bands
-            bollinger = df['close'].rolling(window=20).mean()
-            df['bollinger_h'] = bollinger + 2 * df['close'].rolling(window=20).std()
-            df['bollinger_l'] = bollinger - 2 * df['close'].rolling(window=20).std()
-            
-            # Store latest processed data
-            self.processed_data = df.tail(100).copy()
-            self._save_processed_data()
+            self._save_processed_data(values)
+            if self.on_bar is not None:
+                self.on_bar(self.symbol, timestamp, self.bar_count)
         except Exception as e:
+            PROCESS_ERRORS.inc()
             print(f"Error processing data: {e}")
 
-    def _save_processed_data(self):
-        if not self.processed_data.empty:
-            file_path = f"data/processed/{SYMBOL}_processed.csv"
-            header = not os.path.exists(file_path)
-            latest_data = self.processed_data.iloc[-1].to_frame().T
-            latest_data.to_csv(file_path, mode='a', header=header, index=False)
+    def _save_processed_data(self, values):
+        if self.writer is not None:
+            row = {name: math.nan if index is None else values[index]
+                   for (name, _), index in zip(BAR_FIELDS, self._processed_index)}
+            self.writer.write(self.symbol, row, kind=PROCESSED, timeframe=self.timeframe)
 
     def load_historical_data(self, file_path):
         try:
             if os.path.exists(file_path) and not self.historical_data_loaded:
-                columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'trade_count']
+                columns = [name for name, _ in RAW_BAR_FIELDS]
                 historical_data = pd.read_csv(file_path, names=columns, header=None)
+
+                # Drop header lines and anything else that is not a complete bar
+                for column in columns[1:]:
+                    historical_data[column] = pd.to_numeric(historical_data[column], errors='coerce')
+                historical_data = historical_data.dropna(subset=['close'])
                 historical_data = historical_data.drop_duplicates(subset='timestamp')
-                
-                for _, row in historical_data.iterrows():
-                    bar_data = pd.DataFrame([{
-                        'timestamp': row['timestamp'],
-                        'open': row['open'],
-                        'high': row['high'],
-                        'low': row['low'],
-                        'close': row['close'],
-                        'volume': row['volume'],
-                        'vwap': row['vwap'],
-                        'trade_count': row['trade_count']
-                    }])
-                    self.add_raw_data(bar_data)
-                
+                historical_data['timestamp'] = pd.to_datetime(historical_data['timestamp'], utc=True).dt.as_unit('ns').astype('int64')
+
+                self.warm_up(historical_data)
                 self.historical_data_loaded = True
                 print(f"Loaded {len(historical_data)} historical data points")
         except Exception as e:
             print(f"Error loading historical data: {e}")
 
+    def load_from_store(self, store, timeframe=TIME_FRAME, end=None):
+        """Warms up from the newest raw bars (before ``end`` if given) in a BarStore; returns False if it holds none."""
+        try:
+            if self.historical_data_loaded:
+                return True
+            columns = [name for name, _ in RAW_BAR_FIELDS]
+            bars = store.tail(self.symbol, DATA_QUEUE_SIZE, columns, kind=RAW, timeframe=timeframe, end=end)
+            if bars is None or not len(bars['timestamp']):
+                return False
+            self.warm_up(bars)
+            self.historical_data_loaded = True
+            print(f"Loaded {len(bars['timestamp'])} historical data points from the bar store")
+            return True
+        except Exception as e:
+            print(f"Error loading historical data from the bar store: {e}")
+            return False
+
+    def load_history(self, store, timeframe=TIME_FRAME, end=None):
+        """Warms up from the bar store, falling back to the legacy raw CSV.
+
+        With ``end`` (UTC ns) only bars before it are used, e.g. when replaying
+        a session; the CSV fallback is skipped then.
+        """
+        if self.normalize:
+            self.load_normalizer(store, timeframe)
+        if not self.load_from_store(store, timeframe, end) and timeframe == TIME_FRAME and end is None:
+            self.load_historical_data(f"data/raw/{self.symbol}_raw.csv")
+
+    def warm_up(self, bars):
+        """Seeds indicator state and the bar buffer from many bars in one vectorized pass.
+
+        ``bars`` maps RAW_BAR_FIELDS names to equal-length arrays (a DataFrame
+        works) with ``timestamp`` in UTC nanoseconds. Nothing is written to disk.
+        """
+        if not len(bars['close']):
+            return
+        columns = {name: np.asarray(bars[name], dtype=dtype) for name, dtype in RAW_BAR_FIELDS}
+        columns.update(self.indicators.batch(columns))
+        if self.quotes:
+            # Stored history has no quotes
+            columns.update({name: np.full(len(columns['close']), np.nan) for name in QUOTE_INPUTS})
+        self.bars.extend(columns)
+        if self.normalizer is not None:
+            scores = self.normalizer.batch(columns, columns['timestamp'])
+            features = {name: scores[:, i] for i, name in enumerate(FEATURE_COLUMNS)}
+            features['timestamp'] = columns['timestamp']
+            self.features.extend(features)
+        self.bar_count += len(columns['close'])
+        self.last_processed_timestamp = int(columns['timestamp'][-1])
+
+class SymbolContext:
+    """Per-symbol pipeline: aggregator, processor and strategy (the latter two stay None when sharded).
+
+    ``processors`` maps every in-process timeframe to its DataProcessor.
+    """
+
+    __slots__ = ('symbol', 'aggregator', 'processor', 'strategy', 'processors')
+
+    def __init__(self, symbol, aggregator, processor=None, strategy=None, processors=None):
+        self.symbol = symbol
+        self.aggregator = aggregator
+        self.processor = processor
+        self.strategy = strategy
+        self.processors = processors or {}
+
+class SymbolRegistry:
+    """Routes trades from one multi-symbol subscription to per-symbol pipelines.
+
+    Trade aggregation always runs on the event loop; it is cheap and must
+    see trades in arrival order. Indicator and signal work either runs
+    in-process (``shards=None``) or in a ShardPool, where each worker
+    process owns the processors and strategies of a fixed subset of
+    symbols, so CPU-heavy work is spread across cores instead of being
+    serialized behind the event loop.
+
+    With ``publish_events`` every processed bar (in-process) or actionable
+    shard signal is put on ``events``, an asyncio.Queue of BarEvents. With
+    ``prices`` (a LastPriceCache) the newest trade of each symbol in every
+    batch is recorded there. ``normalize`` is passed to the DataProcessors.
+    With ``quotes`` the registry keeps a TopOfBook (``book``) fed by
+    ``add_quote``; aggregators classify prints against it and processors
+    get the QUOTE_INPUTS columns. When an IngestWorker feeds the registry
+    from its own thread, ``loop`` is the event loop that owns ``events``.
+    """
+
+    def __init__(self, symbols, timeframe=TIME_FRAME, writer=None, strategy_factory=None, shards=None,
+                 publish_events=False, prices=None, normalize=False, timeframes=(), quotes=False):
+        self.timeframe = timeframe
+        self.timeframes = tuple(tf for tf in timeframes if tf != timeframe)  # Extra resolutions
+        self.shards = shards
+        self.prices = prices
+        self.book = TopOfBook(symbols) if quotes else None
+        self.loop = None
+        self.events = asyncio.Queue() if publish_events else None
+        self.contexts = {}
+        for symbol in symbols:
+            # Extra timeframes get in-process buffers without a strategy, also when sharded
+            quote = self.book[symbol] if quotes else None
+            processors = {tf: DataProcessor(symbol, writer=writer, timeframe=tf, quotes=quotes) for tf in self.timeframes}
+            processor = strategy = None
+            if shards is not None:
+                primary = shards.sink(symbol)
+            else:
+                strategy = strategy_factory(symbol) if strategy_factory is not None else None
+                # Compute only the indicators the strategy reads
+                processor = primary = DataProcessor(
+                    symbol, writer=writer, on_bar=self._publish_bar if publish_events else None,
+                    normalize=normalize, features=strategy.features if strategy else None, timeframe=timeframe,
+                    quotes=quotes)
+            if self.timeframes:
+                aggregator = MultiTimeframeAggregator(symbol, (timeframe,) + self.timeframes, writer=writer,
+                                                      processors={timeframe: primary, **processors}, quote=quote)
+            else:
+                aggregator = TradeBarAggregator(symbol, timeframe, writer=writer, processor=primary, quote=quote)
+            if processor is not None:
+                processors[timeframe] = processor
+            self.contexts[symbol] = SymbolContext(symbol, aggregator, processor, strategy, processors)
+
+    def __iter__(self):
+        return iter(self.contexts.values())
+
+    def __len__(self):
+        return len(self.contexts)
+
+    def __getitem__(self, symbol):
+        return self.contexts[symbol]
+
+    @property
+    def symbols(self):
+        return list(self.contexts)
+
+    def _publish_bar(self, symbol, timestamp, bar_count):
+        event = BarEvent(symbol, timestamp, sequence=bar_count)
+        if self.loop is None:
+            self.events.put_nowait(event)
+        else:
+            # Runs on the ingest worker thread; asyncio queues are not thread-safe
+            self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    def publish_signal(self, symbol, timestamp, signal, finalized_ns):
+        """Publishes a shard worker's signal; must run on the event loop thread."""
+        self.events.put_nowait(BarEvent(symbol, timestamp, finalized_ns=finalized_ns, signal=signal))
+
+    def state(self):
+        """Restorable per-symbol state of every aggregator and in-process processor.
+
+        Must be taken where trades are applied (the ingest worker thread, or
+        with no worker running) so that bars and indicators agree.
+        """
+        if self.shards is not None:
+            raise ValueError("State snapshots need in-process processors (no shards)")
+        return {
+            context.symbol: {
+                'aggregator': context.aggregator.state(),
+                'processors': {timeframe: processor.state() for timeframe, processor in context.processors.items()},
+            }
+            for context in self
+        }
+
+    def restore(self, states):
+        """Restores state(); raises ValueError, before changing anything, if it does not fit this registry."""
+        if self.shards is not None:
+            raise ValueError("State snapshots need in-process processors (no shards)")
+        if set(states) != set(self.contexts):
+            raise ValueError(f"Snapshot symbols {sorted(states)} do not match {sorted(self.contexts)}")
+        for context in self:
+            state = states[context.symbol]
+            if _timeframes(state['aggregator']) != _timeframes(context.aggregator.state()):
+                raise ValueError(f"{context.symbol} bar timeframes differ")
+            if set(state['processors']) != set(context.processors):
+                raise ValueError(f"{context.symbol} processor timeframes differ")
+            for timeframe, processor in context.processors.items():
+                reason = processor.state_mismatch(state['processors'][timeframe])
+                if reason is not None:
+                    raise ValueError(reason)
+        for context in self:
+            state = states[context.symbol]
+            context.aggregator.restore(state['aggregator'])
+            for timeframe, processor in context.processors.items():
+                processor.restore(state['processors'][timeframe])
+
+    def load_history(self, store, end=None):
+        """Warms up every in-process processor (shard workers warm up their own) from bars before ``end``."""
+        for context in self:
+            for timeframe, processor in context.processors.items():
+                processor.load_history(store, timeframe, end)
+
+    def add_trades(self, trades):
+        """Groups a batch of trades by symbol and hands each group to its aggregator."""
+        groups = {}
+        for trade in trades:
+            try:
+                symbol = trade_symbol(trade)
+            except Exception as e:
+                print(f"Error reading trade symbol: {e}")
+                continue
+            group = groups.get(symbol)
+            if group is None:
+                groups[symbol] = [trade]
+            else:
+                group.append(trade)
+        contexts = self.contexts
+        prices = self.prices
+        for symbol, group in groups.items():
+            context = contexts.get(symbol)
+            if context is not None:
+                context.aggregator.add_trades(group)
+                # The open bar's close is the symbol's newest print by event time
+                bar = context.aggregator.current_bar
+                if prices is not None and bar is not None:
+                    prices.update(symbol, bar.close, bar.last_trade_time)
+        if self.shards is not None:
+            self.shards.flush()
+
+    def add_quote(self, quote):
+        """Updates the top of book from one quote."""
+        self.book.add_quote(quote)
+
+    def flush(self, now_ns):
+        """Closes every bar whose interval ended before ``now_ns``."""
+        for context in self.contexts.values():
+            context.aggregator.flush(now_ns)
+        if self.shards is not None:
+            self.shards.flush()
+
+def _timeframes(aggregator_state):
+    return [aggregator_state['timeframe']] + [state['timeframe'] for state in
+                                              aggregator_state.get('rollups', []) + aggregator_state.get('activity_bars', [])]
+
+# Set by start_stream; main.py reads processors, strategies and shards from it
+registry = None
+
+# Set by start_stream; the websocket handlers only enqueue, an IngestWorker thread does the rest
+ingest = None
+
 async def handle_trade_update(trade):
-    global aggregator, processor
+    if not ingest.offer(TRADE, trade):
+        await ingest.put(TRADE, trade)  # Full (block or coalesce policy): stop reading until there is room
+
+async def handle_quote_update(quote):
+    if not ingest.offer(QUOTE, quote):
+        await ingest.put(QUOTE, quote)
+
+async def flush_bars_periodically(interval=1.0):
+    """Closes bars on wall-clock time when no later trade arrives to close them."""
+    while True:
+        await asyncio.sleep(interval)
+        ingest.put_control(FLUSH, time.time_ns() - BAR_FLUSH_DELAY_NS)
+
+def _resolve(future, value):
+    if not future.done():  # Not timed out meanwhile
+        future.set_result(value)
+
+async def snapshot_periodically(interval=SNAPSHOT_INTERVAL_S, path=SNAPSHOT_PATH):
+    """Saves the stream state every ``interval`` seconds; the ingest worker captures it between two items."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        captured = loop.create_future()
+        ingest.put_control(SNAPSHOT, lambda data, captured=captured: loop.call_soon_threadsafe(_resolve, captured, data))
+        try:
+            data = await asyncio.wait_for(captured, interval)
+            await asyncio.to_thread(write_snapshot, data, path)
+        except asyncio.TimeoutError:
+            print("Snapshot skipped: the ingest worker is behind")
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+
+def restore_snapshot(registry, path=SNAPSHOT_PATH, max_age_s=SNAPSHOT_MAX_AGE_S):
+    """Restores a registry from its snapshot, then applies the stream items journaled after it.
+
+    Returns False, leaving the registry untouched, if there is no usable
+    snapshot. Bars completed while catching up are not published as events.
+    Must run before the registry's IngestWorker starts.
+    """
+    start = time.perf_counter()
+    snapshot = load_snapshot(path, max_age_s)
+    if snapshot is None:
+        return False
     try:
-        aggregator.add_trade(trade)
-    except Exception as e:
-        print(f"Error handling trade: {e}")
+        registry.restore(snapshot['symbols'])
+    except ValueError as e:
+        print(f"Snapshot does not fit this configuration ({e}); warming up from history")
+        return False
+    caught_up = 0
+    if snapshot['journal'] is not None:
+        journal_path, count = snapshot['journal']
+        try:
+            caught_up = catch_up(IngestWorker(registry, None), journal_path, count)
+        except Exception as e:
+            print(f"Error catching up from {journal_path}: {e}")
+    if registry.events is not None:
+        # Bars rebuilt while catching up are history, not signals
+        while not registry.events.empty():
+            registry.events.get_nowait()
+            registry.events.task_done()
+    print(f"Restored {len(registry)} symbols from {path} and {caught_up} journaled items "
+          f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    return True
+
+async def start_stream(symbols=None, strategy_factory=None, shards=SHARDS, publish_events=False,
+                       trade_update_handler=None, prices=None, normalize=False, timeframes=None, quotes=None,
+                       queue_size=INGEST_QUEUE_SIZE, overflow=INGEST_OVERFLOW, journal=None,
+                       snapshot_interval=SNAPSHOT_INTERVAL_S, ready=None):
+    """Streams trades for ``symbols`` (default SYMBOLS) through a SymbolRegistry.
 
-async def start_stream():
-    global aggregator, processor
-    aggregator = TradeBarAggregator(SYMBOL, TIME_FRAME)
-    processor = DataProcessor()
+    With ``shards`` > 0 indicator and signal work runs in that many worker
+    processes. With ``publish_events`` processed bars and shard signals are
+    published on ``registry.events``. ``trade_update_handler`` receives the
+    account's order/fill updates over the same connection. ``prices`` (a
+    LastPriceCache) is kept current from the trade stream. With ``normalize``
+    every in-process DataProcessor keeps normalized features, continuing
+    from the offline preprocessing statistics. ``timeframes`` (default
+    TIMEFRAMES) are extra bar resolutions built from the same trades. With
+    ``quotes`` (default QUOTES) quotes are streamed too, for trade-side
+    classification and top-of-book features. Stream items wait in an
+    IngestQueue of ``queue_size`` with the ``overflow`` policy, and an
+    IngestWorker thread aggregates them. With ``journal`` (default JOURNAL)
+    the session's trades and quotes are recorded to a TickJournal under
+    JOURNAL_ROOT. Every ``snapshot_interval`` seconds (0: never) the stream
+    state is saved to SNAPSHOT_PATH, and a restart continues from there
+    instead of warming up from history (in-process registries only).
+    ``ready`` (an asyncio.Event) is set once the registry can be used.
+    """
+    global registry, ingest
+    symbols = symbols or SYMBOLS
+    quotes = QUOTES if quotes is None else quotes
+    journal = JOURNAL if journal is None else journal
+    store = BarStore()
+    writer = BarWriter(store, TIME_FRAME).start()
+    pool = None
+    if shards:
+        pool = ShardPool(symbols, shards, TIME_FRAME, store_root=store.root, strategy_factory=strategy_factory,
+                         quotes=quotes).start()
+    registry = SymbolRegistry(symbols, TIME_FRAME, writer=writer, strategy_factory=strategy_factory, shards=pool,
+                              publish_events=publish_events, prices=prices, normalize=normalize,
+                              timeframes=TIMEFRAMES if timeframes is None else timeframes, quotes=quotes)
+    if pool is not None and publish_events:
+        pool.forward_signals(asyncio.get_running_loop(), registry.publish_signal)
 
-    # Load historical data
-    historical_file = f"data/raw/{SYMBOL}_raw.csv"
-    processor.load_historical_data(historical_file)
+    snapshots = bool(snapshot_interval) and pool is None
+    if not (snapshots and restore_snapshot(registry)):
+        registry.load_history(store)
+    ingest = IngestQueue(queue_size, overflow)
+    tick_journal = None
+    if journal:
+        tick_journal = TickJournal(os.path.join(JOURNAL_ROOT, time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + ".ticks"))
+        print(f"Recording ticks to {tick_journal.path}")
+    worker = IngestWorker(registry, ingest, tick_journal).start(asyncio.get_running_loop())
+    if ready is not None:
+        ready.set()
 
     while True:
         try:
@@ -207,14 +1116,72 @@ async def start_stream():
             print(f"Error checking market status: {e}")
             await asyncio.sleep(60)
 
-    stream = Stream(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL, data_feed='iex')  # Use 'sip' for premium data
-    stream.subscribe_trades(handle_trade_update, SYMBOL)
-    
+    stream = Stream(*credentials(), base_url=BASE_URL, data_feed='iex')  # Use 'sip' for premium data
+    stream.subscribe_trades(handle_trade_update, *symbols)
+    if quotes:
+        stream.subscribe_quotes(handle_quote_update, *symbols)
+    if trade_update_handler is not None:
+        stream.subscribe_trade_updates(trade_update_handler)
+
+    flush_task = asyncio.create_task(flush_bars_periodically())
+    snapshot_task = asyncio.create_task(snapshot_periodically(snapshot_interval)) if snapshots else None
     try:
         await stream._run_forever()
     except Exception as e:
         print(f"Stream error: {e}")
         raise
+    finally:
+        flush_task.cancel()
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+        stopped = worker.close()
+        if snapshots and not stopped:
+            print("Warning: ingest worker still running; skipping the final snapshot")
+        elif snapshots:
+            try:
+                write_snapshot(capture(registry, tick_journal))
+            except Exception as e:
+                print(f"Error saving snapshot: {e}")
+        if tick_journal is not None:
+            if stopped:
+                tick_journal.close()
+            else:
+                tick_journal.flush()  # The worker may still append; closing would unmap under it
+        if pool is not None:
+            pool.close()
+        # Flush and fsync whatever bars are still queued
+        writer.close()
+
+async def replay_stream(path, strategy_factory=None, publish_events=False, prices=None, normalize=False,
+                        timeframes=None, speed=0.0, clock=None, broker=None, store=None, ready=None):
+    """Replays a TickJournal through a SymbolRegistry instead of the live stream; returns the record count.
+
+    The registry is built for the journal's symbols the way start_stream
+    builds it, in-process (no shards) and without persisting bars, and warms
+    up only from bars in ``store`` (default BarStore()) that opened before
+    the journal's first record.
+    ``speed``, ``clock`` and ``broker`` are passed to replay_journal; with
+    ``publish_events`` the trading loop handles each bar before the replay
+    moves on. ``ready`` (an asyncio.Event) is set once the registry is warm.
+    """
+    global registry
+    records, symbols = read_journal(path)
+    registry = SymbolRegistry(symbols, TIME_FRAME, strategy_factory=strategy_factory, publish_events=publish_events,
+                              prices=prices, normalize=normalize,
+                              timeframes=TIMEFRAMES if timeframes is None else timeframes,
+                              quotes=bool((records['kind'] == JOURNAL_QUOTE).any()))
+    if len(records):
+        interval_ns = pd.Timedelta(TIME_FRAME).value
+        registry.load_history(store or BarStore(), end=int(records['timestamp'].min()) // interval_ns * interval_ns)
+    # Driven directly on the event loop, so every record is processed before the next one is read
+    worker = IngestWorker(registry, None)
+    if ready is not None:
+        ready.set()
+    print(f"Replaying {len(records)} stream items for {len(symbols)} symbols from {path}...")
+    count = await replay_journal(records, symbols, worker, BAR_FLUSH_DELAY_NS, speed, clock, broker,
+                                 registry.events)
+    print(f"Replay finished after {count} stream items")
+    return count
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from indicators import INDICATOR_COLUMNS
+
+# Raw bar fields as produced by the aggregator, with their storage types
+RAW_BAR_FIELDS = (
+    ("timestamp", np.int64),  # Bar start, UTC nanoseconds
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+    ("vwap", np.float64),
+    ("trade_count", np.int64),
+)
+
+# Raw fields followed by every live indicator column
+BAR_FIELDS = RAW_BAR_FIELDS + tuple((name, np.float64) for name in INDICATOR_COLUMNS)
+
+
+class BarWindow:
+    """Read-only view over the most recent rows of a BarRingBuffer.
+
+    Columns are NumPy views into the buffer, so building a window costs no
+    copies. It supports the subset of the DataFrame interface the strategies
+    use (``window['close']``, ``len(window)``, ``window.empty``).
+    """
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __len__(self):
+        for values in self._columns.values():
+            return len(values)
+        return 0
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def to_frame(self):
+        """Copies the window into a DataFrame (for persistence and offline use)."""
+        df = pd.DataFrame({name: values.copy() for name, values in self._columns.items()})
+        if "timestamp" in df:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ns", utc=True)
+        return df
+
+
+class BarRingBuffer:
+    """Preallocated, fixed-capacity columnar store of the latest bars.
+
+    Every field lives in its own typed array. Each row is written twice, at
+    ``pos`` and ``pos + capacity``, so the newest N rows are always one
+    contiguous slice and ``last(n)`` can return views instead of copies.
+    Memory use is fixed at construction: ``2 * capacity * 8`` bytes per field.
+    """
+
+    def __init__(self, capacity, fields=BAR_FIELDS):
+        self.capacity = capacity
+        self.fields = tuple(name for name, _ in fields)
+        self._arrays = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in fields}
+        self._column_list = [self._arrays[name] for name in self.fields]
+        self._pos = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self._column_list)
+
+    def append(self, *values):
+        """Appends one row; values are given in ``self.fields`` order."""
+        pos = self._pos
+        mirror = pos + self.capacity
+        for column, value in zip(self._column_list, values):
+            column[pos] = value
+            column[mirror] = value
+        self._pos = pos + 1 if pos + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend(self, columns):
+        """Appends many rows at once from a mapping of field name to array."""
+        n = len(columns[self.fields[0]])
+        if not n:
+            return
+        cap = self.capacity
+        if n >= cap:
+            # Only the newest rows fit; lay them out from position zero
+            for name in self.fields:
+                values = np.asarray(columns[name])[-cap:]
+                self._arrays[name][:cap] = values
+                self._arrays[name][cap:] = values
+            self._pos = 0
+            self._size = cap
+            return
+        index = (self._pos + np.arange(n)) % cap
+        for name in self.fields:
+            values = np.asarray(columns[name])
+            self._arrays[name][index] = values
+            self._arrays[name][index + cap] = values
+        self._pos = (self._pos + n) % cap
+        self._size = min(self._size + n, cap)
+
+    def state(self):
+        """Restorable state: the buffered rows only (views; serialize before the next append)."""
+        return {"fields": self.fields, "columns": {name: self.column(name) for name in self.fields}}
+
+    def restore(self, state):
+        """Replaces the contents with rows saved by ``state``; the fields must match."""
+        if tuple(state["fields"]) != self.fields:
+            raise ValueError(f"Buffer fields {list(state['fields'])} do not match {list(self.fields)}")
+        self._pos = 0
+        self._size = 0
+        self.extend(state["columns"])
+
+    def last(self, n=None, columns=None, offset=0):
+        """Returns a zero-copy BarWindow over the newest ``n`` rows (all rows by default).
+
+        With ``offset`` the window ends that many rows before the newest one.
+        """
+        offset = min(offset, self._size)
+        n = self._size - offset if n is None else min(n, self._size - offset)
+        # The newest row sits just before _pos in the mirrored half
+        end = self._pos + self.capacity - offset
+        names = self.fields if columns is None else columns
+        return BarWindow({name: self._arrays[name][end - n:end] for name in names})
+
+    def column(self, name, n=None):
+        """Returns a zero-copy view of one field for the newest ``n`` rows."""
+        n = self._size if n is None else min(n, self._size)
+        end = self._pos + self.capacity
+        return self._arrays[name][end - n:end]
+
+    def latest(self, name):
+        """Returns the newest value of one field."""
+        if not self._size:
+            raise IndexError("Buffer is empty")
+        return self._arrays[name][self._pos + self.capacity - 1]
@@ -0,0 +1,102 @@
+import os
+import time
+import queue
+import threading
+
+
+class BarWriter:
+    """Background thread that appends bar rows to a BarStore in batches.
+
+    ``write`` only enqueues, so callers on the event loop never wait for the
+    disk. The thread flushes when ``batch_size`` rows are pending or
+    ``flush_interval`` seconds have passed, and ``close`` drains the queue and
+    fsyncs every file written. If the bounded queue is full the row is
+    dropped and counted in ``rows_dropped`` rather than blocking the caller.
+    """
+
+    def __init__(self, store, timeframe, max_queue=10000, batch_size=256, flush_interval=1.0):
+        self.store = store
+        self.timeframe = timeframe
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}
+        self._pending_rows = 0
+        self._unsynced = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bar-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, symbol, row, kind, timeframe=None):
+        """Queues one row (a dict of column -> value, ``timestamp`` in UTC ns) for dataset ``kind``.
+
+        ``timeframe`` defaults to the writer's own.
+        """
+        try:
+            self._queue.put_nowait((kind, symbol, timeframe or self.timeframe, row))
+        except queue.Full:
+            self.rows_dropped += 1
+
+    def close(self):
+        """Writes everything still queued and fsyncs every file written."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        else:
+            self._drain()
+        self._flush()
+        for path in self._unsynced:
+            try:
+                with open(path, "rb") as f:
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Error syncing {path}: {e}")
+        self._unsynced.clear()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.is_set():
+            timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                self._add(*self._queue.get(timeout=timeout))
+                self._drain()
+            except queue.Empty:
+                pass
+            if self._pending_rows >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+        self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                self._add(*self._queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _add(self, kind, symbol, timeframe, row):
+        self._pending.setdefault((kind, symbol, timeframe), []).append(row)
+        self._pending_rows += 1
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._pending_rows = 0
+        for (kind, symbol, timeframe), rows in pending.items():
+            try:
+                columns = {name: [row[name] for row in rows] for name in rows[0]}
+                self._unsynced.update(self.store.write(symbol, columns, kind=kind, timeframe=timeframe))
+                self.rows_written += len(rows)
+            except Exception as e:
+                print(f"Error writing {kind} {timeframe} bars for {symbol}: {e}")
@@ -0,0 +1,295 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from data_streaming.messages import unpack_trade, unpack_quote, trade_symbol
+from data_streaming.snapshot import capture
+from monitoring import metrics
+
+# Overflow policies of a full IngestQueue
+BLOCK = "block"        # The producer waits for room; the backlog stays in the socket and nothing is lost
+COALESCE = "coalesce"  # A quote replaces its symbol's latest queued quote; trades (never dropped) wait as with block
+DROP = "drop"          # The new item is discarded, trades included (bars then miss volume)
+OVERFLOW_POLICIES = (BLOCK, COALESCE, DROP)
+
+# Item kinds
+TRADE = 0
+QUOTE = 1
+FLUSH = 2  # Close bars older than the item (a wall-clock time in ns)
+SNAPSHOT = 3  # Capture the registry state and pass the bytes to the item (a callable)
+
+# Most items taken per drain, so room is freed for a blocked producer while a burst is processed
+MAX_DRAIN = 4096
+
+TRADES = metrics.counter("trades_total", "Trades received from the stream")
+QUOTES = metrics.counter("quotes_total", "Quotes received from the stream")
+TRADE_BATCH_LATENCY = metrics.histogram("trade_batch_seconds", "Time to route and aggregate one websocket batch")
+INGEST_ERRORS = metrics.counter("errors_total", "Errors caught by stage", labels={"stage": "ingest"})
+QUEUE_DEPTH = metrics.gauge("ingest_queue_depth", "Stream items waiting for the ingest worker")
+INGEST_LAG = metrics.histogram("ingest_lag_seconds", "Oldest item's time from enqueue to processed, per drain")
+INGEST_DROPPED = {
+    kind: metrics.counter("ingest_dropped_total", "Stream items discarded by the drop policy", labels={"kind": name})
+    for kind, name in ((TRADE, "trade"), (QUOTE, "quote"))
+}
+INGEST_COALESCED = metrics.counter("ingest_coalesced_total", "Queued quotes replaced by a newer one (coalesce policy)")
+INGEST_WAITS = metrics.counter("ingest_waits_total", "Enqueues that waited for room (block policy)")
+
+
+class IngestQueue:
+    """Bounded hand-off of stream items from the websocket handlers to an IngestWorker.
+
+    The handlers only call ``offer`` (and ``put`` when that fails), so the
+    event loop keeps reading the socket while aggregation and indicator work
+    runs on the worker thread. Once ``maxsize`` items are waiting, ``policy``
+    decides what happens to the next one (see OVERFLOW_POLICIES); discarded
+    items are counted per kind in ``dropped`` and replaced quotes in
+    ``coalesced``. ``high_water`` is the deepest the queue has been. Items
+    keep their enqueue time for the lag metric.
+
+    Under the coalesce policy a quote for a symbol whose previous quote is
+    still queued overwrites that entry in place, unless a trade for the
+    symbol was queued after it: those trades must be classified against the
+    quote they saw, so the earlier quote stays and the new one is appended
+    past the limit as the symbol's quote to coalesce into. As trades wait
+    while the queue is full, that adds at most one item per symbol.
+    ``_appended`` and ``_taken`` count items in and out: a registered quote
+    is still queued while its sequence number is at least ``_taken``, which
+    ``take`` only advances under ``_lock``.
+    """
+
+    def __init__(self, maxsize=100_000, policy=BLOCK):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = {TRADE: 0, QUOTE: 0}
+        self.coalesced = 0
+        self.waits = 0
+        self.high_water = 0
+        self.closed = False
+        self._items = deque()
+        self._ready = threading.Event()
+        self._room = None  # Future a blocked producer waits on, with its loop
+        self._lock = threading.Lock()
+        self._appended = 0
+        self._taken = 0
+        self._queued_quotes = {}  # symbol -> (sequence number, [QUOTE, item, enqueued ns]); coalesce only
+        self._queued_trades = {}  # symbol -> sequence number of its latest queued trade; coalesce only
+        QUEUE_DEPTH.track(self.__len__)
+
+    def __len__(self):
+        return len(self._items)
+
+    def offer(self, kind, item):
+        """Enqueues without waiting; returns False when full and the item has to wait (see OVERFLOW_POLICIES)."""
+        items = self._items
+        depth = len(items)
+        policy = self.policy
+        if depth >= self.maxsize:
+            if policy == DROP:
+                self.dropped[kind] += 1
+                INGEST_DROPPED[kind].inc()
+                return True
+            if policy == BLOCK or kind != QUOTE:
+                return False
+            return self._coalesce(item)
+        if depth >= self.high_water:
+            self.high_water = depth + 1
+        self._append(kind, item)
+        return True
+
+    def _append(self, kind, item):
+        if self.policy == COALESCE and kind <= QUOTE:
+            symbol = trade_symbol(item)
+            if kind == QUOTE:
+                entry = [kind, item, time.perf_counter_ns()]
+                self._queued_quotes[symbol] = (self._appended, entry)
+            else:
+                entry = (kind, item, time.perf_counter_ns())
+                self._queued_trades[symbol] = self._appended
+        else:
+            entry = (kind, item, time.perf_counter_ns())
+        self._items.append(entry)
+        self._appended += 1
+        if not self._ready.is_set():
+            self._ready.set()
+
+    def _coalesce(self, quote):
+        """Takes ``quote`` into a full queue in place of its symbol's queued quote; False if it has none."""
+        symbol = trade_symbol(quote)
+        queued = self._queued_quotes.get(symbol)
+        if queued is None:
+            return False
+        sequence, entry = queued
+        with self._lock:
+            if sequence < self._taken:  # Already handed to the worker
+                return False
+            if self._queued_trades.get(symbol, -1) < sequence:
+                entry[1] = quote
+                self.coalesced += 1
+                INGEST_COALESCED.inc()
+                return True
+        # Trades queued after the earlier quote still need it
+        self._append(QUOTE, quote)
+        return True
+
+    async def put(self, kind, item):
+        """Enqueues, waiting for room when ``offer`` cannot take the item."""
+        if self.offer(kind, item):
+            return
+        self.waits += 1
+        INGEST_WAITS.inc()
+        loop = asyncio.get_running_loop()
+        while not self.offer(kind, item):
+            if self.closed:
+                return
+            room = loop.create_future()
+            self._room = (room, loop)
+            # The worker may have drained between the failed offer and publishing the future
+            if len(self._items) >= self.maxsize:
+                await room
+            self._room = None
+
+    def put_control(self, kind, item):
+        """Enqueues regardless of the size limit (e.g. FLUSH, which must not be dropped)."""
+        self._items.append((kind, item, time.perf_counter_ns()))
+        self._appended += 1
+        self._ready.set()
+
+    def take(self, timeout=None):
+        """Worker side: waits for items and returns up to MAX_DRAIN of them in arrival order."""
+        if not self._items:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        items = self._items
+        batch = []
+        with self._lock:
+            while items and len(batch) < MAX_DRAIN:
+                batch.append(items.popleft())
+            self._taken += len(batch)
+        if items:
+            self._ready.set()
+        waiter = self._room
+        if waiter is not None:
+            room, loop = waiter
+            loop.call_soon_threadsafe(_release, room)
+        return batch
+
+    def close(self):
+        """Wakes the worker to finish what is queued and stop."""
+        self.closed = True
+        self._ready.set()
+        waiter = self._room
+        if waiter is not None:
+            room, loop = waiter
+            loop.call_soon_threadsafe(_release, room)
+
+
+def _release(room):
+    if not room.done():
+        room.set_result(None)
+
+
+class IngestWorker:
+    """Thread that drains an IngestQueue into a SymbolRegistry in arrival order.
+
+    Consecutive trades are handed to ``registry.add_trades`` as one batch;
+    a quote is applied only after the trades queued before it, so prints
+    are still classified against the quote that prevailed when they
+    arrived. FLUSH items close quiet bars; SNAPSHOT items capture the
+    registry state between two items, so bars and indicators always agree.
+    ``start(loop)`` binds the registry to the event loop so bar events are
+    published thread-safely.
+    With a ``journal`` (a TickJournal) every trade and quote is recorded
+    there, in processing order with its arrival time, before it is applied;
+    items discarded by the overflow policy never reach it.
+    """
+
+    def __init__(self, registry, queue, journal=None):
+        self.registry = registry
+        self.queue = queue
+        self.journal = journal
+        # Converts the queue's perf_counter enqueue times to wall-clock arrival times
+        self._wall_offset = time.time_ns() - time.perf_counter_ns()
+        self._thread = None
+
+    def start(self, loop=None):
+        if self._thread is None:
+            self.registry.loop = loop
+            self._thread = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=10.0):
+        """Processes everything still queued, then stops the thread.
+
+        Returns False if the thread is still running after ``timeout``.
+        """
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        return True
+
+    def _run(self):
+        queue = self.queue
+        while True:
+            batch = queue.take(timeout=1.0)
+            if batch:
+                self.process(batch)
+            elif queue.closed:
+                return
+
+    def process(self, batch):
+        """Applies a list of queued (kind, item, enqueued ns) entries."""
+        registry = self.registry
+        journal = self.journal
+        trades = []
+        for kind, item, enqueued in batch:
+            if journal is not None and kind <= QUOTE:
+                self._record(kind, item, enqueued)
+            if kind == TRADE:
+                trades.append(item)
+                continue
+            if trades:
+                self._add_trades(trades)
+                trades = []
+            try:
+                if kind == QUOTE:
+                    registry.add_quote(item)
+                    QUOTES.inc()
+                elif kind == FLUSH:
+                    registry.flush(item)
+                else:
+                    item(capture(registry, journal))
+            except Exception as e:
+                INGEST_ERRORS.inc()
+                print(f"Error handling stream item: {e}")
+        if trades:
+            self._add_trades(trades)
+        INGEST_LAG.observe(time.perf_counter_ns() - batch[0][2])
+
+    def _record(self, kind, item, enqueued_ns):
+        try:
+            symbol = trade_symbol(item)
+            received = enqueued_ns + self._wall_offset
+            if kind == TRADE:
+                timestamp, price, size = unpack_trade(item)
+                self.journal.append_trade(symbol, timestamp, price, size, received)
+            else:
+                self.journal.append_quote(symbol, *unpack_quote(item), received)
+        except Exception as e:
+            INGEST_ERRORS.inc()
+            print(f"Error journaling stream item: {e}")
+
+    def _add_trades(self, trades):
+        start = time.perf_counter_ns()
+        try:
+            self.registry.add_trades(trades)
+        except Exception as e:
+            INGEST_ERRORS.inc()
+            print(f"Error handling trade: {e}")
+        TRADES.inc(len(trades))
+        TRADE_BATCH_LATENCY.observe_since(start)
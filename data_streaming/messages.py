@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+def to_timestamp_ns(value):
+    """Converts a timestamp (ns int, string, datetime or pd.Timestamp) to UTC nanoseconds."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return pd.Timestamp(value).value
+
+def _event_time_ns(timestamp):
+    if type(timestamp) is int:
+        return timestamp
+    return timestamp.to_unix_nano() if hasattr(timestamp, 'to_unix_nano') else to_timestamp_ns(timestamp)
+
+def unpack_trade(trade):
+    """Returns (timestamp_ns, price, size) from an Alpaca trade entity, raw message dict or trade-like object."""
+    if type(trade) is tuple:  # Already unpacked
+        return trade
+    # Alpaca entities keep the decoded message in _raw with timestamps already in ns
+    raw = getattr(trade, '_raw', trade)
+    if isinstance(raw, dict):
+        if 'price' in raw:
+            timestamp, price, size = raw['timestamp'], raw['price'], raw['size']
+        else:
+            timestamp, price, size = raw['t'], raw['p'], raw['s']
+    else:
+        timestamp, price, size = trade.timestamp, trade.price, trade.size
+    return _event_time_ns(timestamp), price, size
+
+def unpack_quote(quote):
+    """Returns (timestamp_ns, bid, bid_size, ask, ask_size) from an Alpaca quote entity, raw message dict or quote-like object."""
+    raw = getattr(quote, '_raw', quote)
+    if isinstance(raw, dict):
+        if 'bid_price' in raw:
+            return (_event_time_ns(raw['timestamp']), raw['bid_price'], raw['bid_size'],
+                    raw['ask_price'], raw['ask_size'])
+        return _event_time_ns(raw['t']), raw['bp'], raw['bs'], raw['ap'], raw['as']
+    return _event_time_ns(quote.timestamp), quote.bid_price, quote.bid_size, quote.ask_price, quote.ask_size
+
+def trade_symbol(trade):
+    """Returns the symbol of an Alpaca trade or quote entity, raw message dict or trade-like object."""
+    raw = getattr(trade, '_raw', trade)
+    if isinstance(raw, dict):
+        return raw['symbol'] if 'symbol' in raw else raw['S']
+    return trade.symbol
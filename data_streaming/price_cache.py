@@ -0,0 +1,71 @@
+import time
+import threading
+
+# Default maximum age of a cached price before falling back to REST
+MAX_PRICE_AGE_S = 2.0
+
+
+class LastPriceCache:
+    """Latest trade price per symbol, fed from the market data stream.
+
+    Entries are (price, event time ns). ``price`` serves the cached value
+    while it is younger than ``max_age_s`` (by event time against the local
+    wall clock) and otherwise calls ``fallback(symbol)`` - typically a REST
+    latest-trade request returning (price, event time ns) - and caches its
+    answer under the trade's own event time, so later streamed prints still
+    replace it. Streamed prints are recorded from the ingest worker thread
+    and fallback answers from order threads, so ``update`` compares and
+    replaces under a lock and an older print can never overwrite a newer
+    one. Reads take no lock: each entry is replaced as a single tuple, so
+    readers never see a half-written value. ``hits`` and ``misses`` are
+    rough statistics: concurrent order threads may lose an increment. ``clock``
+    returns the current time in UTC ns (a simulated clock when replaying).
+    """
+
+    def __init__(self, max_age_s=MAX_PRICE_AGE_S, fallback=None, clock=time.time_ns):
+        self.max_age_ns = int(max_age_s * 1e9)
+        self.fallback = fallback
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._prices = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, price, timestamp_ns):
+        """Records a trade; older prints than the cached one are ignored."""
+        with self._lock:
+            entry = self._prices.get(symbol)
+            if entry is None or timestamp_ns >= entry[1]:
+                self._prices[symbol] = (price, timestamp_ns)
+
+    def get(self, symbol):
+        """Returns (price, event time ns) or None, regardless of age."""
+        return self._prices.get(symbol)
+
+    def age_s(self, symbol, now_ns=None):
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None
+        now_ns = self.clock() if now_ns is None else now_ns
+        return (now_ns - entry[1]) / 1e9
+
+    def price(self, symbol, max_age_s=None):
+        """Returns a price no older than ``max_age_s`` (default: the cache's), using the fallback if needed.
+
+        Returns None when the cache is stale and there is no fallback.
+        """
+        max_age_ns = self.max_age_ns if max_age_s is None else int(max_age_s * 1e9)
+        entry = self._prices.get(symbol)
+        now_ns = self.clock()
+        if entry is not None and now_ns - entry[1] <= max_age_ns:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        if self.fallback is None:
+            return None
+        latest = self.fallback(symbol)
+        if latest is None:
+            return None
+        price, timestamp_ns = latest
+        self.update(symbol, price, timestamp_ns)
+        return price
@@ -0,0 +1,94 @@
+import time
+import asyncio
+from data.tick_journal import read_journal, TRADE as JOURNAL_TRADE
+from data_streaming.ingest_queue import TRADE, QUOTE, FLUSH
+
+# Journal time between FLUSH items, like flush_bars_periodically's interval
+REPLAY_FLUSH_INTERVAL_NS = 10**9
+
+
+class SimulatedClock:
+    """Replay time in UTC ns: the arrival time of the journal record being replayed.
+
+    Callable, so it can stand in for ``time.time_ns`` (e.g. as a
+    LastPriceCache clock).
+    """
+
+    __slots__ = ('now_ns',)
+
+    def __init__(self, now_ns=0):
+        self.now_ns = now_ns
+
+    def __call__(self):
+        return self.now_ns
+
+
+def journal_items(records, symbols):
+    """Returns journal records as (ingest kind, raw message dict) stream items, in recorded order."""
+    items = []
+    columns = zip(records['kind'].tolist(), records['symbol'].tolist(), records['timestamp'].tolist(),
+                  records['price'].tolist(), records['size'].tolist(), records['ask'].tolist(),
+                  records['ask_size'].tolist())
+    for kind, symbol_id, timestamp, price, size, ask, ask_size in columns:
+        symbol = symbols[symbol_id]
+        if kind == JOURNAL_TRADE:
+            items.append((TRADE, {'S': symbol, 't': timestamp, 'p': price, 's': size}))
+        else:
+            items.append((QUOTE, {'S': symbol, 't': timestamp, 'bp': price, 'bs': size, 'ap': ask, 'as': ask_size}))
+    return items
+
+
+def catch_up(worker, path, start=0):
+    """Applies the stream items a journal recorded after its first ``start`` (e.g. since a snapshot).
+
+    Returns how many were applied; bars are not flushed on time.
+    """
+    records, symbols = read_journal(path)
+    items = journal_items(records[start:], symbols)
+    if items:
+        enqueued = time.perf_counter_ns()
+        worker.process([(kind, item, enqueued) for kind, item in items])
+    return len(items)
+
+
+async def replay_journal(records, symbols, worker, flush_delay_ns, speed=0.0, clock=None, broker=None,
+                         events=None):
+    """Feeds journal records through an IngestWorker's registry in recorded order; returns the count.
+
+    Each record becomes the raw stream message the handlers would have
+    enqueued and is processed on the calling (event loop) thread. Bars are
+    closed on recorded arrival time with the same FLUSH items and delay as
+    the live stream. ``speed`` 1.0 replays at recorded pace, 2.0 twice as
+    fast and 0 as fast as possible. ``clock`` (a SimulatedClock) follows the
+    records' arrival times and ``broker`` (a SimulatedBroker) sees every
+    trade before the pipeline does. With ``events`` (the registry's queue)
+    every published bar is handled by the trading loop before the next
+    record, so a replay makes the same decisions however fast it runs.
+    """
+    if not len(records):
+        return 0
+    items = journal_items(records, symbols)
+    received = records['received'].tolist()
+
+    first_received = received[0]
+    started = time.perf_counter_ns()
+    next_flush = first_received + REPLAY_FLUSH_INTERVAL_NS
+    for i, (kind, item) in enumerate(items):
+        now_ns = received[i]
+        if speed:
+            delay_ns = (now_ns - first_received) / speed - (time.perf_counter_ns() - started)
+            if delay_ns > 0:
+                await asyncio.sleep(delay_ns / 1e9)
+        if clock is not None:
+            clock.now_ns = now_ns
+        while now_ns >= next_flush:
+            worker.process([(FLUSH, next_flush - flush_delay_ns, time.perf_counter_ns())])
+            next_flush += REPLAY_FLUSH_INTERVAL_NS
+        if broker is not None and kind == TRADE:
+            broker.on_trade(item['S'], item['p'], item['t'])
+        worker.process([(kind, item, time.perf_counter_ns())])
+        if events is not None and events.qsize():
+            await events.join()
+        elif not speed and i % 1000 == 0:
+            await asyncio.sleep(0)  # Let other tasks run during a fast replay
+    return len(items)
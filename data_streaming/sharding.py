@@ -0,0 +1,165 @@
+import time
+import queue
+import threading
+import multiprocessing as mp
+from data.bar_store import STORE_ROOT
+
+
+def assign_shards(symbols, n_shards):
+    """Spreads symbols round-robin over ``n_shards`` (sorted, so the split is deterministic)."""
+    return {symbol: i % n_shards for i, symbol in enumerate(sorted(symbols))}
+
+
+class ShardSink:
+    """Takes a DataProcessor's place in the aggregator and forwards finalized bars to a shard."""
+
+    __slots__ = ('pool', 'symbol')
+
+    def __init__(self, pool, symbol):
+        self.pool = pool
+        self.symbol = symbol
+
+    def add_bar(self, *bar):
+        self.pool.submit(self.symbol, bar, time.time_ns())
+
+
+def _shard_worker(symbols, timeframe, store_root, strategy_factory, quotes, bars_in, signals_out):
+    """Worker loop: owns the processors/strategies of ``symbols`` and emits actionable signals."""
+    from data.bar_store import BarStore
+    from data_streaming.bar_writer import BarWriter
+    from data_streaming.alpaca_stream import DataProcessor
+
+    store = BarStore(store_root)
+    writer = BarWriter(store, timeframe).start()
+    processors, strategies = {}, {}
+    for symbol in symbols:
+        if strategy_factory is not None:
+            strategies[symbol] = strategy_factory(symbol)
+        features = strategies[symbol].features if symbol in strategies else None
+        processors[symbol] = DataProcessor(symbol, writer=writer, features=features, quotes=quotes)
+        processors[symbol].load_history(store, timeframe)
+
+    try:
+        while True:
+            batch = bars_in.get()
+            if batch is None:
+                break
+            signals = []
+            for symbol, bar, finalized_ns in batch:
+                processor = processors[symbol]
+                processor.add_bar(*bar)
+                strategy = strategies.get(symbol)
+                if strategy is None or not processor.is_ready:
+                    continue
+                try:
+                    signal = strategy.generate_signal(processor.processed_data)
+                except Exception as e:
+                    print(f"Error generating signal for {symbol}: {e}")
+                    continue
+                if signal in ("buy", "sell"):
+                    signals.append((symbol, bar[0], signal, finalized_ns))
+            if signals:
+                signals_out.put(signals)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+
+class ShardPool:
+    """Worker processes that each run indicators and strategies for a fixed subset of symbols.
+
+    The event loop only aggregates trades; finalized bars are queued per
+    shard with ``submit`` and sent as one message per shard by ``flush``
+    (called once per trade batch). Each worker warms up its own symbols from
+    the bar store, persists their processed bars, and returns actionable
+    signals as (symbol, bar timestamp ns, "buy"/"sell", bar close wall time
+    ns), read with ``poll_signals`` or pushed to an event loop with
+    ``forward_signals``. Workers are spawned, not forked, so they do not
+    inherit the parent's event loop or open sockets.
+    """
+
+    def __init__(self, symbols, n_shards, timeframe, store_root=STORE_ROOT, strategy_factory=None, quotes=False):
+        self.n_shards = max(1, min(n_shards, len(symbols)))
+        self.assignment = assign_shards(symbols, self.n_shards)
+        context = mp.get_context("spawn")
+        self._bars = [context.Queue() for _ in range(self.n_shards)]
+        self._signals = context.Queue()
+        self._pending = [[] for _ in range(self.n_shards)]
+        self._processes = []
+        self._forwarder = None
+        for shard in range(self.n_shards):
+            shard_symbols = [s for s, i in self.assignment.items() if i == shard]
+            self._processes.append(context.Process(
+                target=_shard_worker,
+                args=(shard_symbols, timeframe, store_root, strategy_factory, quotes, self._bars[shard], self._signals),
+                name=f"shard-{shard}",
+                daemon=True,
+            ))
+
+    def start(self):
+        for process in self._processes:
+            process.start()
+        return self
+
+    def sink(self, symbol):
+        return ShardSink(self, symbol)
+
+    def submit(self, symbol, bar, finalized_ns):
+        """Queues one finalized bar (DataProcessor.add_bar arguments) for its symbol's shard."""
+        self._pending[self.assignment[symbol]].append((symbol, bar, finalized_ns))
+
+    def flush(self):
+        """Sends every queued bar, one message per shard."""
+        for shard, pending in enumerate(self._pending):
+            if pending:
+                self._bars[shard].put(pending)
+                self._pending[shard] = []
+
+    def forward_signals(self, loop, callback):
+        """Calls ``callback(*signal)`` on ``loop`` for every signal, from a reader thread."""
+        def forward():
+            while True:
+                signals = self._signals.get()
+                if signals is None:
+                    return
+                for signal in signals:
+                    loop.call_soon_threadsafe(callback, *signal)
+
+        self._forwarder = threading.Thread(target=forward, name="shard-signals", daemon=True)
+        self._forwarder.start()
+
+    def poll_signals(self):
+        """Returns every signal received so far without blocking."""
+        signals = []
+        while True:
+            try:
+                signals.extend(self._signals.get_nowait())
+            except queue.Empty:
+                return signals
+
+    def close(self, timeout=10.0):
+        """Sends the remaining bars, stops the workers and waits for them to flush their writers.
+
+        Returns any signals still unread (they are drained while waiting, as a
+        worker cannot exit while its queue feeder is blocked on a full pipe);
+        with ``forward_signals`` active the reader thread drains them instead.
+        """
+        self.flush()
+        for bars in self._bars:
+            bars.put(None)
+        signals = []
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            while process.is_alive() and time.monotonic() < deadline:
+                if self._forwarder is None:
+                    signals.extend(self.poll_signals())
+                process.join(0.1)
+            if process.is_alive():
+                print(f"Shard {process.name} did not stop; terminating")
+                process.terminate()
+        if self._forwarder is not None:
+            self._signals.put(None)
+            self._forwarder.join(timeout)
+            return signals
+        return signals + self.poll_signals()
@@ -0,0 +1,54 @@
+import os
+import time
+import pickle
+
+# Default location of the stream state snapshot
+SNAPSHOT_PATH = "data/snapshots/stream.snapshot"
+SNAPSHOT_VERSION = 2
+
+
+def capture(registry, journal=None):
+    """Serializes a SymbolRegistry's state (see SymbolRegistry.state) to bytes.
+
+    With ``journal`` (the session's TickJournal) the snapshot also records
+    how many stream items had been journaled, so a restart can catch up on
+    the items after it. Must run where trades are applied.
+    """
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'created_ns': time.time_ns(),
+        'journal': None if journal is None else (journal.path, journal.count),
+        'symbols': registry.state(),
+    }
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_snapshot(data, path=SNAPSHOT_PATH):
+    """Writes captured bytes, replacing ``path`` atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age_s=None):
+    """Returns a snapshot's state dict, or None if there is none, it is unreadable or older than ``max_age_s``."""
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading snapshot {path}: {e}")
+        return None
+    if state.get('version') != SNAPSHOT_VERSION:
+        print(f"Ignoring snapshot {path}: version {state.get('version')}")
+        return None
+    age_s = (time.time_ns() - state['created_ns']) / 1e9
+    if max_age_s is not None and age_s > max_age_s:
+        print(f"Ignoring snapshot {path}: {age_s:.0f}s old")
+        return None
+    return state
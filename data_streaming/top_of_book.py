@@ -0,0 +1,126 @@
+import math
+from data_streaming.messages import unpack_quote, trade_symbol
+
+
+class QuoteState:
+    """Best bid and offer of one symbol, updated in place for every quote.
+
+    Holds only the newest quote (prices, sizes and event time ns), so each
+    update is a handful of attribute writes and allocates nothing. The
+    microstructure features are derived from it on demand in O(1).
+    """
+
+    __slots__ = ('symbol', 'bid', 'bid_size', 'ask', 'ask_size', 'timestamp')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bid = math.nan
+        self.bid_size = 0.0
+        self.ask = math.nan
+        self.ask_size = 0.0
+        self.timestamp = -1
+
+    def update(self, bid, bid_size, ask, ask_size, timestamp):
+        """Records a quote; returns False (and keeps the current one) if it is older."""
+        if timestamp < self.timestamp:
+            return False
+        self.bid = bid
+        self.bid_size = bid_size
+        self.ask = ask
+        self.ask_size = ask_size
+        self.timestamp = timestamp
+        return True
+
+    @property
+    def spread(self):
+        return self.ask - self.bid
+
+    @property
+    def mid(self):
+        return (self.bid + self.ask) * 0.5
+
+    @property
+    def microprice(self):
+        """Mid weighted towards the side with less size (where the next tick is likelier to go)."""
+        total = self.bid_size + self.ask_size
+        if not total:
+            return self.mid
+        return (self.bid * self.ask_size + self.ask * self.bid_size) / total
+
+    @property
+    def imbalance(self):
+        """(bid size - ask size) / total size, in [-1, 1]; NaN before the first quote."""
+        total = self.bid_size + self.ask_size
+        if not total:
+            return math.nan
+        return (self.bid_size - self.ask_size) / total
+
+    def side(self, price):
+        """Classifies a print against this quote: 1 buyer-initiated, -1 seller-initiated, 0 unknown.
+
+        Prints at or through the ask are buys and at or through the bid are
+        sells; inside the spread the nearer side wins (quote rule). Prints at
+        the mid, before any quote has arrived or while the book is invalid
+        (NaN prices), are unknown.
+        """
+        if price >= self.ask:
+            return 1
+        if price <= self.bid:
+            return -1
+        mid = (self.bid + self.ask) * 0.5
+        if price > mid:
+            return 1
+        if price < mid:
+            return -1
+        return 0
+
+
+class TopOfBook:
+    """Per-symbol QuoteState store fed from the quote stream.
+
+    One QuoteState is created per symbol up front and then only updated in
+    place, so consumers (e.g. the bar aggregators) can keep a reference to
+    their symbol's state instead of looking it up per trade. Quotes for
+    symbols outside the book are ignored; quotes older than the stored one
+    are counted in ``stale_quotes`` and dropped. A quote without a positive
+    bid at or below its ask (zero, one-sided or crossed) is counted in
+    ``invalid_quotes`` and leaves the symbol without a book (NaN prices, no
+    size): prints are then unclassified and the quote features NaN, as
+    before the first quote, rather than judged against a quote that no
+    longer stands.
+    """
+
+    def __init__(self, symbols=()):
+        self._quotes = {symbol: QuoteState(symbol) for symbol in symbols}
+        self.quotes_processed = 0
+        self.stale_quotes = 0
+        self.invalid_quotes = 0
+
+    def __getitem__(self, symbol):
+        return self._quotes[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self._quotes
+
+    def get(self, symbol):
+        return self._quotes.get(symbol)
+
+    def add_quote(self, quote):
+        """Applies an Alpaca quote entity, raw message dict or quote-like object."""
+        try:
+            state = self._quotes.get(trade_symbol(quote))
+            if state is None:
+                return
+            timestamp, bid, bid_size, ask, ask_size = unpack_quote(quote)
+        except Exception as e:
+            print(f"Error adding quote: {e}")
+            return
+        if not 0 < bid <= ask:
+            # Zero, one-sided or crossed: there is no usable book until the next valid quote
+            self.invalid_quotes += 1
+            bid = ask = math.nan
+            bid_size = ask_size = 0.0
+        if state.update(bid, bid_size, ask, ask_size, timestamp):
+            self.quotes_processed += 1
+        else:
+            self.stale_quotes += 1
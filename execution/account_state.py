@@ -0,0 +1,202 @@
+import time
+import asyncio
+import threading
+
+# Order statuses that leave an order working at the broker
+OPEN_ORDER_STATUSES = ("new", "accepted", "pending_new", "partially_filled", "held", "accepted_for_bidding",
+                       "pending_replace", "pending_cancel")
+
+# Seconds between background REST reconciliations
+RECONCILE_INTERVAL = 30.0
+
+
+def _field(obj, name, default=None):
+    """Reads a field from an Alpaca entity, a raw message dict or a plain object."""
+    raw = getattr(obj, '_raw', obj)
+    if isinstance(raw, dict):
+        return raw.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class AccountState:
+    """In-memory positions, open orders and buying power for the trading account.
+
+    Seeded from REST once (``reconcile``), kept current from the broker's
+    ``trade_updates`` stream (``handle_trade_update``), and re-synced by
+    ``reconcile_periodically`` to repair anything a missed update got wrong.
+    Risk checks and sizing read this state instead of calling REST per order.
+
+    Updates arrive on the event loop while orders are placed from worker
+    threads, so every read and write holds ``_lock``. Updates received while
+    a reconcile is fetching are replayed on top of its snapshot. The
+    snapshot may already include them, so a replay changes no cash and sets
+    a position only from the broker's ``position_qty``, never by adding the
+    fill again.
+    """
+
+    def __init__(self, rest_api):
+        self.rest_api = rest_api
+        self.positions = {}    # symbol -> {"qty": signed float, "avg_entry_price": float}
+        self.open_orders = {}  # order id -> {"symbol", "side", "qty", "filled_qty", "status"}
+        self.cash = 0.0
+        self.buying_power = 0.0
+        self.equity = 0.0
+        self.seeded = False
+        self.updates_applied = 0
+        self.last_reconciled = None
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._replay = None  # Updates received while a reconcile is in flight
+
+    def ensure_seeded(self):
+        if not self.seeded:
+            self.reconcile()
+
+    def position(self, symbol):
+        """Returns {"qty", "side", "avg_entry_price"} for ``symbol`` or None when flat."""
+        self.ensure_seeded()
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return None
+            return {
+                "qty": position["qty"],
+                "side": "long" if position["qty"] > 0 else "short",
+                "avg_entry_price": position["avg_entry_price"],
+            }
+
+    def orders_for(self, symbol):
+        """Returns the open orders for ``symbol`` (copies)."""
+        self.ensure_seeded()
+        with self._lock:
+            return [dict(order, id=order_id) for order_id, order in self.open_orders.items()
+                    if order["symbol"] == symbol]
+
+    def exposed_symbols(self):
+        """Returns the symbols with a position or a working order."""
+        self.ensure_seeded()
+        with self._lock:
+            return set(self.positions) | {order["symbol"] for order in self.open_orders.values()}
+
+    def get_cash(self):
+        self.ensure_seeded()
+        return self.cash
+
+    def record_order(self, order):
+        """Tracks an order right after submission, before its first trade update arrives."""
+        with self._lock:
+            self._upsert_order(order)
+
+    async def handle_trade_update(self, data):
+        """``Stream.subscribe_trade_updates`` handler."""
+        try:
+            self.apply_update(data)
+        except Exception as e:
+            print(f"Error applying trade update: {e}")
+
+    def apply_update(self, data):
+        """Applies one trade_updates event (new, fill, partial_fill, canceled, ...)."""
+        with self._lock:
+            self._apply(data)
+            if self._replay is not None:
+                self._replay.append(data)
+            self.updates_applied += 1
+
+    def _apply(self, data, replaying=False):
+        event = _field(data, 'event')
+        order = _field(data, 'order') or {}
+        self._upsert_order(order)
+
+        if event in ("fill", "partial_fill"):
+            symbol = _field(order, 'symbol')
+            side = 1 if _field(order, 'side') == "buy" else -1
+            fill_qty = _float(_field(data, 'qty'))
+            fill_price = _float(_field(data, 'price'))
+            position_qty = _field(data, 'position_qty')
+            if replaying and position_qty is None:
+                return  # The snapshot's position may already include this fill
+            position = self.positions.get(symbol, {"qty": 0.0, "avg_entry_price": 0.0})
+            old_qty = position["qty"]
+            # position_qty is the broker's position after this fill; fall back to our own arithmetic
+            new_qty = _float(position_qty) if position_qty is not None else old_qty + side * fill_qty
+            if new_qty == 0:
+                self.positions.pop(symbol, None)
+            else:
+                if old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+                    avg_price = fill_price
+                elif abs(new_qty) > abs(old_qty):
+                    avg_price = (abs(old_qty) * position["avg_entry_price"] + fill_qty * fill_price) / abs(new_qty)
+                else:
+                    avg_price = position["avg_entry_price"]
+                self.positions[symbol] = {"qty": new_qty, "avg_entry_price": avg_price}
+            if not replaying:
+                notional = fill_qty * fill_price
+                self.cash -= side * notional
+                # Opening or adding uses buying power, reducing releases it (reconcile corrects margin effects)
+                opening = side * old_qty >= 0
+                self.buying_power += -notional if opening else notional
+
+    def _upsert_order(self, order):
+        order_id = _field(order, 'id')
+        if order_id is None:
+            return
+        status = _field(order, 'status')
+        if status in OPEN_ORDER_STATUSES:
+            self.open_orders[order_id] = {
+                "symbol": _field(order, 'symbol'),
+                "side": _field(order, 'side'),
+                "qty": _float(_field(order, 'qty')),
+                "filled_qty": _float(_field(order, 'filled_qty')),
+                "status": status,
+            }
+        else:
+            self.open_orders.pop(order_id, None)
+        # Bracket legs arrive nested in the parent when listed over REST
+        for leg in _field(order, 'legs') or ():
+            self._upsert_order(leg)
+
+    def reconcile(self):
+        """Replaces the state with a fresh REST snapshot of account, positions and open orders."""
+        with self._reconcile_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                account = self.rest_api.get_account()
+                positions = self.rest_api.list_positions()
+                orders = self.rest_api.list_orders(status="open", nested=True)
+            except Exception as e:
+                print(f"Error reconciling account state: {e}")
+                with self._lock:
+                    self._replay = None
+                return False
+
+            with self._lock:
+                self.cash = _float(account.cash)
+                self.buying_power = _float(account.buying_power)
+                self.equity = _float(account.equity)
+                self.positions = {
+                    p.symbol: {"qty": _float(p.qty), "avg_entry_price": _float(p.avg_entry_price)}
+                    for p in positions
+                }
+                self.open_orders = {}
+                for order in orders:
+                    self._upsert_order(order)
+                for data in self._replay:
+                    self._apply(data, replaying=True)
+                self._replay = None
+                self.seeded = True
+                self.last_reconciled = time.time()
+            return True
+
+    async def reconcile_periodically(self, interval=RECONCILE_INTERVAL):
+        """Re-syncs from REST every ``interval`` seconds without blocking the event loop."""
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.reconcile)
@@ -1,36 +1,67 @@
-import os
-from dotenv import load_dotenv
+import time
 from alpaca_trade_api.rest import REST
-from execution.risk_management import RiskManager
+from execution.rest_client import LazyClient, credentials
+from data_streaming.messages import to_timestamp_ns
+from execution.account_state import AccountState
+from execution.risk_management import RiskManager, TAKE_PROFIT_PCT, STOP_LOSS_PCT
+from monitoring import metrics
 
-load_dotenv()
-
-ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
-ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 BASE_URL = "https://paper-api.alpaca.markets"  # Corrected URL
 
-rest_api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, BASE_URL)
-risk = RiskManager(rest_api)
+# Built on the first API call, with credentials from the environment / .env
+rest_api = LazyClient(lambda: REST(*credentials(), BASE_URL))
+account = AccountState(rest_api)  # Fed by trade_updates; see main.py
+risk = RiskManager(rest_api, account=account)
+
+RISK_CHECK_LATENCY = metrics.histogram("risk_check_seconds", "Time for the pre-trade risk check")
+ORDER_SUBMIT_LATENCY = metrics.histogram("order_submit_seconds", "Time for the bracket order REST submission")
+ORDERS = metrics.counter("orders_total", "Bracket orders accepted by the broker")
+ORDER_ERRORS = metrics.counter("errors_total", labels={"stage": "order"})
+
+def use_broker(api, max_open_trades=1):
+    """Points order placement, risk checks and account state at another REST-like client.
+
+    Used to run the execution path offline against execution.sim_broker.SimulatedBroker.
+    Returns the new AccountState (subscribe it to the broker's trade updates).
+    """
+    global rest_api, account, risk
+    rest_api = api
+    account = AccountState(api)
+    risk = RiskManager(api, max_open_trades=max_open_trades, account=account)
+    return account
+
+def latest_trade_price(symbol):
+    """REST fallback for LastPriceCache when the streamed price is stale: (price, trade time ns)."""
+    trade = rest_api.get_latest_trade(symbol)
+    return float(trade.price), to_timestamp_ns(trade.timestamp)
 
 class OrderManager:
-    def __init__(self, symbol):
+    def __init__(self, symbol, take_profit_pct=TAKE_PROFIT_PCT, stop_loss_pct=STOP_LOSS_PCT, prices=None):
         self.symbol = symbol
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+        self.prices = prices  # LastPriceCache fed by the stream; None always asks REST
 
     def place_bracket_order(self, signal):
         if signal not in ["buy", "sell"]:
             print("No actionable signal.")
             return None
 
-        if not risk.is_trade_allowed(signal, self.symbol):
+        with RISK_CHECK_LATENCY.time():
+            allowed = risk.is_trade_allowed(signal, self.symbol)
+        if not allowed:
             print("Trade blocked by risk manager.")
             return None
 
         try:
-            qty = risk.get_position_size(self.symbol)
-            price = float(rest_api.get_latest_trade(self.symbol).price)
+            price = self.prices.price(self.symbol) if self.prices is not None else latest_trade_price(self.symbol)[0]
+            if price is None:
+                print(f"[ERROR] No recent price for {self.symbol}")
+                return None
+            qty = risk.get_position_size(self.symbol, price)
 
-            take_profit_pct = 0.005  # 0.5% target
-            stop_loss_pct = 0.003    # 0.3% SL
+            take_profit_pct = self.take_profit_pct
+            stop_loss_pct = self.stop_loss_pct
 
             if signal == "buy":
                 take_profit_price = round(price * (1 + take_profit_pct), 2)
@@ -39,6 +70,7 @@ class OrderManager:
                 take_profit_price = round(price * (1 - take_profit_pct), 2)
                 stop_loss_price = round(price * (1 + stop_loss_pct), 2)
 
+            start = time.perf_counter_ns()
             order = rest_api.submit_order(
                 symbol=self.symbol,
                 qty=qty,
@@ -49,23 +81,19 @@ class OrderManager:
                 take_profit={"limit_price": take_profit_price},
                 stop_loss={"stop_price": stop_loss_price}
             )
+            ORDER_SUBMIT_LATENCY.observe_since(start)
+            ORDERS.inc()
+            account.record_order(order)
             print(f"[ORDER] Bracket {signal.upper()} order placed: {order.id}")
             return order
         except Exception as e:
+            ORDER_ERRORS.inc()
             print(f"[ERROR] Bracket order failed: {e}")
             return None
 
     def get_open_position(self):
         try:
-            positions = rest_api.list_positions()
-            for p in positions:
-                if p.symbol == self.symbol:
-                    return {
-                        "qty": float(p.qty),
-                        "side": "long" if float(p.qty) > 0 else "short",
-                        "avg_entry_price": float(p.avg_entry_price)
-                    }
-            return None
+            return account.position(self.symbol)
         except Exception as e:
             print(f"[ERROR] Fetching position failed: {e}")
             return None
@@ -1,24 +1,25 @@
+from execution.account_state import AccountState
+
 class PositionTracker:
-    def __init__(self, symbol, api):
+    """Position for one symbol, read from an AccountState kept current by trade_updates."""
+
+    def __init__(self, symbol, api, account=None):
         self.symbol = symbol
         self.api = api
+        self.account = account if account is not None else AccountState(api)
         self.current_position = None
         self.refresh_position()
 
     def refresh_position(self):
         try:
-            positions = self.api.list_positions()
-            found = False
-            for p in positions:
-                if p.symbol == self.symbol:
-                    self.current_position = {
-                        "qty": float(p.qty),
-                        "side": "long" if float(p.qty) > 0 else "short",
-                        "entry_price": float(p.avg_entry_price)
-                    }
-                    found = True
-                    break
-            if not found:
+            position = self.account.position(self.symbol)
+            if position is not None:
+                self.current_position = {
+                    "qty": position["qty"],
+                    "side": position["side"],
+                    "entry_price": position["avg_entry_price"]
+                }
+            else:
                 self.current_position = None
         except Exception as e:
             print(f"Error refreshing position: {e}")
@@ -30,4 +31,4 @@ class PositionTracker:
 
     def get_position_info(self):
         self.refresh_position()
-        return self.current_position
\ No newline at end of file
+        return self.current_position
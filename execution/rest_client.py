@@ -0,0 +1,51 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env():
+    """Loads the .env file into the environment once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        with _lock:
+            if not _env_loaded:
+                load_dotenv()
+                _env_loaded = True
+
+
+def credentials():
+    """Returns (ALPACA_API_KEY, ALPACA_SECRET_KEY), loading .env first."""
+    load_env()
+    return os.getenv("ALPACA_API_KEY"), os.getenv("ALPACA_SECRET_KEY")
+
+
+class LazyClient:
+    """Stands in for a client that is only built, by ``factory()``, on first use.
+
+    Attribute access is forwarded to the client, so modules can keep a
+    module-level ``rest_api`` without constructing it (or reading
+    credentials) at import time.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def __getattr__(self, name):
+        if name.startswith('_'):  # Not set up yet (e.g. during copy); never build the client for these
+            raise AttributeError(name)
+        return getattr(self.client, name)
@@ -1,38 +1,55 @@
+from execution.account_state import AccountState
+
+# Bracket exit levels used for every entry, as a fraction of the entry price
+TAKE_PROFIT_PCT = 0.005  # 0.5% target
+STOP_LOSS_PCT = 0.003    # 0.3% SL
+
 class RiskManager:
-    def __init__(self, rest_api, max_position_pct=0.05, max_open_trades=1):
+    """Pre-trade checks and sizing, read from an in-memory AccountState (no REST per order)."""
+
+    def __init__(self, rest_api, max_position_pct=0.05, max_open_trades=1, account=None):
         self.rest_api = rest_api
+        self.account = account if account is not None else AccountState(rest_api)
         self.max_position_pct = max_position_pct
         self.max_open_trades = max_open_trades
 
     def is_trade_allowed(self, signal, symbol):
         try:
-            positions = self.rest_api.list_positions()
-            if len(positions) >= self.max_open_trades:
+            self.account.ensure_seeded()
+            if not self.account.seeded:
+                print("[RISK] Account state unavailable.")
+                return False
+
+            # Symbols with a position or a working order both count as open trades
+            if len(self.account.exposed_symbols()) >= self.max_open_trades:
                 print("[RISK] Too many open positions.")
                 return False
 
-            for p in positions:
-                if p.symbol == symbol:
-                    current_side = "long" if float(p.qty) > 0 else "short"
-                    signal_side = "long" if signal == "buy" else "short"
-                    if current_side == signal_side:
-                        return False
+            position = self.account.position(symbol)
+            if position is None:
+                # No position yet but orders working: an entry is already pending
+                if self.account.orders_for(symbol):
+                    return False
+                return True
+
+            signal_side = "long" if signal == "buy" else "short"
+            if position["side"] == signal_side:
+                return False
 
             return True
         except Exception as e:
             print(f"[RISK ERROR] Failed risk check: {e}")
             return False
 
-    def get_position_size(self, symbol):
+    def get_position_size(self, symbol, price=None):
         try:
-            account = self.rest_api.get_account()
-            cash = float(account.cash)
+            cash = self.account.get_cash()
             if cash <= 0:
                 return 1  # Default to 1 share if no cash
             
             position_value = self.max_position_pct * cash
-            latest_price = float(self.rest_api.get_latest_trade(symbol).price)
+            latest_price = price if price is not None else float(self.rest_api.get_latest_trade(symbol).price)
             return max(1, int(position_value // latest_price))
         except Exception as e:
             print(f"[RISK ERROR] Position sizing failed: {e}")
-            return 1
\ No newline at end of file
+            return 1
@@ -0,0 +1,411 @@
+import time
+import uuid
+import threading
+import pandas as pd
+from alpaca_trade_api.rest import APIError
+from alpaca_trade_api.entity import Order, Position, Account, Clock
+from alpaca_trade_api.entity_v2 import TradeV2
+
+# Order statuses still working at the (simulated) broker
+WORKING_STATUSES = ("new", "accepted", "held")
+
+
+def _iso(timestamp_ns):
+    return pd.Timestamp(timestamp_ns, unit="ns", tz="UTC").isoformat()
+
+
+def _reject(message, code=40310000):
+    return APIError({"code": code, "message": message})
+
+
+class SimulatedBroker:
+    """In-process stand-in for the Alpaca REST client used by execution/.
+
+    Implements ``submit_order`` (market orders, optionally ``order_class=
+    "bracket"`` with take-profit limit and stop-loss legs), ``list_positions``,
+    ``list_orders``, ``get_order``, ``cancel_order``, ``get_account``,
+    ``get_latest_trade``, ``close_position`` and ``get_clock``, returning the
+    same entity types as ``alpaca_trade_api.rest.REST``.
+
+    Prices come from a feed: ``on_trade`` for prints, or ``on_bar`` which
+    replays a bar as open, low/high (in the bar's direction) and close
+    prints. A market order becomes fillable ``latency`` seconds after
+    submission (feed time) and fills at the next print, adjusted by the
+    slippage model; with zero latency and a known price it fills at once.
+    Take-profit legs fill at their limit once touched, stop legs at the
+    triggering print plus slippage, and either fill cancels the other.
+
+    ``latency`` is seconds or a callable returning seconds; ``slippage_bps``
+    is adverse basis points or a callable ``(side, price, qty) -> fill
+    price``. ``rest_latency_s`` sleeps in every call to emulate a network
+    round trip. Order/fill events are delivered to ``subscribe_trade_updates``
+    callbacks in the trade_updates message shape (AccountState.apply_update
+    accepts them directly).
+    """
+
+    def __init__(self, cash=100_000.0, latency=0.0, slippage_bps=0.0, rest_latency_s=0.0,
+                 buying_power_multiplier=1.0):
+        self.cash = float(cash)
+        self.latency = latency
+        self.slippage_bps = slippage_bps
+        self.rest_latency_s = rest_latency_s
+        self.buying_power_multiplier = buying_power_multiplier
+        self.now_ns = None  # Feed time of the latest print
+        self.orders_submitted = 0
+        self.orders_rejected = 0
+        self.fills = 0
+        self._orders = {}     # id -> raw order dict (legs nested under the parent)
+        self._working = {}    # symbol -> [raw order] that can still fill
+        self._positions = {}  # symbol -> [signed qty, avg entry price]
+        self._prices = {}     # symbol -> (price, timestamp ns)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe_trade_updates(self, callback):
+        """Registers ``callback(data)`` for new/fill/canceled events."""
+        self._listeners.append(callback)
+
+    def _now(self):
+        return self.now_ns if self.now_ns is not None else time.time_ns()
+
+    def _rest_call(self):
+        if self.rest_latency_s:
+            time.sleep(self.rest_latency_s)
+
+    def _latency_ns(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        return int(latency * 1e9)
+
+    def _fill_price(self, side, price, qty):
+        if callable(self.slippage_bps):
+            return self.slippage_bps(side, price, qty)
+        adverse = self.slippage_bps / 1e4
+        return price * (1 + adverse) if side == "buy" else price * (1 - adverse)
+
+    def _emit(self, events):
+        for data in events:
+            for callback in self._listeners:
+                try:
+                    callback(data)
+                except Exception as e:
+                    print(f"Error in simulated trade update callback: {e}")
+
+    def on_trade(self, symbol, price, timestamp_ns=None):
+        """Feeds one print; fills every order it triggers."""
+        with self._lock:
+            events = self._on_price(symbol, float(price), self._now() if timestamp_ns is None else timestamp_ns)
+        self._emit(events)
+
+    def on_bar(self, symbol, timestamp_ns, open_, high, low, close, interval_ns=60 * 10**9):
+        """Feeds a bar as four prints: open, then low/high in the bar's direction, then close."""
+        path = (low, high) if close >= open_ else (high, low)
+        step = interval_ns // 4
+        events = []
+        with self._lock:
+            for i, price in enumerate((open_, path[0], path[1], close)):
+                events.extend(self._on_price(symbol, float(price), timestamp_ns + i * step))
+        self._emit(events)
+
+    def _on_price(self, symbol, price, timestamp_ns):
+        self._prices[symbol] = (price, timestamp_ns)
+        if self.now_ns is None or timestamp_ns > self.now_ns:
+            self.now_ns = timestamp_ns
+        working = self._working.get(symbol)
+        if not working:
+            return []
+        events = []
+        for order in list(working):
+            if order["status"] not in WORKING_STATUSES or order["status"] == "held":
+                continue
+            fill_price = self._match(order, price, timestamp_ns)
+            if fill_price is not None:
+                events.extend(self._fill(order, fill_price, timestamp_ns))
+        return events
+
+    def _match(self, order, price, timestamp_ns):
+        """Returns the fill price if ``price`` at ``timestamp_ns`` fills ``order``, else None."""
+        side, qty = order["side"], float(order["qty"])
+        if order["type"] == "market":
+            if timestamp_ns >= order["_eligible_ns"]:
+                return self._fill_price(side, price, qty)
+        elif order["type"] == "limit":
+            limit = float(order["limit_price"])
+            if (side == "buy" and price <= limit) or (side == "sell" and price >= limit):
+                return limit
+        elif order["type"] == "stop":
+            stop = float(order["stop_price"])
+            if (side == "buy" and price >= stop) or (side == "sell" and price <= stop):
+                return self._fill_price(side, price, qty)
+        return None
+
+    def _fill(self, order, price, timestamp_ns):
+        symbol, qty = order["symbol"], float(order["qty"])
+        sign = 1 if order["side"] == "buy" else -1
+        position = self._positions.get(symbol, [0.0, 0.0])
+        old_qty = position[0]
+        new_qty = old_qty + sign * qty
+        if new_qty == 0:
+            self._positions.pop(symbol, None)
+        else:
+            if old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+                avg_price = price
+            elif abs(new_qty) > abs(old_qty):
+                avg_price = (abs(old_qty) * position[1] + qty * price) / abs(new_qty)
+            else:
+                avg_price = position[1]
+            self._positions[symbol] = [new_qty, avg_price]
+        self.cash -= sign * qty * price
+        self.fills += 1
+
+        order.update(status="filled", filled_qty=order["qty"], filled_avg_price=str(price),
+                     filled_at=_iso(timestamp_ns), updated_at=_iso(timestamp_ns))
+        self._working[symbol].remove(order)
+        events = [{
+            "event": "fill", "price": str(price), "qty": order["qty"], "position_qty": str(new_qty),
+            "timestamp": _iso(timestamp_ns), "order": self._public(order),
+        }]
+
+        # A filled entry releases its legs; a filled leg cancels its sibling
+        for leg in order.get("legs") or ():
+            leg["status"] = "new"
+            events.append({"event": "new", "order": self._public(leg)})
+        parent = self._orders.get(order.get("_parent"))
+        if parent is not None:
+            for leg in parent["legs"]:
+                if leg is not order and leg["status"] in WORKING_STATUSES:
+                    events.append(self._cancel(leg, timestamp_ns))
+        return events
+
+    def _cancel(self, order, timestamp_ns):
+        order.update(status="canceled", canceled_at=_iso(timestamp_ns), updated_at=_iso(timestamp_ns))
+        working = self._working.get(order["symbol"])
+        if working and order in working:
+            working.remove(order)
+        return {"event": "canceled", "timestamp": _iso(timestamp_ns), "order": self._public(order)}
+
+    @staticmethod
+    def _public(order):
+        """Copy of a raw order without simulator bookkeeping (keys starting with '_')."""
+        raw = {key: value for key, value in order.items() if not key.startswith("_")}
+        if order.get("legs"):
+            raw["legs"] = [SimulatedBroker._public(leg) for leg in order["legs"]]
+        return raw
+
+    def submit_order(self, symbol, qty, side, type="market", time_in_force="day", limit_price=None,
+                     stop_price=None, client_order_id=None, order_class=None, take_profit=None,
+                     stop_loss=None, **kwargs):
+        self._rest_call()
+        with self._lock:
+            self.orders_submitted += 1
+            try:
+                order, events = self._submit(symbol, qty, side, type, time_in_force, limit_price, stop_price,
+                                             client_order_id, order_class, take_profit, stop_loss)
+            except APIError:
+                self.orders_rejected += 1
+                raise
+        self._emit(events)
+        return Order(self._public(order))
+
+    def _submit(self, symbol, qty, side, type, time_in_force, limit_price, stop_price, client_order_id,
+                order_class, take_profit, stop_loss):
+        qty = float(qty)
+        if side not in ("buy", "sell"):
+            raise _reject(f"invalid side: {side}", 42210000)
+        if qty <= 0:
+            raise _reject("qty must be > 0", 42210000)
+        if type not in ("market", "limit", "stop"):
+            raise _reject(f"order type {type} is not supported by the simulator", 42210000)
+
+        now = self._now()
+        last = self._prices.get(symbol)
+        position_qty = self._positions.get(symbol, [0.0])[0]
+        sign = 1 if side == "buy" else -1
+        opening = sign * position_qty >= 0
+        if opening and last is not None and qty * last[0] > self._buying_power():
+            raise _reject("insufficient buying power")
+
+        order = self._new_order(symbol, qty, side, type, time_in_force, client_order_id, order_class or "simple", now)
+        order["limit_price"] = None if limit_price is None else str(limit_price)
+        order["stop_price"] = None if stop_price is None else str(stop_price)
+        order["_eligible_ns"] = now + self._latency_ns()
+        order["legs"] = None
+
+        if order_class == "bracket":
+            if not take_profit or not stop_loss:
+                raise _reject("bracket orders require take_profit and stop_loss", 42210000)
+            exit_side = "sell" if side == "buy" else "buy"
+            target = float(take_profit["limit_price"])
+            stop = float(stop_loss["stop_price"])
+            if (side == "buy" and not stop < target) or (side == "sell" and not target < stop):
+                raise _reject("take_profit and stop_loss are on the wrong side", 42210000)
+            legs = []
+            for leg_type, key, price in (("limit", "limit_price", target), ("stop", "stop_price", stop)):
+                leg = self._new_order(symbol, qty, exit_side, leg_type, "gtc", None, "bracket", now)
+                leg.update(limit_price=None, stop_price=None, status="held", legs=None, _parent=order["id"])
+                leg[key] = str(price)
+                legs.append(leg)
+                self._orders[leg["id"]] = leg
+            order["legs"] = legs
+
+        self._orders[order["id"]] = order
+        working = self._working.setdefault(symbol, [])
+        working.append(order)
+        if order["legs"]:
+            working.extend(order["legs"])
+
+        events = [{"event": "new", "timestamp": _iso(now), "order": self._public(order)}]
+        # With no latency the order can fill against the current price right away
+        if last is not None and order["_eligible_ns"] <= now:
+            fill_price = self._match(order, last[0], now)
+            if fill_price is not None:
+                events.extend(self._fill(order, fill_price, now))
+        return order, events
+
+    @staticmethod
+    def _new_order(symbol, qty, side, type, time_in_force, client_order_id, order_class, now):
+        created = _iso(now)
+        return {
+            "id": str(uuid.uuid4()),
+            "client_order_id": client_order_id or str(uuid.uuid4()),
+            "symbol": symbol,
+            "asset_class": "us_equity",
+            "qty": str(qty),
+            "filled_qty": "0",
+            "filled_avg_price": None,
+            "side": side,
+            "type": type,
+            "order_type": type,
+            "time_in_force": time_in_force,
+            "order_class": order_class,
+            "status": "accepted",
+            "created_at": created,
+            "submitted_at": created,
+            "updated_at": created,
+            "filled_at": None,
+            "canceled_at": None,
+        }
+
+    def get_order(self, order_id):
+        self._rest_call()
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                raise _reject("order not found", 40410000)
+            return Order(self._public(order))
+
+    def list_orders(self, status="open", limit=None, nested=None, symbols=None, **kwargs):
+        self._rest_call()
+        with self._lock:
+            orders = []
+            for order in self._orders.values():
+                if nested and order.get("_parent"):
+                    continue  # Listed inside the parent
+                is_open = order["status"] in WORKING_STATUSES
+                if nested and order.get("legs"):
+                    # A filled entry is still listed while its exit legs work
+                    is_open = is_open or any(leg["status"] in WORKING_STATUSES for leg in order["legs"])
+                if (status == "open" and not is_open) or (status == "closed" and is_open):
+                    continue
+                if symbols and order["symbol"] not in symbols:
+                    continue
+                raw = self._public(order)
+                if not nested:
+                    raw.pop("legs", None)
+                orders.append(Order(raw))
+            orders.reverse()  # Newest first, like the API
+            return orders[:limit] if limit else orders
+
+    def cancel_order(self, order_id):
+        self._rest_call()
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order["status"] not in WORKING_STATUSES:
+                raise _reject("order is not cancelable", 42210000)
+            now = self._now()
+            events = [self._cancel(order, now)]
+            for leg in order.get("legs") or ():
+                if leg["status"] in WORKING_STATUSES:
+                    events.append(self._cancel(leg, now))
+        self._emit(events)
+
+    def _market_value(self, symbol, qty):
+        price = self._prices.get(symbol, (None,))[0]
+        return qty * (price if price is not None else self._positions[symbol][1])
+
+    def _buying_power(self):
+        equity = self.cash + sum(self._market_value(s, p[0]) for s, p in self._positions.items())
+        gross = sum(abs(self._market_value(s, p[0])) for s, p in self._positions.items())
+        return max(0.0, equity * self.buying_power_multiplier - gross)
+
+    def get_account(self):
+        self._rest_call()
+        with self._lock:
+            long_value = sum(self._market_value(s, p[0]) for s, p in self._positions.items() if p[0] > 0)
+            short_value = sum(self._market_value(s, p[0]) for s, p in self._positions.items() if p[0] < 0)
+            equity = self.cash + long_value + short_value
+            return Account({
+                "id": "simulated",
+                "status": "ACTIVE",
+                "currency": "USD",
+                "cash": str(self.cash),
+                "buying_power": str(self._buying_power()),
+                "equity": str(equity),
+                "portfolio_value": str(equity),
+                "long_market_value": str(long_value),
+                "short_market_value": str(short_value),
+            })
+
+    def _position_entity(self, symbol):
+        qty, avg_price = self._positions[symbol]
+        price = self._prices.get(symbol, (avg_price,))[0]
+        return Position({
+            "symbol": symbol,
+            "asset_class": "us_equity",
+            "qty": str(qty),
+            "side": "long" if qty > 0 else "short",
+            "avg_entry_price": str(avg_price),
+            "current_price": str(price),
+            "market_value": str(qty * price),
+            "cost_basis": str(qty * avg_price),
+            "unrealized_pl": str(qty * (price - avg_price)),
+        })
+
+    def list_positions(self):
+        self._rest_call()
+        with self._lock:
+            return [self._position_entity(symbol) for symbol in self._positions]
+
+    def get_position(self, symbol):
+        self._rest_call()
+        with self._lock:
+            if symbol not in self._positions:
+                raise _reject("position does not exist", 40410000)
+            return self._position_entity(symbol)
+
+    def close_position(self, symbol, **kwargs):
+        """Cancels the symbol's working orders and flattens it with a market order."""
+        self._rest_call()
+        with self._lock:
+            if symbol not in self._positions:
+                raise _reject("position does not exist", 40410000)
+            now = self._now()
+            events = [self._cancel(order, now) for order in list(self._working.get(symbol, ()))]
+            qty = self._positions[symbol][0]
+            order, submit_events = self._submit(symbol, abs(qty), "sell" if qty > 0 else "buy", "market", "day",
+                                                None, None, None, None, None, None)
+            events.extend(submit_events)
+        self._emit(events)
+        return Order(self._public(order))
+
+    def get_latest_trade(self, symbol):
+        self._rest_call()
+        with self._lock:
+            last = self._prices.get(symbol)
+        if last is None:
+            raise _reject(f"no trades for {symbol}", 40410000)
+        return TradeV2({"p": last[0], "s": 100, "t": _iso(last[1])})
+
+    def get_clock(self):
+        self._rest_call()
+        now = _iso(self._now())
+        return Clock({"timestamp": now, "is_open": True, "next_open": now, "next_close": now})
@@ -0,0 +1,22 @@
+from .ema import StreamingEMA
+from .rsi import StreamingRSI
+from .bollinger_bands import StreamingBollinger
+from .vwap import StreamingVWAP, StreamingOrderFlow
+from .engine import IndicatorEngine, INDICATOR_COLUMNS, feature_union
+from .graph import QUOTE_INPUTS
+from .normalizer import OnlineNormalizer, NORMALIZER_FILE
+
+# Export indicators
+__all__ = [
+    "StreamingEMA",
+    "StreamingRSI",
+    "StreamingBollinger",
+    "StreamingVWAP",
+    "StreamingOrderFlow",
+    "IndicatorEngine",
+    "INDICATOR_COLUMNS",
+    "feature_union",
+    "QUOTE_INPUTS",
+    "OnlineNormalizer",
+    "NORMALIZER_FILE",
+]
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+from . import kernels
+
+
+class StreamingBollinger:
+    """Rolling-window Bollinger Bands with O(1) add/remove updates.
+
+    Keeps the window in a fixed ring plus a running mean and sum of squared
+    deviations (Welford), so each close costs the same regardless of history.
+    The moments are recomputed exactly once per window lap, which keeps the
+    amortised cost O(1) and stops rounding drift.
+    Matches ``rolling(window).mean() +/- k * rolling(window).std()`` (ddof=1).
+    """
+
+    __slots__ = ("window", "num_std", "_ring", "_pos", "_count", "_mean", "_m2", "upper", "lower")
+
+    def __init__(self, window=20, num_std=2.0):
+        self.window = window
+        self.num_std = num_std
+        self._ring = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.upper = math.nan
+        self.lower = math.nan
+
+    def _resync(self):
+        # Recompute the running moments exactly once per lap so rounding
+        # error from the incremental updates never accumulates
+        values = self._ring[:self._count]
+        mean = math.fsum(values) / self._count
+        self._mean = mean
+        self._m2 = math.fsum((x - mean) ** 2 for x in values)
+
+    def update(self, close):
+        if self._count == self.window:
+            old = self._ring[self._pos]
+            # Replace the oldest value in a single step
+            delta_old = old - self._mean
+            self._mean += (close - old) / self.window
+            self._m2 += (close - old) * (close - self._mean + delta_old)
+        else:
+            self._count += 1
+            delta = close - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (close - self._mean)
+        self._ring[self._pos] = close
+        self._pos += 1
+        if self._pos == self.window:
+            self._pos = 0
+            if self._count == self.window:
+                self._resync()
+
+        if self._count < self.window:
+            return self.upper, self.lower
+
+        std = math.sqrt(self._m2 / (self.window - 1)) if self._m2 > 0 else 0.0
+        self.upper = self._mean + self.num_std * std
+        self.lower = self._mean - self.num_std * std
+        return self.upper, self.lower
+
+    def batch(self, closes):
+        """Vectorised update over many closes; returns (upper, lower) arrays."""
+        closes = np.asarray(closes, dtype=np.float64)
+        if not len(closes):
+            return closes, closes
+        # Prepend the values still inside the window so the first outputs are correct
+        if self._count == self.window:
+            held = self._ring[self._pos:] + self._ring[:self._pos]
+        else:
+            held = self._ring[:self._count]
+        series = np.concatenate((held, closes))
+        mean, std = kernels.rolling_mean_std(series, self.window)
+        upper = mean[len(held):] + self.num_std * std[len(held):]
+        lower = mean[len(held):] - self.num_std * std[len(held):]
+
+        tail = series[-self.window:].tolist()
+        self._count = len(tail)
+        self._ring = tail + [0.0] * (self.window - self._count)
+        self._pos = self._count % self.window
+        self._resync()
+        self.upper = float(upper[-1])
+        self.lower = float(lower[-1])
+        return upper, lower
@@ -0,0 +1,42 @@
+import math
+import numpy as np
+from . import kernels
+
+
+class StreamingEMA:
+    """Exponential moving average updated one value at a time.
+
+    Mirrors ``Series.ewm(span=..., adjust=False).mean()``: the first value
+    seeds the average and every later value is blended in with weight alpha.
+    """
+
+    __slots__ = ("alpha", "_old_wt", "_denom", "value")
+
+    def __init__(self, span=None, com=None):
+        if span is not None:
+            self.alpha = 2.0 / (span + 1.0)
+        elif com is not None:
+            self.alpha = 1.0 / (1.0 + com)
+        else:
+            raise ValueError("Either span or com must be given")
+        self._old_wt = 1.0 - self.alpha
+        # pandas normalises by (old_wt + new_wt), which is not always exactly 1.0
+        self._denom = self._old_wt + self.alpha
+        self.value = None
+
+    def update(self, x):
+        value = self.value
+        if value is None:
+            self.value = x
+        elif value != x:
+            self.value = (self._old_wt * value + self.alpha * x) / self._denom
+        return self.value
+
+    def batch(self, values):
+        """Vectorised update over many values; returns the EMA after each one."""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return values
+        result = kernels.ewm_mean(values, self.alpha, math.nan if self.value is None else self.value)
+        self.value = float(result[-1])
+        return result
@@ -0,0 +1,123 @@
+import numpy as np
+from operator import itemgetter
+from .graph import BAR_INPUTS, resolve
+
+# Indicator columns produced for every bar by default, in output order
+INDICATOR_COLUMNS = (
+    "ema_9",
+    "ema_21",
+    "rsi",
+    "macd",
+    "macd_signal",
+    "bollinger_h",
+    "bollinger_l",
+)
+
+
+def feature_union(*feature_sets):
+    """Merges feature declarations in order; None (undeclared) means INDICATOR_COLUMNS."""
+    merged = []
+    for features in feature_sets:
+        for name in INDICATOR_COLUMNS if features is None else features:
+            if name not in merged:
+                merged.append(name)
+    return tuple(merged)
+
+
+class IndicatorEngine:
+    """Running state for the requested indicators; each bar is a constant-time update.
+
+    ``features`` names the columns to produce (default INDICATOR_COLUMNS).
+    Only the graph nodes they depend on are built, and intermediate results
+    such as the EMAs behind the MACD line are computed once and shared.
+    Produces the same values as recomputing the indicators over the full bar
+    history, without keeping or re-reading that history.
+    """
+
+    def __init__(self, features=None):
+        features = feature_union(features)
+        self.columns = tuple(name for name in features if name not in BAR_INPUTS)
+        self.nodes = resolve(self.columns)
+        # Bar columns read by at least one node
+        self.inputs = tuple(name for name in BAR_INPUTS if any(name in node.inputs for node in self.nodes))
+        self._calculators = [node.factory() for node in self.nodes]
+        # Per-bar values live in a flat list; every bar input and node output has a fixed slot
+        slots = {name: i for i, name in enumerate(self.inputs)}
+        for node in self.nodes:
+            for name in node.outputs:
+                slots[name] = len(slots)
+        self._values = [0.0] * len(slots)
+        self._slots = slots
+        self._bind()
+        self._input_slots = tuple(enumerate(self.inputs))
+        column_slots = [slots[name] for name in self.columns]
+        if len(column_slots) > 1:
+            self._column_values = itemgetter(*column_slots)
+        else:
+            self._column_values = lambda values: tuple(values[slot] for slot in column_slots)
+        self.bars_seen = 0
+
+    def _bind(self):
+        slots = self._slots
+        # (update, input slot, multi-input getter, output slot, multi-output slots); the single-slot
+        # fields are None when a node has several, which keeps the common one-in/one-out step cheap
+        self._steps = []
+        for calculator, node in zip(self._calculators, self.nodes):
+            inputs = [slots[name] for name in node.inputs]
+            outputs = tuple(slots[name] for name in node.outputs)
+            self._steps.append((
+                calculator.update,
+                inputs[0] if len(inputs) == 1 else None,
+                itemgetter(*inputs) if len(inputs) > 1 else None,
+                outputs[0] if len(outputs) == 1 else None,
+                outputs,
+            ))
+
+    def state(self):
+        """Restorable state: the columns and every node's calculator (picklable)."""
+        return {"columns": self.columns, "calculators": list(self._calculators), "bars_seen": self.bars_seen}
+
+    def restore(self, state):
+        """Continues from calculators saved by ``state``; the columns must match."""
+        if tuple(state["columns"]) != self.columns:
+            raise ValueError(f"Indicator columns {list(state['columns'])} do not match {list(self.columns)}")
+        self._calculators = list(state["calculators"])
+        self._bind()
+        self.bars_seen = state["bars_seen"]
+
+    def update(self, bar):
+        """Feeds one bar (a mapping with at least ``inputs``) and returns the values in ``columns`` order."""
+        self.bars_seen += 1
+        values = self._values
+        for slot, name in self._input_slots:
+            values[slot] = bar[name]
+        for update, input_slot, input_getter, output_slot, output_slots in self._steps:
+            if input_slot is not None:
+                result = update(values[input_slot])
+            else:
+                result = update(*input_getter(values))
+            if output_slot is not None:
+                values[output_slot] = result
+            else:
+                for slot, value in zip(output_slots, result):
+                    values[slot] = value
+        return self._column_values(values)
+
+    def batch(self, bars):
+        """Feeds many bars at once (e.g. history warm-up).
+
+        ``bars`` maps bar columns to equal-length arrays (a DataFrame works).
+        Returns a dict of indicator arrays and leaves the running state exactly
+        where per-bar updates over the same bars would have left it.
+        """
+        values = {name: np.asarray(bars[name], dtype=np.float64) for name in self.inputs}
+        if values:
+            self.bars_seen += len(next(iter(values.values())))
+        for calculator, node in zip(self._calculators, self.nodes):
+            result = calculator.batch(*[values[name] for name in node.inputs])
+            outputs = node.outputs
+            if len(outputs) == 1:
+                values[outputs[0]] = result
+            else:
+                values.update(zip(outputs, result))
+        return {name: values[name] for name in self.columns}
@@ -0,0 +1,98 @@
+import re
+from .ema import StreamingEMA
+from .rsi import StreamingRSI
+from .bollinger_bands import StreamingBollinger
+from .vwap import StreamingVWAP, StreamingOrderFlow
+
+# Per-bar trade-side volumes and top of book, present when quotes are streamed
+QUOTE_INPUTS = ("buy_volume", "sell_volume", "spread", "microprice", "quote_imbalance")
+
+# Bar columns the graph reads directly; they are never computed
+BAR_INPUTS = ("open", "high", "low", "close", "volume", "vwap", "trade_count") + QUOTE_INPUTS
+
+# Any ``ema_<span>`` column is an EMA of the close with that span
+EMA_PATTERN = re.compile(r"^ema_(\d+)$")
+
+
+class Difference:
+    """Node computing ``a - b`` (e.g. the MACD line from its two EMAs)."""
+
+    __slots__ = ()
+
+    def update(self, a, b):
+        return a - b
+
+    def batch(self, a, b):
+        return a - b
+
+
+class FeatureNode:
+    """One step of the indicator graph.
+
+    ``factory`` builds a fresh calculator with ``update(*inputs)`` and
+    ``batch(*input_arrays)``; it receives the values of ``inputs`` (bar
+    columns or other nodes' outputs) and returns one value per name in
+    ``outputs`` (a tuple when there is more than one).
+    """
+
+    __slots__ = ("name", "inputs", "outputs", "factory")
+
+    def __init__(self, name, inputs, factory, outputs=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.factory = factory
+        self.outputs = tuple(outputs) if outputs is not None else (name,)
+
+
+# Every named feature; ema_<span> nodes are created on demand
+NODES = {
+    node.name: node for node in (
+        FeatureNode("rsi", ("close",), lambda: StreamingRSI(period=14)),
+        FeatureNode("macd", ("ema_12", "ema_26"), Difference),
+        FeatureNode("macd_signal", ("macd",), lambda: StreamingEMA(span=9)),
+        FeatureNode("bollinger", ("close",), lambda: StreamingBollinger(window=20, num_std=2.0),
+                    outputs=("bollinger_h", "bollinger_l")),
+        FeatureNode("vwap_14", ("high", "low", "close", "volume"), lambda: StreamingVWAP(window=14)),
+        FeatureNode("order_flow", ("close", "volume"), StreamingOrderFlow),
+    )
+}
+
+# Output column -> node producing it (for multi-output nodes)
+_PRODUCERS = {output: node for node in NODES.values() for output in node.outputs}
+
+
+def feature_node(name):
+    """Returns the node that produces column ``name``; raises KeyError for unknown features."""
+    node = _PRODUCERS.get(name)
+    if node is not None:
+        return node
+    match = EMA_PATTERN.match(name)
+    if match:
+        span = int(match.group(1))
+        return FeatureNode(name, ("close",), lambda: StreamingEMA(span=span))
+    raise KeyError(f"Unknown feature: {name}")
+
+
+def resolve(features):
+    """Returns the nodes needed for ``features`` in dependency order, each one once.
+
+    Bar columns in ``features`` need no node and are skipped.
+    """
+    order, seen = [], set()
+
+    def visit(name, path):
+        if name in BAR_INPUTS:
+            return
+        node = feature_node(name)
+        if node.name in seen:
+            return
+        if node.name in path:
+            raise ValueError(f"Feature cycle: {' -> '.join(path + (node.name,))}")
+        for dependency in node.inputs:
+            visit(dependency, path + (node.name,))
+        seen.add(node.name)
+        order.append(node)
+
+    for name in features:
+        visit(name, ())
+    return order
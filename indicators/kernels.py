@@ -0,0 +1,155 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# Optional JIT: numba compiles the recursive kernels when installed (INDICATOR_JIT=0 turns it off).
+# Without it the recursions run in pandas' compiled ewm, which uses the same arithmetic.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+JIT = njit is not None and os.getenv("INDICATOR_JIT", "1") != "0"
+
+
+def _ewm_loop(values, alpha, initial):
+    """``Series.ewm(alpha=alpha, adjust=False).mean()`` continued from ``initial`` (NaN: no state yet)."""
+    out = np.empty(len(values))
+    old_wt_factor = 1.0 - alpha
+    new_wt = alpha
+    weighted = initial
+    old_wt = 1.0
+    for i in range(len(values)):
+        cur = values[i]
+        is_observation = cur == cur
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted
+    return out
+
+
+if JIT:
+    _ewm_loop = njit(cache=True)(_ewm_loop)
+
+
+def ewm_mean(values, alpha, initial=math.nan):
+    """Exponentially weighted mean with pandas ``adjust=False`` semantics.
+
+    ``initial`` continues a previous run (its last output); NaN starts from
+    the first value. Returns a new float64 array.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values.copy()
+    if JIT:
+        return _ewm_loop(values, alpha, float(initial))
+    if math.isnan(initial):
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    # Seeding the series with the previous output continues the recursion exactly
+    seeded = np.concatenate(([initial], values))
+    return pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def span_alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def ema(values, span, initial=math.nan):
+    """EMA with ``alpha = 2 / (span + 1)``; the first value seeds it (no warm-up NaNs)."""
+    return ewm_mean(values, span_alpha(span), initial)
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """RSI from average gain/loss; 100 when there are only gains, NaN when there is no movement."""
+    avg_gain = np.asarray(avg_gain, dtype=np.float64)
+    avg_loss = np.asarray(avg_loss, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def rsi(closes, period=14, prev_close=math.nan, avg_gain=math.nan, avg_loss=math.nan):
+    """Wilder RSI (averages with ``alpha = 1 / period``); returns (rsi, avg_gain, avg_loss) arrays.
+
+    The first close has zero gain and loss unless ``prev_close`` is given;
+    ``avg_gain``/``avg_loss`` continue previous averages.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    delta = np.diff(closes, prepend=prev_close)
+    delta[np.isnan(delta)] = 0.0
+    alpha = 1.0 / period
+    gains = ewm_mean(np.where(delta > 0, delta, 0.0), alpha, avg_gain)
+    losses = ewm_mean(np.where(delta < 0, -delta, 0.0), alpha, avg_loss)
+    return rsi_from_averages(gains, losses), gains, losses
+
+
+def macd(closes, fast=12, slow=26, signal=9):
+    """MACD line (fast EMA - slow EMA) and its signal EMA; returns (macd, signal)."""
+    line = ema(closes, fast) - ema(closes, slow)
+    return line, ema(line, signal)
+
+
+def _window_sum(values, window):
+    """Sum of each full window, accumulated one offset at a time (no (n, window) temporaries)."""
+    total = values[:len(values) - window + 1].copy()
+    for offset in range(1, window):
+        total += values[offset:len(values) - window + 1 + offset]
+    return total
+
+
+def rolling_mean_std(values, window, ddof=1):
+    """Rolling mean and standard deviation over full windows (NaN before the first).
+
+    Every window is reduced on its own (two-pass), so there is no running-sum drift.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    n = len(values) - window + 1
+    if n > 0:
+        window_mean = _window_sum(values, window) / window
+        squares = np.zeros(n)
+        deviation = np.empty(n)
+        for offset in range(window):
+            np.subtract(values[offset:offset + n], window_mean, out=deviation)
+            np.multiply(deviation, deviation, out=deviation)
+            squares += deviation
+        mean[window - 1:] = window_mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std[window - 1:] = np.sqrt(squares / (window - ddof))
+    return mean, std
+
+
+def bollinger(closes, window=20, num_std=2.0):
+    """Bollinger Bands (sample std, ddof=1); returns (upper, lower)."""
+    mean, std = rolling_mean_std(closes, window)
+    return mean + num_std * std, mean - num_std * std
+
+
+def rolling_sum(values, window):
+    """Sum over full windows (NaN before the first)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = _window_sum(values, window)
+    return out
+
+
+def rolling_vwap(high, low, close, volume, window=14):
+    """Volume-weighted typical price ((h + l + c) / 3) over the last ``window`` bars."""
+    typical = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64)
+               + np.asarray(close, dtype=np.float64)) / 3.0
+    volume = np.asarray(volume, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return rolling_sum(typical * volume, window) / rolling_sum(volume, window)
+
+
+def order_flow(close, volume, prev_close=math.nan):
+    """Signed volume: volume times the sign of the close change (NaN on the first bar unless ``prev_close``)."""
+    close = np.asarray(close, dtype=np.float64)
+    return np.asarray(volume, dtype=np.float64) * np.sign(np.diff(close, prepend=prev_close))
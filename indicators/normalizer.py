@@ -0,0 +1,216 @@
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+
+# Observations needed before z-scores are reported (earlier rows get 0.0)
+MIN_PERIODS = 20
+
+# File name of a saved state, kept next to the normalized features in the bar store
+NORMALIZER_FILE = "_normalizer.json"
+
+# Rows per vectorised Welford block; each block is shifted by its first row to keep the sums well conditioned
+BATCH_BLOCK = 1024
+
+
+class OnlineNormalizer:
+    """Causal z-score of several columns with O(1) updates per row.
+
+    Each row is scaled with statistics of that row and everything before it,
+    never later rows, so offline features carry no look-ahead and live bars
+    get exactly the same transform. Without ``halflife`` the mean and
+    variance are expanding (Welford, ddof=1); with it they are exponentially
+    weighted (``alpha = 1 - exp(-ln 2 / halflife)``).
+
+    Rows containing NaN leave the statistics untouched and map to NaN.
+    Until ``min_periods`` rows have been seen, and for zero-variance
+    columns, the output is 0.0. ``batch`` leaves the state where per-row
+    ``update`` calls would have (to rounding). The state is saved and
+    reloaded as JSON, so a live process continues from the statistics the
+    offline pipeline ended with; ``last_timestamp`` stops rows that are
+    already included from being counted twice.
+    """
+
+    def __init__(self, columns, halflife=None, min_periods=MIN_PERIODS):
+        self.columns = tuple(columns)
+        self.halflife = halflife
+        self.alpha = None if halflife is None else 1.0 - math.exp(-math.log(2.0) / halflife)
+        self.min_periods = min_periods
+        self.count = 0
+        self.last_timestamp = None  # Timestamp (ns) of the newest row included in the statistics
+        self._mean = np.zeros(len(self.columns))
+        self._m2 = np.zeros(len(self.columns))   # Welford sum of squared deviations
+        self._var = np.zeros(len(self.columns))  # Exponentially weighted variance
+
+    @property
+    def mean(self):
+        return self._mean.copy()
+
+    @property
+    def std(self):
+        if self.alpha is not None:
+            return np.sqrt(self._var)
+        if self.count < 2:
+            return np.zeros(len(self.columns))
+        return np.sqrt(np.maximum(self._m2, 0.0) / (self.count - 1))
+
+    def _scale(self, values, mean, std, count):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (values - mean) / std
+        ready = (np.asarray(count) >= self.min_periods)
+        if np.ndim(z) == 2:
+            ready = np.reshape(ready, (-1, 1))
+        z = np.where(ready & (std > 0), z, 0.0)
+        return np.where(np.isnan(values), np.nan, z)
+
+    def transform(self, values):
+        """Scales one row with the current statistics without updating them."""
+        values = np.asarray(values, dtype=np.float64)
+        return self._scale(values, self._mean, self.std, self.count)
+
+    def update(self, values, timestamp=None):
+        """Adds one row (in ``columns`` order) and returns its z-scores."""
+        values = np.asarray(values, dtype=np.float64)
+        if timestamp is not None and self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.transform(values)
+        if np.isnan(values).any():
+            return np.full(len(self.columns), np.nan)
+
+        if self.alpha is None:
+            self.count += 1
+            delta = values - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (values - self._mean)
+        elif self.count == 0:
+            self.count = 1
+            self._mean = values.copy()
+            self._var = np.zeros(len(self.columns))
+        else:
+            self.count += 1
+            # Same arithmetic as pandas ewm(adjust=False), which batch() uses
+            old_wt, new_wt = 1.0 - self.alpha, self.alpha
+            denom = old_wt + new_wt
+            spread = old_wt * (values - self._mean) ** 2
+            self._mean = np.where(self._mean != values, (old_wt * self._mean + new_wt * values) / denom, self._mean)
+            self._var = np.where(self._var != spread, (old_wt * self._var + new_wt * spread) / denom, self._var)
+        if timestamp is not None:
+            self.last_timestamp = int(timestamp)
+        return self._scale(values, self._mean, self.std, self.count)
+
+    def batch(self, values, timestamps=None):
+        """Adds many rows and returns their z-scores as an (n, columns) array.
+
+        ``values`` is an (n, columns) array, a DataFrame or a mapping of
+        column name to array. Rows with ``timestamps`` not newer than
+        ``last_timestamp`` are scaled with the current statistics only.
+        """
+        if not isinstance(values, np.ndarray):
+            values = np.column_stack([np.asarray(values[name], dtype=np.float64) for name in self.columns])
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        result = np.full(values.shape, np.nan)
+        new = np.ones(len(values), dtype=bool)
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.int64)
+            if self.last_timestamp is not None:
+                new = timestamps > self.last_timestamp
+                if not new.all():
+                    result[~new] = self._scale(values[~new], self._mean, self.std, self.count)
+
+        valid = new & ~np.isnan(values).any(axis=1)
+        rows = values[valid]
+        if len(rows):
+            if self.alpha is None:
+                mean, std, count = self._batch_welford(rows)
+            else:
+                mean, std, count = self._batch_ewm(rows)
+            result[valid] = self._scale(rows, mean, std, count)
+        if timestamps is not None and new.any():
+            self.last_timestamp = int(timestamps[new][-1])
+        return result
+
+    def _batch_welford(self, rows):
+        means, stds, counts = [], [], []
+        for start in range(0, len(rows), BATCH_BLOCK):
+            block = rows[start:start + BATCH_BLOCK]
+            n = np.arange(1, len(block) + 1, dtype=np.float64)[:, None]
+            shifted = block - block[0]
+            sums = np.cumsum(shifted, axis=0)
+            block_mean = sums / n + block[0]
+            block_m2 = np.cumsum(shifted * shifted, axis=0) - sums * sums / n
+            # Chan et al. combination of the running state with each block prefix
+            total = self.count + n
+            delta = block_mean - self._mean
+            mean = self._mean + delta * n / total
+            m2 = self._m2 + block_m2 + delta * delta * self.count * n / total
+            with np.errstate(divide="ignore", invalid="ignore"):
+                std = np.where(total > 1, np.sqrt(np.maximum(m2, 0.0) / (total - 1)), 0.0)
+            self.count += len(block)
+            self._mean, self._m2 = mean[-1].copy(), m2[-1].copy()
+            means.append(mean)
+            stds.append(std)
+            counts.append(total[:, 0])
+        return np.vstack(means), np.vstack(stds), np.concatenate(counts)
+
+    def _batch_ewm(self, rows):
+        alpha = self.alpha
+        count = self.count + np.arange(1, len(rows) + 1)
+        seeded = self.count > 0
+        frame = pd.DataFrame(np.vstack([self._mean, rows]) if seeded else rows)
+        mean = frame.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        previous = mean[:-1] if seeded else np.vstack([rows[:1], mean[:-1]])
+        mean = mean[1:] if seeded else mean
+        spread = (1.0 - alpha) * (rows - previous) ** 2
+        frame = pd.DataFrame(np.vstack([self._var, spread]) if seeded else spread)
+        var = frame.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        var = var[1:] if seeded else var
+        self.count = int(count[-1])
+        self._mean, self._var = mean[-1].copy(), var[-1].copy()
+        return mean, np.sqrt(var), count
+
+    def select(self, columns):
+        """Returns a copy that tracks only ``columns`` (e.g. the subset the live path has)."""
+        index = [self.columns.index(name) for name in columns]
+        other = OnlineNormalizer(columns, self.halflife, self.min_periods)
+        other.count = self.count
+        other.last_timestamp = self.last_timestamp
+        other._mean, other._m2, other._var = self._mean[index], self._m2[index], self._var[index]
+        return other
+
+    def to_dict(self):
+        return {
+            "columns": list(self.columns),
+            "halflife": self.halflife,
+            "min_periods": self.min_periods,
+            "count": self.count,
+            "last_timestamp": self.last_timestamp,
+            "mean": self._mean.tolist(),
+            "m2": self._m2.tolist(),
+            "var": self._var.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        normalizer = cls(state["columns"], state.get("halflife"), state.get("min_periods", MIN_PERIODS))
+        normalizer.count = state["count"]
+        normalizer.last_timestamp = state.get("last_timestamp")
+        normalizer._mean = np.array(state["mean"], dtype=np.float64)
+        normalizer._m2 = np.array(state["m2"], dtype=np.float64)
+        normalizer._var = np.array(state["var"], dtype=np.float64)
+        return normalizer
+
+    def save(self, path):
+        """Writes the state as JSON, replacing ``path`` atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a state written by ``save``; returns None if ``path`` does not exist."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,50 @@
+import math
+import numpy as np
+from . import kernels
+from .ema import StreamingEMA
+
+
+class StreamingRSI:
+    """Wilder RSI kept as running average gain/loss, O(1) per close."""
+
+    __slots__ = ("period", "_gain", "_loss", "_prev_close", "value")
+
+    def __init__(self, period=14):
+        self.period = period
+        self._gain = StreamingEMA(com=period - 1)
+        self._loss = StreamingEMA(com=period - 1)
+        self._prev_close = None
+        self.value = math.nan
+
+    def update(self, close):
+        if self._prev_close is None:
+            # No delta on the first bar; pandas treats it as zero gain and loss
+            gain = loss = 0.0
+        else:
+            delta = close - self._prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+        self._prev_close = close
+
+        avg_gain = self._gain.update(gain)
+        avg_loss = self._loss.update(loss)
+        if avg_loss == 0:
+            self.value = 100.0 if avg_gain > 0 else math.nan
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return self.value
+
+    def batch(self, closes):
+        """Vectorised update over many closes; returns the RSI after each one."""
+        closes = np.asarray(closes, dtype=np.float64)
+        if not len(closes):
+            return closes
+        prev = math.nan if self._prev_close is None else self._prev_close
+        gain = math.nan if self._gain.value is None else self._gain.value
+        loss = math.nan if self._loss.value is None else self._loss.value
+        rsi, gains, losses = kernels.rsi(closes, self.period, prev, gain, loss)
+        self._gain.value = float(gains[-1])
+        self._loss.value = float(losses[-1])
+        self._prev_close = float(closes[-1])
+        self.value = float(rsi[-1])
+        return rsi
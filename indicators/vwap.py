@@ -0,0 +1,105 @@
+import math
+import numpy as np
+from . import kernels
+
+
+class StreamingVWAP:
+    """Rolling VWAP of the typical price ((high + low + close) / 3) over the last ``window`` bars.
+
+    Keeps price*volume and volume for the bars inside the window in a ring
+    plus their running sums, so each bar adds the new values and evicts the
+    oldest in O(1). The sums are recomputed exactly once per window lap,
+    which keeps the amortised cost O(1) and stops rounding drift.
+    """
+
+    __slots__ = ("window", "_pv", "_volume", "_pos", "_count", "_pv_sum", "_volume_sum", "value")
+
+    def __init__(self, window=14):
+        self.window = window
+        self._pv = [0.0] * window
+        self._volume = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._pv_sum = 0.0
+        self._volume_sum = 0.0
+        self.value = math.nan
+
+    def _held(self, ring):
+        # Values inside the window, oldest first
+        if self._count == self.window:
+            return ring[self._pos:] + ring[:self._pos]
+        return ring[:self._count]
+
+    def _resync(self):
+        self._pv_sum = math.fsum(self._pv[:self._count])
+        self._volume_sum = math.fsum(self._volume[:self._count])
+
+    def update(self, high, low, close, volume):
+        pv = (high + low + close) / 3.0 * volume
+        volume = float(volume)
+        pos = self._pos
+        if self._count == self.window:
+            self._pv_sum += pv - self._pv[pos]
+            self._volume_sum += volume - self._volume[pos]
+        else:
+            self._count += 1
+            self._pv_sum += pv
+            self._volume_sum += volume
+        self._pv[pos] = pv
+        self._volume[pos] = volume
+        self._pos = pos + 1
+        if self._pos == self.window:
+            self._pos = 0
+            if self._count == self.window:
+                self._resync()
+        if self._count == self.window:
+            self.value = self._pv_sum / self._volume_sum if self._volume_sum else math.nan
+        return self.value
+
+    def batch(self, high, low, close, volume):
+        """Vectorised update over many bars; returns the VWAP after each one."""
+        close = np.asarray(close, dtype=np.float64)
+        if not len(close):
+            return close
+        pv = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) + close) / 3.0 \
+            * np.asarray(volume, dtype=np.float64)
+        pv = np.concatenate((self._held(self._pv), pv))
+        volume = np.concatenate((self._held(self._volume), np.asarray(volume, dtype=np.float64)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = (kernels.rolling_sum(pv, self.window) / kernels.rolling_sum(volume, self.window))[-len(close):]
+
+        held = min(len(pv), self.window)
+        self._count = held
+        self._pv = pv[-held:].tolist() + [0.0] * (self.window - held)
+        self._volume = volume[-held:].tolist() + [0.0] * (self.window - held)
+        self._pos = held % self.window
+        self._resync()
+        self.value = float(vwap[-1])
+        return vwap
+
+
+class StreamingOrderFlow:
+    """Signed volume: the bar's volume times the sign of its close change (NaN on the first bar)."""
+
+    __slots__ = ("_prev_close", "value")
+
+    def __init__(self):
+        self._prev_close = None
+        self.value = math.nan
+
+    def update(self, close, volume):
+        if self._prev_close is not None:
+            self.value = volume * float(np.sign(close - self._prev_close))
+        self._prev_close = close
+        return self.value
+
+    def batch(self, close, volume):
+        """Vectorised update over many bars; returns the order flow of each one."""
+        close = np.asarray(close, dtype=np.float64)
+        if not len(close):
+            return close
+        prev = math.nan if self._prev_close is None else self._prev_close
+        flow = kernels.order_flow(close, volume, prev)
+        self._prev_close = float(close[-1])
+        self.value = float(flow[-1])
+        return flow
@@ -1,53 +1,165 @@
+import os
+import time
 import asyncio
+import argparse
 from data_streaming import alpaca_stream
+from data_streaming.price_cache import LastPriceCache
+from data_streaming.replay import SimulatedClock
 from strategies.composite_strategy import CompositeStrategy
-from execution.order_manager import OrderManager
+from execution.order_manager import OrderManager, account, latest_trade_price, use_broker
+from execution.sim_broker import SimulatedBroker
+from monitoring import metrics, METRICS_PORT
 
-SYMBOL = "AAPL"
-strategy = CompositeStrategy(SYMBOL)
-order_manager = OrderManager(SYMBOL)
+SYMBOLS = alpaca_stream.SYMBOLS
+LATENCY_REPORT_EVERY = 100  # Bar events between latency summaries
+REPLAY_CASH = 100_000.0  # Starting cash of the simulated account in --replay
+prices = LastPriceCache(fallback=latest_trade_price)  # Streamed last trades; REST only when stale
+order_managers = {symbol: OrderManager(symbol, prices=prices) for symbol in SYMBOLS}
 
-# Global variable to track if the processor is initialized
-processor_initialized = False
+# Latency from bar close (wall clock) to each step of the trading loop
+BAR_TO_DEQUEUE = metrics.histogram("bar_to_dequeue_seconds", "Bar close to trading loop pickup")
+BAR_TO_SIGNAL = metrics.histogram("bar_to_signal_seconds", "Bar close to strategy decision")
+BAR_TO_SUBMIT = metrics.histogram("bar_to_submit_seconds", "Bar close to order accepted by the broker")
+STRATEGY_LATENCY = metrics.histogram("strategy_eval_seconds", "Time for one strategy evaluation")
+TRADING_ERRORS = metrics.counter("errors_total", labels={"stage": "trading_loop"})
+SIGNALS = {side: metrics.counter("signals_total", "Strategy signals by side", labels={"side": side})
+           for side in ("buy", "sell", "hold")}
 
-async def live_trading_loop():
-    global processor_initialized
+def latency_summary():
+    lines = []
+    for name, histogram in (("bar_to_dequeue", BAR_TO_DEQUEUE), ("bar_to_signal", BAR_TO_SIGNAL),
+                            ("bar_to_submit", BAR_TO_SUBMIT)):
+        stats = histogram.summary()
+        if stats["count"]:
+            lines.append(f"{name}: n={stats['count']} p50={stats['p50_us'] / 1e3:.2f}ms "
+                         f"p99={stats['p99_us'] / 1e3:.2f}ms max={stats['max_us'] / 1e3:.2f}ms")
+    return "; ".join(lines)
+
+async def live_trading_loop(registry):
+    """Evaluates every processed bar exactly once, as soon as it is published."""
+    events = registry.events
+    handled = 0
     while True:
+        event = await events.get()
         try:
-            if processor_initialized and 'processor' in globals() and not processor.processed_data.empty:
-                latest_data = processor.processed_data.iloc[-1:]
-                signal = strategy.generate_signal(latest_data)
-                if signal in ["buy", "sell"]:
-                    order_manager.place_bracket_order(signal)
-            else:
-                print("Waiting for processor to initialize...")
+            BAR_TO_DEQUEUE.observe(time.time_ns() - event.finalized_ns)
+            signal = event.signal
+            if signal is None:
+                context = registry[event.symbol]
+                # Window ending at this event's bar, even if newer bars were processed since
+                window = context.processor.window_at(event.sequence)
+                if window is None:
+                    print(f"Skipping stale bar for {event.symbol}")
+                    continue
+                with STRATEGY_LATENCY.time():
+                    signal = context.strategy.generate_signal(window)
+                BAR_TO_SIGNAL.observe(time.time_ns() - event.finalized_ns)
+            if signal in SIGNALS:
+                SIGNALS[signal].inc()
+            if signal in ["buy", "sell"]:
+                # Order submission blocks on REST calls; keep the event loop ingesting meanwhile
+                order = await asyncio.to_thread(order_managers[event.symbol].place_bracket_order, signal)
+                if order is not None:
+                    submitted_ns = time.time_ns() - event.finalized_ns
+                    BAR_TO_SUBMIT.observe(submitted_ns)
+                    print(f"{event.symbol} {signal} submitted {submitted_ns / 1e6:.1f} ms after bar close")
         except Exception as e:
+            TRADING_ERRORS.inc()
             print(f"Error in trading loop: {e}")
-        await asyncio.sleep(5)
+        finally:
+            events.task_done()
+            handled += 1
+            if handled % LATENCY_REPORT_EVERY == 0:
+                print(f"Latency: {latency_summary()}")
 
-async def main():
-    global processor, processor_initialized
-    processor = None
-    processor_initialized = False
+async def wait_ready(stream_task, ready):
+    """Waits until the stream sets ``ready``; returns False if the stream task ended first."""
+    ready_task = asyncio.create_task(ready.wait())
+    await asyncio.wait((stream_task, ready_task), return_when=asyncio.FIRST_COMPLETED)
+    if ready.is_set():
+        return True
+    ready_task.cancel()
+    await stream_task  # Raises the stream's error, if any
+    return False
 
-    # Start the stream in a separate task
-    stream_task = asyncio.create_task(alpaca_stream.start_stream())
+async def replay_session(path, speed=0.0, store=None):
+    """Replays a tick journal through the stream pipeline and trading loop; returns the SimulatedBroker.
 
-    # Wait for the processor to be initialized
-    while True:
-        if 'processor' in globals() and processor is not None:
-            processor_initialized = True
-            print("Processor initialized. Starting trading loop...")
-            break
-        await asyncio.sleep(1)
+    Orders go to a SimulatedBroker with REPLAY_CASH, prices are judged
+    fresh against the recorded clock, and nothing reaches Alpaca. Every bar
+    is handled before the replay moves on, so the same journal always gives
+    the same orders, at any ``speed`` (see alpaca_stream.replay_stream).
+    """
+    broker = SimulatedBroker(cash=REPLAY_CASH)
+    broker.subscribe_trade_updates(use_broker(broker).apply_update)
+    clock = SimulatedClock()
+    replay_prices = LastPriceCache(fallback=latest_trade_price, clock=clock)
+    ready = asyncio.Event()
+    stream_task = asyncio.create_task(
+        alpaca_stream.replay_stream(path, strategy_factory=CompositeStrategy, publish_events=True,
+                                    prices=replay_prices, speed=speed, clock=clock, broker=broker, store=store,
+                                    ready=ready)
+    )
+    if not await wait_ready(stream_task, ready):
+        return broker
+    registry = alpaca_stream.registry
+    # The journal's symbols, which need not match SYMBOLS
+    for symbol in registry.symbols:
+        order_managers[symbol] = OrderManager(symbol, prices=replay_prices)
+    trading_task = asyncio.create_task(live_trading_loop(registry))
+    try:
+        await stream_task
+    finally:
+        trading_task.cancel()
+    return broker
+
+def replay_summary(broker):
+    equity = float(broker.get_account().equity)
+    return (f"{broker.orders_submitted} orders ({broker.orders_rejected} rejected), {broker.fills} fills, "
+            f"equity {equity:.2f} ({equity - REPLAY_CASH:+.2f})")
+
+async def main(replay=None, speed=0.0):
+    # Prometheus endpoint on localhost (METRICS_PORT=0 disables it)
+    metrics_port = int(os.getenv("METRICS_PORT", METRICS_PORT))
+    if metrics_port:
+        metrics.serve(metrics_port)
+        print(f"Metrics at http://127.0.0.1:{metrics_port}/metrics")
+
+    if replay is not None:
+        broker = await replay_session(replay, speed)
+        print(f"Replay: {replay_summary(broker)}")
+        return
+
+    # Start the stream in a separate task; it sets ready once the registry is warm
+    ready = asyncio.Event()
+    stream_task = asyncio.create_task(
+        alpaca_stream.start_stream(SYMBOLS, strategy_factory=CompositeStrategy, publish_events=True,
+                                   trade_update_handler=account.handle_trade_update, prices=prices, ready=ready)
+    )
+
+    # Seed positions, orders and buying power once (while the stream warms up); trade_updates keep them current
+    await asyncio.to_thread(account.reconcile)
+
+    if not await wait_ready(stream_task, ready):
+        return
+    print(f"Processors initialized for {len(alpaca_stream.registry)} symbols. Starting trading loop...")
+
+    # Run both tasks concurrently, repairing the account state from REST in the background
+    await asyncio.gather(stream_task, live_trading_loop(alpaca_stream.registry), account.reconcile_periodically())
 
-    # Run both tasks concurrently
-    await asyncio.gather(stream_task, live_trading_loop())
+def parse_args():
+    parser = argparse.ArgumentParser(description="Live scalping bot, or a replay of a recorded session")
+    parser.add_argument("--replay", metavar="JOURNAL",
+                        help="Tick journal (data/journal/*.ticks) to replay against a simulated broker")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed: 1 = recorded pace, 10 = ten times faster, 0 = as fast as possible")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.replay, args.speed))
     except KeyboardInterrupt:
         print("Bot stopped.")
     except Exception as e:
-        print(f"Fatal error: {e}")
\ No newline at end of file
+        print(f"Fatal error: {e}")
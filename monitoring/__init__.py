@@ -0,0 +1,12 @@
+from .metrics import Counter, Gauge, Histogram, MetricsRegistry, metrics, LATENCY_BUCKETS_NS, METRICS_PORT
+
+# Export monitoring tools
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "metrics",
+    "LATENCY_BUCKETS_NS",
+    "METRICS_PORT",
+]
@@ -0,0 +1,260 @@
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency histogram bucket upper bounds in nanoseconds (1us .. 10s)
+LATENCY_BUCKETS_NS = (
+    1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000,
+    1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000,
+    100_000_000, 250_000_000, 500_000_000, 1_000_000_000, 2_500_000_000, 10_000_000_000,
+)
+
+# Local port for the Prometheus endpoint (0 disables it)
+METRICS_PORT = 9100
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter."""
+
+    __slots__ = ("name", "labels", "value", "_lock")
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down; ``track(function)`` reads it from ``function()`` instead."""
+
+    __slots__ = ("name", "labels", "_value", "function")
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self._value = 0
+        self.function = None
+
+    def set(self, value):
+        self._value = value
+
+    def track(self, function):
+        self.function = function
+
+    @property
+    def value(self):
+        return self.function() if self.function is not None else self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+
+class Histogram:
+    """Latency histogram over fixed buckets, recorded in nanoseconds and exported in seconds.
+
+    ``observe`` is a binary search plus a few integer additions, cheap enough
+    to leave on in the hot path.
+    """
+
+    __slots__ = ("name", "labels", "bounds", "counts", "count", "sum", "max", "_lock")
+
+    def __init__(self, name, labels=(), bounds=LATENCY_BUCKETS_NS):
+        self.name = name
+        self.labels = labels
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ns):
+        bucket = bisect.bisect_left(self.bounds, value_ns)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.sum += value_ns
+            if value_ns > self.max:
+                self.max = value_ns
+
+    def observe_since(self, start_ns):
+        """Records ``perf_counter_ns() - start_ns``."""
+        self.observe(time.perf_counter_ns() - start_ns)
+
+    def time(self):
+        """Context manager that records the duration of its block."""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Estimates a quantile (ns) by linear interpolation inside the matching bucket."""
+        counts, largest = list(self.counts), self.max
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        lower = 0
+        for i, n in enumerate(counts):
+            upper = self.bounds[i] if i < len(self.bounds) else largest
+            if n and seen + n >= rank:
+                return min(lower + (upper - lower) * (rank - seen) / n, largest)
+            seen += n
+            lower = upper
+        return largest
+
+    def summary(self):
+        mean = self.sum / self.count if self.count else None
+        return {
+            "count": self.count,
+            "mean_us": mean / 1e3 if mean is not None else None,
+            "p50_us": _us(self.quantile(0.5)),
+            "p99_us": _us(self.quantile(0.99)),
+            "max_us": self.max / 1e3 if self.count else None,
+        }
+
+
+def _us(value_ns):
+    return value_ns / 1e3 if value_ns is not None else None
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter_ns() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms with Prometheus text and dict snapshots.
+
+    Metrics are created on first use and cached by (name, labels), so hot
+    paths should look them up once and keep the object. Counters and
+    histograms are updated from the event loop, the ingest worker and order
+    threads, so each update holds the metric's own lock (uncontended, well
+    under a microsecond, and taken per batch or bar rather than per trade);
+    gauges are set by single assignments. Readers (the HTTP thread) take no
+    lock and may see a histogram mid-update, off by one.
+    """
+
+    def __init__(self, prefix="scalping_bot_"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        labels = tuple(sorted((labels or {}).items()))
+        key = (name, labels)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = cls(name, labels, **kwargs)
+                    if help_text:
+                        self._help.setdefault(name, help_text)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {type(metric).__name__}")
+        return metric
+
+    def counter(self, name, help_text="", labels=None):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", labels=None):
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text="", labels=None, bounds=LATENCY_BUCKETS_NS):
+        return self._get(Histogram, name, help_text, labels, bounds=bounds)
+
+    def reset(self):
+        """Zeroes every metric in place (modules keep references to their metric objects)."""
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, (Counter, Gauge)):
+                metric.value = 0
+            else:
+                metric.counts = [0] * len(metric.counts)
+                metric.count = metric.sum = metric.max = 0
+
+    def snapshot(self):
+        """Returns {"name{labels}": value} for counters and summary dicts for histograms."""
+        result = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            key = name + _label_text(labels)
+            result[key] = metric.summary() if isinstance(metric, Histogram) else metric.value
+        return result
+
+    def render_prometheus(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        by_name = {}
+        for (name, labels), metric in sorted(list(self._metrics.items()), key=lambda item: item[0]):
+            by_name.setdefault(name, []).append(metric)
+        for name, metrics in by_name.items():
+            full_name = self.prefix + name
+            if name in self._help:
+                lines.append(f"# HELP {full_name} {self._help[name]}")
+            if not isinstance(metrics[0], Histogram):
+                lines.append(f"# TYPE {full_name} {'counter' if isinstance(metrics[0], Counter) else 'gauge'}")
+                for metric in metrics:
+                    lines.append(f"{full_name}{_label_text(metric.labels)} {metric.value}")
+                continue
+            lines.append(f"# TYPE {full_name} histogram")
+            for metric in metrics:
+                counts, total = list(metric.counts), metric.sum
+                count = sum(counts)
+                cumulative = 0
+                for bound, n in zip(metric.bounds + (None,), counts):
+                    cumulative += n
+                    le = "+Inf" if bound is None else repr(bound / 1e9)
+                    lines.append(f"{full_name}_bucket{_label_text(metric.labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_label_text(metric.labels)} {total / 1e9}")
+                lines.append(f"{full_name}_count{_label_text(metric.labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Serves ``/metrics`` from a daemon thread; returns the server (``shutdown()`` to stop)."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes are too frequent to print
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+# Process-wide registry used by the bot's hot paths
+metrics = MetricsRegistry()
@@ -1,16 +1,71 @@
+import numpy as np
 from abc import ABC, abstractmethod
 
+# Numeric signal codes used by the batch API
+BUY = 1
+SELL = -1
+HOLD = 0
+SIGNAL_CODES = {"buy": BUY, "sell": SELL, "hold": HOLD}
+SIGNAL_NAMES = {code: name for name, code in SIGNAL_CODES.items()}
+
 class BaseStrategy(ABC):
+    # Columns generate_signal reads; the indicator engine computes only these.
+    # None means undeclared: every column in INDICATOR_COLUMNS is computed.
+    features = None
+
     def __init__(self, symbol):
         self.symbol = symbol
 
+    @staticmethod
+    def column(df, name):
+        """Returns a column as a NumPy array (a view for BarWindow and float columns)."""
+        return np.asarray(df[name])
+
     @abstractmethod
     def generate_signal(self, df):
         """
         Generate a trading signal based on the latest data.
         Args:
-            df (pd.DataFrame): DataFrame with all required indicators.
+            df (pd.DataFrame | BarWindow): Bars with all required indicators.
         Returns:
             str: One of "buy", "sell", "hold"
         """
         pass
+
+    def generate_signals(self, df):
+        """
+        Generate the signal for every row at once, as if generate_signal had
+        been called on each prefix of df.
+        Args:
+            df (pd.DataFrame): Bars with all required indicators.
+        Returns:
+            np.ndarray: int8 array of BUY / SELL / HOLD codes.
+        """
+        # Fallback for strategies without a vectorised implementation
+        signals = np.zeros(len(df), dtype=np.int8)
+        for i in range(len(df)):
+            signals[i] = SIGNAL_CODES[self.generate_signal(df.iloc[:i + 1])]
+        return signals
+
+    @staticmethod
+    def crossover_signals(fast, slow):
+        """BUY where fast crosses above slow, SELL where it crosses below."""
+        fast = np.asarray(fast, dtype=np.float64)
+        slow = np.asarray(slow, dtype=np.float64)
+        signals = np.zeros(len(fast), dtype=np.int8)
+        if len(fast) < 2:
+            return signals
+        prev_fast, prev_slow = fast[:-1], slow[:-1]
+        cur_fast, cur_slow = fast[1:], slow[1:]
+        signals[1:][(prev_fast < prev_slow) & (cur_fast > cur_slow)] = BUY
+        signals[1:][(prev_fast > prev_slow) & (cur_fast < cur_slow)] = SELL
+        return signals
+
+    @staticmethod
+    def band_signals(values, upper, lower, above=BUY, below=SELL):
+        """Codes for values strictly above ``upper`` / below ``lower``; HOLD otherwise."""
+        values = np.asarray(values, dtype=np.float64)
+        signals = np.zeros(len(values), dtype=np.int8)
+        signals[values > upper] = above
+        signals[values < lower] = below
+        return signals
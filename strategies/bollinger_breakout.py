@@ -1,14 +1,17 @@
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy
 
 class BollingerBreakoutStrategy(BaseStrategy):
+    features = ('close', 'bollinger_h', 'bollinger_l')
+
     def generate_signal(self, df: pd.DataFrame) -> str:
         if len(df) < 1:
             return "hold"
 
-        price = df['close'].iloc[-1]
-        upper = df['bollinger_h'].iloc[-1]
-        lower = df['bollinger_l'].iloc[-1]
+        price = self.column(df, 'close')[-1]
+        upper = self.column(df, 'bollinger_h')[-1]
+        lower = self.column(df, 'bollinger_l')[-1]
 
         if price > upper:
             return "buy"
@@ -16,3 +19,10 @@ class BollingerBreakoutStrategy(BaseStrategy):
             return "sell"
         else:
             return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        return self.band_signals(
+            self.column(df, 'close'),
+            self.column(df, 'bollinger_h'),
+            self.column(df, 'bollinger_l'),
+        )
@@ -1,7 +1,9 @@
 # strategies/composite_strategy.py
 
 import pandas as pd
-from .base import BaseStrategy
+import numpy as np
+from indicators.engine import feature_union
+from .base import BaseStrategy, BUY, SELL, HOLD
 from .ema_crossover import EMACrossoverStrategy
 from .vwap_reversion import VWAPReversionStrategy
 from .rsi_reversal import RSIReversalStrategy
@@ -9,9 +11,9 @@ from .macd_momentum import MACDMomentumStrategy
 from .bollinger_breakout import BollingerBreakoutStrategy
 
 class CompositeStrategy(BaseStrategy):
-    def __init__(self, symbol):
+    def __init__(self, symbol, strategies=None):
         super().__init__(symbol)
-        self.strategies = [
+        self.strategies = strategies or [
             EMACrossoverStrategy(symbol),
             VWAPReversionStrategy(symbol),
             RSIReversalStrategy(symbol),
@@ -19,11 +21,17 @@ class CompositeStrategy(BaseStrategy):
             BollingerBreakoutStrategy(symbol)
         ]
 
+    @property
+    def features(self):
+        """Union of the members' features; None if any member has not declared its own."""
+        if any(s.features is None for s in self.strategies):
+            return None
+        return feature_union(*(s.features for s in self.strategies))
+
     def generate_signal(self, df: pd.DataFrame) -> str:
-        if df.empty or not isinstance(df, pd.DataFrame):
+        if df is None or len(df) == 0:
             return "hold"
 
-        row = df.iloc[-1]
         signals = [s.generate_signal(df) for s in self.strategies]
         votes = {"buy": 0, "sell": 0, "hold": 0}
 
@@ -35,3 +43,17 @@ class CompositeStrategy(BaseStrategy):
         elif votes["sell"] > votes["buy"] and votes["sell"] > votes["hold"]:
             return "sell"
         return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        if df is None or len(df) == 0:
+            return np.zeros(0, dtype=np.int8)
+
+        signals = np.stack([s.generate_signals(df) for s in self.strategies])
+        buy_votes = (signals == BUY).sum(axis=0)
+        sell_votes = (signals == SELL).sum(axis=0)
+        hold_votes = (signals == HOLD).sum(axis=0)
+
+        result = np.zeros(signals.shape[1], dtype=np.int8)
+        result[(buy_votes > sell_votes) & (buy_votes > hold_votes)] = BUY
+        result[(sell_votes > buy_votes) & (sell_votes > hold_votes)] = SELL
+        return result
@@ -1,15 +1,22 @@
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy
 
 class EMACrossoverStrategy(BaseStrategy):
+    def __init__(self, symbol, short_span=9, long_span=21):
+        super().__init__(symbol)
+        self.short_column = f'ema_{short_span}'
+        self.long_column = f'ema_{long_span}'
+        self.features = (self.short_column, self.long_column)
+
     def generate_signal(self, df: pd.DataFrame) -> str:
         if len(df) < 2:
             return "hold"
 
-        short_ema = df['ema_9'].iloc[-1]
-        long_ema = df['ema_21'].iloc[-1]
-        prev_short = df['ema_9'].iloc[-2]
-        prev_long = df['ema_21'].iloc[-2]
+        short = self.column(df, self.short_column)
+        long = self.column(df, self.long_column)
+        short_ema, prev_short = short[-1], short[-2]
+        long_ema, prev_long = long[-1], long[-2]
 
         if prev_short < prev_long and short_ema > long_ema:
             return "buy"
@@ -17,3 +24,6 @@ class EMACrossoverStrategy(BaseStrategy):
             return "sell"
         else:
             return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        return self.crossover_signals(self.column(df, self.short_column), self.column(df, self.long_column))
@@ -1,15 +1,18 @@
 import pandas as pd
+import numpy as np
 from .base import BaseStrategy
 
 class MACDMomentumStrategy(BaseStrategy):
+    features = ('macd', 'macd_signal')
+
     def generate_signal(self, df: pd.DataFrame) -> str:
         if len(df) < 2:
             return "hold"
 
-        macd = df['macd'].iloc[-1]
-        signal = df['macd_signal'].iloc[-1]
-        prev_macd = df['macd'].iloc[-2]
-        prev_signal = df['macd_signal'].iloc[-2]
+        macd_values = self.column(df, 'macd')
+        signal_values = self.column(df, 'macd_signal')
+        macd, prev_macd = macd_values[-1], macd_values[-2]
+        signal, prev_signal = signal_values[-1], signal_values[-2]
 
         if prev_macd < prev_signal and macd > signal:
             return "buy"
@@ -17,3 +20,6 @@ class MACDMomentumStrategy(BaseStrategy):
             return "sell"
         else:
             return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        return self.crossover_signals(self.column(df, 'macd'), self.column(df, 'macd_signal'))
@@ -1,16 +1,27 @@
 import pandas as pd
-from .base import BaseStrategy
+import numpy as np
+from .base import BaseStrategy, BUY, SELL
 
 class RSIReversalStrategy(BaseStrategy):
+    features = ('rsi',)
+
+    def __init__(self, symbol, overbought=70, oversold=30):
+        super().__init__(symbol)
+        self.overbought = overbought
+        self.oversold = oversold
+
     def generate_signal(self, df: pd.DataFrame) -> str:
         if len(df) < 1:
             return "hold"
 
-        rsi = df['rsi'].iloc[-1]
+        rsi = self.column(df, 'rsi')[-1]
 
-        if rsi > 70:
+        if rsi > self.overbought:
             return "sell"
-        elif rsi < 30:
+        elif rsi < self.oversold:
             return "buy"
         else:
             return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        return self.band_signals(self.column(df, 'rsi'), self.overbought, self.oversold, above=SELL, below=BUY)
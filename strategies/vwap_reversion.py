@@ -1,16 +1,23 @@
 import pandas as pd
-from .base import BaseStrategy
+import numpy as np
+from .base import BaseStrategy, BUY, SELL
 
 class VWAPReversionStrategy(BaseStrategy):
+    features = ('close', 'vwap')
+
+    def __init__(self, symbol, threshold=0.002):
+        super().__init__(symbol)
+        self.threshold = threshold  # 0.2% by default
+
     def generate_signal(self, df: pd.DataFrame) -> str:
         if len(df) < 1:
             return "hold"
 
-        price = df['close'].iloc[-1]
-        vwap = df['vwap'].iloc[-1]
+        price = self.column(df, 'close')[-1]
+        vwap = self.column(df, 'vwap')[-1]
 
         deviation = (price - vwap) / vwap
-        threshold = 0.002  # 0.2%
+        threshold = self.threshold
 
         if deviation > threshold:
             return "sell"
@@ -18,3 +25,11 @@ class VWAPReversionStrategy(BaseStrategy):
             return "buy"
         else:
             return "hold"
+
+    def generate_signals(self, df) -> np.ndarray:
+        price = self.column(df, 'close')
+        vwap = self.column(df, 'vwap')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = (price - vwap) / vwap
+        threshold = self.threshold
+        return self.band_signals(deviation, threshold, -threshold, above=SELL, below=BUY)
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+from execution.account_state import AccountState
+from execution.risk_management import RiskManager
+
+
+class StubREST:
+    """Stands in for the Alpaca REST client: returns fixed account, positions and open orders."""
+
+    def __init__(self, cash=10000.0, positions=(), orders=()):
+        self.account = SimpleNamespace(cash=str(cash), buying_power=str(cash * 2), equity=str(cash))
+        self.positions = list(positions)
+        self.orders = list(orders)
+        self.during_fetch = None  # Called while a reconcile is between its REST calls
+        self.calls = 0
+
+    def get_account(self):
+        self.calls += 1
+        return self.account
+
+    def list_positions(self):
+        if self.during_fetch is not None:
+            self.during_fetch()
+        return self.positions
+
+    def list_orders(self, status="open", nested=True):
+        return self.orders
+
+
+def _position(symbol, qty, avg_entry_price):
+    return SimpleNamespace(symbol=symbol, qty=str(qty), avg_entry_price=str(avg_entry_price))
+
+
+def _order(order_id, symbol, side, qty, status="new", filled_qty=0):
+    return {'id': order_id, 'symbol': symbol, 'side': side, 'qty': str(qty), 'filled_qty': str(filled_qty),
+            'status': status}
+
+
+def _update(event, order, qty=None, price=None, position_qty=None):
+    """A trade_updates stream message as delivered to the handler."""
+    data = {'event': event, 'order': order}
+    if qty is not None:
+        data.update(qty=str(qty), price=str(price))
+    if position_qty is not None:
+        data['position_qty'] = str(position_qty)
+    return data
+
+
+def test_seeds_from_rest():
+    rest = StubREST(cash=5000.0, positions=[_position("AAPL", 10, 150.0)],
+                    orders=[_order("o1", "MSFT", "buy", 5)])
+    account = AccountState(rest)
+
+    assert account.get_cash() == 5000.0
+    assert account.seeded and rest.calls == 1
+    assert account.position("AAPL") == {"qty": 10.0, "side": "long", "avg_entry_price": 150.0}
+    assert [order['id'] for order in account.orders_for("MSFT")] == ["o1"]
+    assert account.exposed_symbols() == {"AAPL", "MSFT"}
+    account.position("AAPL")
+    assert rest.calls == 1  # Reads come from memory once seeded
+
+
+def test_fill_updates_position_and_cash():
+    account = AccountState(StubREST(cash=10000.0))
+    account.reconcile()
+    order = _order("o1", "AAPL", "buy", 10)
+
+    account.apply_update(_update("new", order))
+    assert account.orders_for("AAPL")[0]['status'] == "new"
+
+    account.apply_update(_update("partial_fill", dict(order, status="partially_filled", filled_qty="4"),
+                                 qty=4, price=100.0, position_qty=4))
+    assert account.position("AAPL")["qty"] == 4.0
+    assert account.cash == 10000.0 - 400.0
+
+    account.apply_update(_update("fill", dict(order, status="filled", filled_qty="10"),
+                                 qty=6, price=110.0, position_qty=10))
+    assert account.position("AAPL") == {"qty": 10.0, "side": "long", "avg_entry_price": 106.0}
+    assert account.cash == 10000.0 - 400.0 - 660.0
+    assert account.orders_for("AAPL") == []
+
+    account.apply_update(_update("fill", _order("o2", "AAPL", "sell", 10, status="filled", filled_qty=10),
+                                 qty=10, price=120.0, position_qty=0))
+    assert account.position("AAPL") is None
+    assert account.cash == 10000.0 - 1060.0 + 1200.0
+
+
+def test_update_during_reconcile_is_replayed_onto_snapshot():
+    rest = StubREST(cash=10000.0)
+    account = AccountState(rest)
+    order = _order("o1", "AAPL", "buy", 10, status="filled", filled_qty=10)
+    # The fill streams in after REST returned the account but before positions/orders
+    rest.during_fetch = lambda: account.apply_update(_update("fill", order, qty=10, price=100.0, position_qty=10))
+
+    assert account.reconcile()
+    assert account.position("AAPL") == {"qty": 10.0, "side": "long", "avg_entry_price": 100.0}
+    assert account.cash == 10000.0  # The snapshot's cash may already include the fill
+    assert account.updates_applied == 1
+
+
+def test_replayed_fill_without_position_qty_is_not_counted_twice():
+    rest = StubREST(cash=10000.0, positions=[_position("AAPL", 10, 100.0)])
+    account = AccountState(rest)
+    order = _order("o1", "AAPL", "buy", 10, status="filled", filled_qty=10)
+    # The fill is already in the REST position snapshot, and the update has no position_qty
+    rest.during_fetch = lambda: account.apply_update(_update("fill", order, qty=10, price=100.0))
+
+    assert account.reconcile()
+    assert account.position("AAPL")["qty"] == 10.0
+    assert account.orders_for("AAPL") == []
+
+
+def test_risk_refuses_pending_entry():
+    rest = StubREST(orders=[_order("o1", "AAPL", "buy", 10)])
+    risk = RiskManager(rest, max_open_trades=2)
+
+    assert not risk.is_trade_allowed("buy", "AAPL")
+    assert risk.is_trade_allowed("buy", "MSFT")
+
+
+def test_risk_refuses_beyond_max_open_trades():
+    rest = StubREST()
+    risk = RiskManager(rest, max_open_trades=1)
+    assert risk.is_trade_allowed("buy", "AAPL")
+
+    risk.account.apply_update(_update("fill", _order("o1", "AAPL", "buy", 10, status="filled", filled_qty=10),
+                                      qty=10, price=100.0, position_qty=10))
+    assert not risk.is_trade_allowed("buy", "MSFT")
+    assert not risk.is_trade_allowed("buy", "AAPL")  # Already long
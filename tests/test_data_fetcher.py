@@ -0,0 +1,121 @@
+import json
+import os
+import time
+import numpy as np
+import pytest
+import requests
+from data.bar_store import BarStore, RAW, DAY_NS, _to_ns
+from data.data_fetcher import HistoricalFetcher, FETCHED_INDEX_FILE
+from benchmarks.synthetic import FakeBarsAPI
+
+START, END = "2024-01-01", "2024-01-31"
+
+
+class FailingBarsAPI(FakeBarsAPI):
+    """FakeBarsAPI whose first request for each chunk starting at a time in ``fail_starts`` fails."""
+
+    def __init__(self, fail_starts=(), **kwargs):
+        super().__init__(**kwargs)
+        self.fail_starts = set(fail_starts)
+        self.starts = []
+
+    def get_bars_iter(self, symbol, timeframe, start=None, end=None, raw=False, **kwargs):
+        start_ns = _to_ns(start)
+        self.starts.append((symbol, start_ns))
+        if start_ns in self.fail_starts:
+            self.fail_starts.discard(start_ns)
+            self.requests += 1
+            raise requests.ConnectionError("connection reset by peer")
+        return super().get_bars_iter(symbol, timeframe, start, end, raw, **kwargs)
+
+
+def _fetcher(tmp_path, api, **kwargs):
+    kwargs.setdefault("max_workers", 2)
+    return HistoricalFetcher(api, BarStore(str(tmp_path)), chunk_days=5, backoff_s=0.0, **kwargs)
+
+
+def _stored_times(fetcher, symbol):
+    return np.asarray(fetcher.store.read(symbol, START, END, columns=['close'])['timestamp'])
+
+
+def _expected_times(start=START, end=END):
+    return FakeBarsAPI.bar_times(_to_ns(start), _to_ns(end) - 1)
+
+
+def test_plan_covers_only_missing_ranges(tmp_path):
+    fetcher = _fetcher(tmp_path, FakeBarsAPI())
+    start, end = _to_ns(START), _to_ns(END)
+    fetcher.index.add("AAPL", start + 10 * DAY_NS, start + 12 * DAY_NS)
+    fetcher.index.add("AAPL", start + 12 * DAY_NS, start + 15 * DAY_NS)  # Adjacent: merged
+    fetcher.index.add("AAPL", start + 20 * DAY_NS, start + 22 * DAY_NS)
+
+    with open(fetcher.store.sidecar_path("AAPL", FETCHED_INDEX_FILE, kind=RAW, timeframe="1Min")) as f:
+        assert json.load(f) == [[start + 10 * DAY_NS, start + 15 * DAY_NS], [start + 20 * DAY_NS, start + 22 * DAY_NS]]
+
+    chunks = fetcher.plan(["AAPL", "MSFT"], START, END)
+    assert [(lo, hi) for symbol, lo, hi in chunks if symbol == "AAPL"] == [
+        (start, start + 5 * DAY_NS), (start + 5 * DAY_NS, start + 10 * DAY_NS),
+        (start + 15 * DAY_NS, start + 20 * DAY_NS),
+        (start + 22 * DAY_NS, start + 27 * DAY_NS), (start + 27 * DAY_NS, start + 30 * DAY_NS),
+    ]
+    assert [(lo, hi) for symbol, lo, hi in chunks if symbol == "MSFT"] == [
+        (start + i * DAY_NS, start + (i + 5) * DAY_NS) for i in range(0, 30, 5)]
+
+
+def test_retries_resume_within_a_chunk(tmp_path):
+    api = FakeBarsAPI(page_size=500, error_rate=0.3, seed=1)
+    fetcher = _fetcher(tmp_path, api, max_retries=50)
+
+    stats = fetcher.fetch(["AAPL"], START, END)
+
+    assert api.errors > 0 and stats["retries"] == api.errors
+    assert stats["failed"] == []
+    np.testing.assert_array_equal(_stored_times(fetcher, "AAPL"), _expected_times())  # No gaps, no duplicates
+    assert stats["rows"] == len(_expected_times())
+
+
+def test_rerun_refetches_only_failed_chunks(tmp_path):
+    start = _to_ns(START)
+    failing = {start + 5 * DAY_NS, start + 20 * DAY_NS}
+    api = FailingBarsAPI(fail_starts=failing)
+    fetcher = _fetcher(tmp_path, api, max_retries=0)
+
+    stats = fetcher.fetch(["AAPL"], START, END)
+    assert sorted(lo for symbol, lo, hi in stats["failed"]) == sorted(failing)
+    assert [(lo, hi) for symbol, lo, hi in fetcher.plan(["AAPL"], START, END)] == [
+        (lo, lo + 5 * DAY_NS) for lo in sorted(failing)]
+
+    api.starts.clear()
+    stats = fetcher.fetch(["AAPL"], START, END)
+    assert stats["failed"] == []
+    assert sorted(lo for symbol, lo in api.starts) == sorted(failing)
+    np.testing.assert_array_equal(_stored_times(fetcher, "AAPL"), _expected_times())
+
+
+@pytest.mark.parametrize("symbols", [["AAPL"], ["AAPL", "MSFT", "NVDA"]])
+def test_rerun_makes_no_requests(tmp_path, symbols):
+    api = FakeBarsAPI(page_size=1000)
+    fetcher = _fetcher(tmp_path, api)
+    fetcher.fetch(symbols, START, END)
+    requests_made = api.requests
+
+    stats = _fetcher(tmp_path, api).fetch(symbols, START, END)
+    assert stats["chunks"] == 0
+    assert api.requests == requests_made
+    for symbol in symbols:
+        np.testing.assert_array_equal(_stored_times(fetcher, symbol), _expected_times())
+
+
+def test_open_day_is_fetched_but_not_indexed(tmp_path):
+    today = time.time_ns() // DAY_NS * DAY_NS
+    start = today - 2 * DAY_NS
+    api = FakeBarsAPI()
+    fetcher = _fetcher(tmp_path, api)
+
+    fetcher.fetch(["AAPL"], start)
+    assert fetcher.index.ranges("AAPL") == [(start, today)]
+    [(symbol, lo, hi)] = fetcher.plan(["AAPL"], start)
+    assert lo == today  # A rerun fetches the rest of today again
+
+    fetcher.fetch(["AAPL"], start)
+    assert fetcher.index.ranges("AAPL") == [(start, today)]
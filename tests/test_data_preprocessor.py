@@ -0,0 +1,17 @@
+import pytest
+from data.data_preprocessor import parse_raw_filename
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("AAPL_1Min_raw.csv", ("AAPL", "1Min")),
+    ("data/raw/MSFT_5Min_raw.csv", ("MSFT", "5Min")),
+    ("BRK_B_1Day_raw.csv", ("BRK_B", "1Day")),
+])
+def test_parses_symbol_and_timeframe(name, expected):
+    assert parse_raw_filename(name) == expected
+
+
+@pytest.mark.parametrize("name", ["AAPL_raw.csv", "AAPL_1Min.csv", "AAPL_1Min_processed.csv"])
+def test_rejects_names_without_both(name):
+    with pytest.raises(ValueError, match="symbol and timeframe"):
+        parse_raw_filename(name)
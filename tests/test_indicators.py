@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from indicators.engine import IndicatorEngine, INDICATOR_COLUMNS
+from data.data_preprocessor import add_technical_indicators
+from benchmarks.indicator_benchmark import (ALL_FEATURES, synthetic_bars, pandas_reference, ta_indicators, per_bar,
+                                            split_batch, max_abs_diff)
+
+N_BARS = 5000
+
+# Max abs difference allowed per column: EWM-based columns are computed with identical arithmetic
+# everywhere; rolling windows (Bollinger, VWAP) are reduced per window by the kernels, with running
+# sums resynced once per lap per bar, and with running sums by pandas' rolling()
+EXACT = 0.0
+ROLLING_PER_BAR = 1e-10
+BOLLINGER_PANDAS = 1e-8
+ROLLING_COLUMNS = ("bollinger_h", "bollinger_l", "vwap_14")
+
+
+def _tolerance(name, pandas=False):
+    if name in ROLLING_COLUMNS:
+        return BOLLINGER_PANDAS if pandas else ROLLING_PER_BAR
+    return EXACT
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_bars(N_BARS, seed=3)
+
+
+@pytest.fixture(scope="module")
+def batch(bars):
+    return IndicatorEngine(ALL_FEATURES).batch(bars)
+
+
+@pytest.mark.parametrize("name", ALL_FEATURES)
+def test_per_bar_update_matches_batch(bars, batch, name):
+    live = per_bar(bars)
+    assert max_abs_diff(live[name], batch[name]) <= _tolerance(name)
+
+
+@pytest.mark.parametrize("name", ALL_FEATURES)
+def test_split_batch_matches_batch(bars, batch, name):
+    assert max_abs_diff(split_batch(bars, 7)[name], batch[name]) == 0.0
+
+
+@pytest.mark.parametrize("name", ALL_FEATURES)
+def test_offline_preprocessing_matches_batch(bars, batch, name):
+    offline = add_technical_indicators(bars.copy())
+    assert max_abs_diff(offline[name].to_numpy(), batch[name]) == 0.0
+
+
+@pytest.mark.parametrize("name", INDICATOR_COLUMNS)
+def test_batch_matches_pandas_recompute(bars, batch, name):
+    reference = pandas_reference(bars["close"].to_numpy())
+    assert max_abs_diff(batch[name], reference[name]) <= _tolerance(name, pandas=True)
+
+
+def test_vwap_matches_ta(bars, batch):
+    assert max_abs_diff(batch["vwap_14"], ta_indicators(bars)["vwap_14"].to_numpy()) <= 1e-12
+
+
+def test_nan_warmup_positions_agree(bars, batch):
+    reference = pandas_reference(bars["close"].to_numpy())
+    for name in ("bollinger_h", "bollinger_l"):
+        assert np.isnan(batch[name][:19]).all() and not np.isnan(batch[name][19:]).any()
+        assert np.array_equal(np.isnan(batch[name]), np.isnan(reference[name]))
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import pytest
+from data_streaming.ingest_queue import IngestQueue, IngestWorker, BLOCK, COALESCE, DROP, TRADE, QUOTE, FLUSH
+
+
+def _trade(symbol, price):
+    return {'S': symbol, 't': 0, 'p': price, 's': 100}
+
+
+def _quote(symbol, bid):
+    return {'S': symbol, 't': 0, 'bp': bid, 'bs': 1, 'ap': bid + 0.01, 'as': 1}
+
+
+def _items(batch):
+    return [(kind, item) for kind, item, enqueued in batch]
+
+
+def test_block_refuses_when_full():
+    queue = IngestQueue(2, BLOCK)
+    assert queue.offer(TRADE, _trade("AAPL", 1.0)) and queue.offer(QUOTE, _quote("AAPL", 1.0))
+    assert not queue.offer(TRADE, _trade("AAPL", 2.0))
+    assert len(queue) == 2 and queue.dropped == {TRADE: 0, QUOTE: 0}
+
+
+def test_drop_counts_each_kind():
+    queue = IngestQueue(1, DROP)
+    queue.offer(TRADE, _trade("AAPL", 1.0))
+    assert queue.offer(TRADE, _trade("AAPL", 2.0))
+    assert queue.offer(QUOTE, _quote("AAPL", 2.0))
+    assert queue.offer(QUOTE, _quote("MSFT", 2.0))
+    assert queue.dropped == {TRADE: 1, QUOTE: 2}
+    assert _items(queue.take()) == [(TRADE, _trade("AAPL", 1.0))]
+
+
+def test_coalesce_replaces_queued_quote_and_never_evicts_trades():
+    queue = IngestQueue(3, COALESCE)
+    queue.offer(QUOTE, _quote("AAPL", 1.0))
+    queue.offer(TRADE, _trade("AAPL", 1.0))
+    queue.offer(QUOTE, _quote("MSFT", 5.0))
+
+    assert queue.offer(QUOTE, _quote("MSFT", 5.5))          # Replaces the queued MSFT quote
+    assert queue.offer(QUOTE, _quote("AAPL", 1.5))          # AAPL's trade needs its quote: appended
+    assert queue.offer(QUOTE, _quote("AAPL", 1.6))          # Replaces the appended one
+    assert not queue.offer(TRADE, _trade("AAPL", 1.7))      # Trades wait for room
+    assert not queue.offer(QUOTE, _quote("NVDA", 9.0))      # Nothing of NVDA's to replace
+    assert queue.coalesced == 2 and queue.dropped == {TRADE: 0, QUOTE: 0}
+
+    # The trade is still processed after the quote it was queued behind, never a later one
+    assert _items(queue.take()) == [
+        (QUOTE, _quote("AAPL", 1.0)), (TRADE, _trade("AAPL", 1.0)), (QUOTE, _quote("MSFT", 5.5)),
+        (QUOTE, _quote("AAPL", 1.6))]
+
+
+def test_coalesce_never_touches_taken_quotes():
+    queue = IngestQueue(2, COALESCE)
+    queue.offer(QUOTE, _quote("AAPL", 1.0))
+    taken = queue.take()
+    queue.offer(TRADE, _trade("AAPL", 1.0))
+    queue.offer(TRADE, _trade("AAPL", 1.1))
+
+    assert not queue.offer(QUOTE, _quote("AAPL", 2.0))  # Its earlier quote is with the worker
+    assert _items(taken) == [(QUOTE, _quote("AAPL", 1.0))]
+
+
+def test_control_items_bypass_the_limit():
+    queue = IngestQueue(1, COALESCE)
+    queue.offer(QUOTE, _quote("AAPL", 1.0))
+    queue.put_control(FLUSH, 123)
+    assert queue.offer(QUOTE, _quote("AAPL", 2.0))
+    assert _items(queue.take()) == [(QUOTE, _quote("AAPL", 2.0)), (FLUSH, 123)]
+
+
+@pytest.mark.parametrize("policy", [BLOCK, COALESCE])
+def test_put_waits_for_room(policy):
+    async def run():
+        queue = IngestQueue(1, policy)
+        queue.offer(TRADE, _trade("AAPL", 1.0))
+        put = asyncio.create_task(queue.put(TRADE, _trade("AAPL", 2.0)))
+        await asyncio.sleep(0)
+        assert not put.done()
+        first = queue.take()
+        await asyncio.wait_for(put, 1.0)
+        return first + queue.take(), queue.waits
+
+    batch, waits = asyncio.run(run())
+    assert [item['p'] for kind, item in _items(batch)] == [1.0, 2.0]
+    assert waits == 1
+
+
+class _BlockingRegistry:
+    """Registry stand-in whose add_trades blocks until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.entered = threading.Event()
+        self.loop = None
+
+    def add_trades(self, trades):
+        self.entered.set()
+        self.release.wait()
+
+
+def test_worker_close_reports_a_thread_still_running():
+    registry = _BlockingRegistry()
+    queue = IngestQueue(10, BLOCK)
+    worker = IngestWorker(registry, queue).start()
+    queue.offer(TRADE, _trade("AAPL", 1.0))
+    assert registry.entered.wait(1.0)
+
+    assert not worker.close(timeout=0.05)
+    registry.release.set()
+    assert worker.close(timeout=1.0)
@@ -0,0 +1,41 @@
+from data_streaming.price_cache import LastPriceCache
+
+SECOND = 10**9
+
+
+class StubClock:
+    def __init__(self, now_ns):
+        self.now_ns = now_ns
+
+    def __call__(self):
+        return self.now_ns
+
+
+def test_serves_fresh_stream_price_without_fallback():
+    calls = []
+    cache = LastPriceCache(max_age_s=2.0, fallback=lambda symbol: calls.append(symbol), clock=StubClock(10 * SECOND))
+    cache.update("AAPL", 100.0, 9 * SECOND)
+
+    assert cache.price("AAPL") == 100.0
+    assert calls == [] and cache.hits == 1
+
+
+def test_fallback_is_cached_at_its_trade_time():
+    clock = StubClock(100 * SECOND)  # Local clock ahead of exchange time
+    cache = LastPriceCache(max_age_s=2.0, fallback=lambda symbol: (101.0, 90 * SECOND), clock=clock)
+    cache.update("AAPL", 100.0, 80 * SECOND)
+
+    assert cache.price("AAPL") == 101.0
+    assert cache.get("AAPL") == (101.0, 90 * SECOND)
+
+    # Streamed prints after the REST trade still replace it, though older than the local clock
+    cache.update("AAPL", 102.0, 95 * SECOND)
+    assert cache.get("AAPL") == (102.0, 95 * SECOND)
+
+
+def test_stale_without_fallback_returns_none():
+    cache = LastPriceCache(max_age_s=1.0, clock=StubClock(10 * SECOND))
+    cache.update("AAPL", 100.0, 5 * SECOND)
+
+    assert cache.price("AAPL") is None
+    assert cache.price("AAPL", max_age_s=10.0) == 100.0
@@ -0,0 +1,44 @@
+import math
+import pytest
+from data_streaming.top_of_book import TopOfBook
+
+
+def _quote(bid, ask, t, symbol="AAPL", bid_size=100, ask_size=200):
+    return {'S': symbol, 't': t, 'bp': bid, 'bs': bid_size, 'ap': ask, 'as': ask_size}
+
+
+def test_applies_stream_and_rest_style_quotes():
+    book = TopOfBook(["AAPL"])
+    book.add_quote(_quote(10.00, 10.02, 1))
+    assert (book["AAPL"].bid, book["AAPL"].ask, book["AAPL"].timestamp) == (10.00, 10.02, 1)
+
+    book.add_quote({'symbol': "AAPL", 'timestamp': 2, 'bid_price': 10.01, 'bid_size': 1,
+                    'ask_price': 10.03, 'ask_size': 3})
+    assert (book["AAPL"].bid, book["AAPL"].ask_size) == (10.01, 3)
+    assert book.quotes_processed == 2
+
+    book.add_quote(_quote(9.00, 9.50, 1))  # Older than the stored quote
+    book.add_quote(_quote(9.00, 9.50, 3, symbol="MSFT"))  # Not in the book
+    assert book.stale_quotes == 1 and book["AAPL"].bid == 10.01
+
+
+@pytest.mark.parametrize("bid, ask", [(0.0, 10.02), (10.00, 0.0), (10.05, 10.00), (math.nan, 10.02)])
+def test_invalid_quote_leaves_prints_unclassified(bid, ask):
+    book = TopOfBook(["AAPL"])
+    state = book["AAPL"]
+    book.add_quote(_quote(10.00, 10.02, 1))
+    assert state.side(10.02) == 1
+
+    book.add_quote(_quote(bid, ask, 2))
+    assert book.invalid_quotes == 1
+    assert state.side(10.02) == 0 and state.side(9.0) == 0
+    assert math.isnan(state.spread) and math.isnan(state.imbalance)
+
+    book.add_quote(_quote(10.00, 10.02, 3))
+    assert state.side(10.00) == -1
+
+
+def test_locked_quote_is_valid():
+    book = TopOfBook(["AAPL"])
+    book.add_quote(_quote(10.00, 10.00, 1))
+    assert book.invalid_quotes == 0 and book["AAPL"].side(10.00) == 1